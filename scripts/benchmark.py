@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Микро-бенчмарки кэша векторов, эмбеддера и хранилища на синтетических данных (без сети).
+
+Использование:
+    python scripts/benchmark.py --output bench/HEAD.json
+    python scripts/benchmark.py --suite cache --sizes 10000,100000
+    python scripts/benchmark.py --quick --output bench/new.json --compare bench/HEAD.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from matching_service.catalog import ProductAttributes
+from matching_service.services.attribute_index import SearchFilter
+from matching_service.services.embedder import TextEmbedder
+from matching_service.services.vector_cache import VectorCache
+from matching_service.services.write_behind_queue import WriteBehindQueue
+from matching_service.storage.repositories import SqliteVectorRepository
+from matching_service.storage.repositories.connection import DatabaseConnection
+from matching_service.storage.repositories.vector_reader import VectorReader
+from matching_service.storage.repositories.vector_writer import VectorWriter
+
+SUITES = ("cache", "embedder", "storage")
+VECTOR_DIM = 384
+
+# Фильтры поиска по синтетическим атрибутам: категория c{i % 100}, продавец s{i % 1000}, рейтинг i % 5 + 1
+SEARCH_FILTERS = {
+    "category_1pct": SearchFilter(category=("root", "c7")),
+    "seller_0.1pct": SearchFilter(seller="s7"),
+    "rating_40pct": SearchFilter(min_rating=4.0),
+}
+
+# Слова для синтетических названий товаров, из них же собирается словарь крошечной модели
+WORDS = (
+    "адаптер", "кабель", "чехол", "фильтр", "масляный", "воздушный", "салонный", "щетка", "стеклоочистителя",
+    "коврик", "резиновый", "лампа", "светодиодная", "аккумулятор", "зарядное", "устройство", "автомобильный",
+    "держатель", "телефона", "магнитный", "компрессор", "насос", "ключ", "набор", "инструментов", "диагностический",
+    "сканер", "видеорегистратор", "антифриз", "моторное", "масло", "синтетическое", "шина", "зимняя", "летняя",
+    "black", "red", "pro", "mini", "usb", "type-c", "12v", "24v", "led", "h4", "h7", "5w-30", "10w-40",
+)
+
+
+def measure(fn: Callable[[], Any], min_repeats: int, min_seconds: float) -> dict[str, float | int]:
+    fn()
+    timings: list[float] = []
+    started = time.perf_counter()
+    while len(timings) < min_repeats or time.perf_counter() - started < min_seconds:
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    ms = np.array(timings) * 1000
+    return {
+        "repeats": len(timings),
+        "median_ms": round(float(np.median(ms)), 4),
+        "p90_ms": round(float(np.percentile(ms, 90)), 4),
+        "min_ms": round(float(ms.min()), 4),
+    }
+
+
+def random_unit_vectors(rng: np.random.Generator, count: int, dim: int, chunk: int = 100_000) -> npt.NDArray[np.float32]:
+    vectors = np.empty((count, dim), dtype=np.float32)
+    for start in range(0, count, chunk):
+        block = rng.standard_normal((min(chunk, count - start), dim), dtype=np.float32)
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        vectors[start : start + len(block)] = block
+    return vectors
+
+
+def random_texts(rng: np.random.Generator, count: int, words: int) -> list[str]:
+    picks = rng.integers(0, len(WORDS), size=(count, words))
+    return [" ".join(WORDS[i] for i in row) for row in picks]
+
+
+def build_tiny_model(path: Path, seed: int) -> None:
+    import torch
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    path.mkdir(parents=True, exist_ok=True)
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *sorted({w for word in WORDS for w in word.split("-")} | {"-"})]
+    (path / "vocab.txt").write_text("\n".join(vocab) + "\n", encoding="utf-8")
+    BertTokenizerFast(vocab_file=str(path / "vocab.txt"), do_lower_case=True, strip_accents=False).save_pretrained(path)
+    torch.manual_seed(seed)
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=VECTOR_DIM,
+        num_hidden_layers=2,
+        num_attention_heads=6,
+        intermediate_size=4 * VECTOR_DIM,
+        max_position_embeddings=512,
+    )
+    BertModel(config).save_pretrained(path)
+
+
+def bench_cache(args: argparse.Namespace, rng: np.random.Generator) -> list[dict[str, Any]]:
+    results = []
+    for size in args.sizes:
+        print(f"cache: size={size:,}", flush=True)
+        vectors = random_unit_vectors(rng, size, VECTOR_DIM)
+        cache = VectorCache(initial_capacity=size, vector_dim=VECTOR_DIM)
+        load_started = time.perf_counter()
+        cache.load_all(list(range(1, size + 1)), [""] * size, vectors, copy=False)
+        results.append({
+            "suite": "cache",
+            "name": "load_all",
+            "params": {"size": size, "dim": VECTOR_DIM},
+            "seconds": round(time.perf_counter() - load_started, 4),
+        })
+        for batch in args.query_batches:
+            queries = random_unit_vectors(rng, batch, VECTOR_DIM)
+            for top_k in args.top_ks:
+                stats = measure(lambda c=cache, q=queries, k=top_k: c.search_vectors(q, k), args.min_repeats, args.min_seconds)
+                results.append({
+                    "suite": "cache",
+                    "name": "search_vectors",
+                    "params": {"size": size, "dim": VECTOR_DIM, "batch": batch, "top_k": top_k},
+                    **stats,
+                    "queries_per_second": round(batch * 1000 / stats["median_ms"], 2),
+                })
+        for threads in args.scan_threads:
+            sharded = VectorCache(
+                initial_capacity=size,
+                vector_dim=VECTOR_DIM,
+                scan_threads=threads,
+                scan_shard_size=args.scan_shard_size,
+            )
+            sharded.load_all(list(range(1, size + 1)), [""] * size, vectors, copy=False)
+            for batch in args.query_batches:
+                queries = random_unit_vectors(rng, batch, VECTOR_DIM)
+                stats = measure(lambda s=sharded, q=queries: s.search_vectors(q, 10), args.min_repeats, args.min_seconds)
+                results.append({
+                    "suite": "cache",
+                    "name": "search_sharded",
+                    "params": {
+                        "size": size,
+                        "dim": VECTOR_DIM,
+                        "batch": batch,
+                        "top_k": 10,
+                        "scan_threads": threads,
+                        "shard_size": args.scan_shard_size,
+                    },
+                    **stats,
+                    "queries_per_second": round(batch * 1000 / stats["median_ms"], 2),
+                })
+            sharded.close()
+        attributes_started = time.perf_counter()
+        cache.set_attributes({
+            vector_id: ProductAttributes(
+                category=("root", f"c{vector_id % 100}"),
+                seller=f"s{vector_id % 1000}",
+                rating=float(vector_id % 5 + 1),
+            )
+            for vector_id in range(1, size + 1)
+        })
+        results.append({
+            "suite": "cache",
+            "name": "set_attributes",
+            "params": {"size": size},
+            "seconds": round(time.perf_counter() - attributes_started, 4),
+        })
+        queries = random_unit_vectors(rng, 1, VECTOR_DIM)
+        for filter_name, search_filter in SEARCH_FILTERS.items():
+            stats = measure(
+                lambda c=cache, q=queries, f=search_filter: c.search_vectors(q, 10, search_filter=f),
+                args.min_repeats,
+                args.min_seconds,
+            )
+            results.append({
+                "suite": "cache",
+                "name": "search_filtered",
+                "params": {"size": size, "dim": VECTOR_DIM, "batch": 1, "top_k": 10, "filter": filter_name},
+                **stats,
+                "queries_per_second": round(1000 / stats["median_ms"], 2),
+            })
+        del cache, vectors
+    return results
+
+
+def bench_embedder(args: argparse.Namespace, rng: np.random.Generator) -> list[dict[str, Any]]:
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = args.model
+        if model_path is None:
+            model_path = str(Path(tmp) / "tiny-bert")
+            build_tiny_model(Path(model_path), args.seed)
+        embedder = TextEmbedder(model_path, device=args.device, max_text_length=args.max_text_length)
+        results = []
+        for words in args.text_words:
+            texts = random_texts(rng, args.embed_texts, words)
+            for batch_size in args.embed_batches:
+                print(f"embedder: words={words} batch_size={batch_size}", flush=True)
+                stats = measure(
+                    lambda t=texts, b=batch_size: embedder.encode(t, batch_size=b, show_progress=False),
+                    args.min_repeats,
+                    args.min_seconds,
+                )
+                results.append({
+                    "suite": "embedder",
+                    "name": "encode",
+                    "params": {"model": "tiny-bert" if args.model is None else args.model, "texts": len(texts), "words": words, "batch_size": batch_size},
+                    **stats,
+                    "texts_per_second": round(len(texts) * 1000 / stats["median_ms"], 2),
+                })
+        return results
+
+
+def bench_storage(args: argparse.Namespace, rng: np.random.Generator) -> list[dict[str, Any]]:
+    rows = args.storage_rows
+    ids = list(range(1, rows + 1))
+    texts = random_texts(rng, rows, 12)
+    vectors = random_unit_vectors(rng, rows, VECTOR_DIM)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"storage: rows={rows:,}", flush=True)
+        db = DatabaseConnection(str(Path(tmp) / "single.db"))
+        writer = VectorWriter(db)
+        single_rows = min(rows, args.storage_single_rows)
+        started = time.perf_counter()
+        for vector_id, text, vector in zip(ids[:single_rows], texts, vectors, strict=False):
+            writer.upsert(vector_id, text, vector)
+        elapsed = time.perf_counter() - started
+        results.append({
+            "suite": "storage",
+            "name": "upsert",
+            "params": {"rows": single_rows, "dim": VECTOR_DIM},
+            "seconds": round(elapsed, 4),
+            "rows_per_second": round(single_rows / elapsed, 2),
+        })
+        db.close()
+
+        # Те же поштучные upsert через очередь write-behind, время включает сброс очереди в SQLite
+        repository = SqliteVectorRepository(str(Path(tmp) / "write_behind.db"))
+        cache = VectorCache(initial_capacity=single_rows, vector_dim=VECTOR_DIM)
+        write_queue = WriteBehindQueue(
+            repository,
+            batch_rows=args.write_behind_batch_rows,
+            max_delay_ms=args.write_behind_max_delay_ms,
+        )
+        started = time.perf_counter()
+        for vector_id, text, vector in zip(ids[:single_rows], texts, vectors, strict=False):
+            write_queue.upsert(cache, [vector_id], [text], vector[np.newaxis, :], [ProductAttributes()])
+        write_queue.close()
+        elapsed = time.perf_counter() - started
+        queue_stats = write_queue.stats()
+        results.append({
+            "suite": "storage",
+            "name": "write_behind_upsert",
+            "params": {
+                "rows": single_rows,
+                "dim": VECTOR_DIM,
+                "batch_rows": args.write_behind_batch_rows,
+                "max_delay_ms": args.write_behind_max_delay_ms,
+            },
+            "seconds": round(elapsed, 4),
+            "rows_per_second": round(single_rows / elapsed, 2),
+            "commits": queue_stats.commits_total,
+        })
+        repository.close()
+
+        db = DatabaseConnection(str(Path(tmp) / "bulk.db"))
+        writer = VectorWriter(db)
+        for name, bulk_ids in (("upsert_many_insert", ids), ("upsert_many_update", ids)):
+            started = time.perf_counter()
+            for start in range(0, rows, args.storage_chunk):
+                end = start + args.storage_chunk
+                writer.upsert_many(bulk_ids[start:end], texts[start:end], vectors[start:end])
+            elapsed = time.perf_counter() - started
+            results.append({
+                "suite": "storage",
+                "name": name,
+                "params": {"rows": rows, "dim": VECTOR_DIM, "chunk": args.storage_chunk},
+                "seconds": round(elapsed, 4),
+                "rows_per_second": round(rows / elapsed, 2),
+            })
+
+        reader = VectorReader(db)
+        stats = measure(reader.get_all_vectors, min(args.min_repeats, 3), 0.0)
+        results.append({
+            "suite": "storage",
+            "name": "get_all_vectors",
+            "params": {"rows": rows, "dim": VECTOR_DIM},
+            **stats,
+            "rows_per_second": round(rows * 1000 / stats["median_ms"], 2),
+        })
+        db.close()
+    return results
+
+
+def environment(seed: int) -> dict[str, Any]:
+    import torch
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "torch": torch.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "torch_threads": torch.get_num_threads(),
+        "seed": seed,
+    }
+
+
+def result_key(result: dict[str, Any]) -> str:
+    return f"{result['suite']}.{result['name']}{json.dumps(result['params'], sort_keys=True)}"
+
+
+def result_seconds(result: dict[str, Any]) -> float:
+    return result["median_ms"] / 1000 if "median_ms" in result else result["seconds"]
+
+
+def compare(baseline_path: Path, results: list[dict[str, Any]], threshold: float) -> int:
+    baseline = {result_key(r): r for r in json.loads(baseline_path.read_text(encoding="utf-8"))["results"]}
+    regressions = 0
+    print(f"\n{'=' * 80}\n📊 СРАВНЕНИЕ С {baseline_path} (порог {threshold:.0%})\n{'=' * 80}")
+    for result in results:
+        old = baseline.get(result_key(result))
+        if old is None:
+            continue
+        change = result_seconds(result) / result_seconds(old) - 1
+        regressed = change > threshold
+        regressions += regressed
+        mark = "❌" if regressed else ("✅" if change < -threshold else "  ")
+        print(f"{mark} {change:+7.1%}  {result_key(result)}")
+    print(f"Регрессий: {regressions}")
+    return regressions
+
+
+def parse_ints(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Микро-бенчмарки кэша векторов, эмбеддера и хранилища",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--suite", choices=SUITES, action="append", help="Набор бенчмарков (default: все)")
+    parser.add_argument("--output", type=Path, help="JSON с результатами (default: только вывод в консоль)")
+    parser.add_argument("--compare", type=Path, help="JSON предыдущего запуска для поиска регрессий")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Допустимое замедление медианы (default: 0.1)")
+    parser.add_argument("--quick", action="store_true", help="Уменьшенные размеры для быстрой проверки")
+    parser.add_argument("--seed", type=int, default=42, help="Seed синтетических данных (default: 42)")
+    parser.add_argument("--min-repeats", type=int, default=5, help="Минимум повторов замера (default: 5)")
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="Минимальное время замера, сек (default: 1.0)")
+    parser.add_argument("--sizes", type=parse_ints, default=[10_000, 100_000, 1_000_000], help="Размеры кэша")
+    parser.add_argument("--top-ks", type=parse_ints, default=[1, 10, 100], help="Значения top_k")
+    parser.add_argument("--query-batches", type=parse_ints, default=[1, 16, 64], help="Размеры батча запросов")
+    parser.add_argument("--scan-threads", type=parse_ints, default=[4, 16], help="Потоки шардированного скана")
+    parser.add_argument("--scan-shard-size", type=int, default=65_536, help="Строк в шарде скана (default: 65536)")
+    parser.add_argument("--model", type=str, help="Локальная модель вместо крошечной BERT, собранной на лету")
+    parser.add_argument("--device", type=str, default="cpu", help="Устройство для эмбеддера (default: cpu)")
+    parser.add_argument("--max-text-length", type=int, default=128, help="Макс. длина текста в токенах (default: 128)")
+    parser.add_argument("--embed-texts", type=int, default=256, help="Текстов в одном замере encode (default: 256)")
+    parser.add_argument("--embed-batches", type=parse_ints, default=[1, 8, 32, 128], help="Размеры батча encode")
+    parser.add_argument("--text-words", type=parse_ints, default=[4, 16, 64], help="Длины текстов в словах")
+    parser.add_argument("--storage-rows", type=int, default=20_000, help="Строк для bulk upsert и чтения (default: 20000)")
+    parser.add_argument("--storage-single-rows", type=int, default=2_000, help="Строк для поштучного upsert (default: 2000)")
+    parser.add_argument("--storage-chunk", type=int, default=1_000, help="Строк в одном upsert_many (default: 1000)")
+    parser.add_argument("--write-behind-batch-rows", type=int, default=500, help="Строк в групповом коммите (default: 500)")
+    parser.add_argument("--write-behind-max-delay-ms", type=float, default=10.0, help="Ожидание группы, мс (default: 10)")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.sizes = [10_000]
+        args.scan_shard_size = 2_048
+        args.min_repeats, args.min_seconds = 3, 0.2
+        args.embed_texts, args.storage_rows, args.storage_single_rows = 64, 2_000, 200
+    logging.basicConfig(level=logging.WARNING)
+    runners = {"cache": bench_cache, "embedder": bench_embedder, "storage": bench_storage}
+    results: list[dict[str, Any]] = []
+    for suite in args.suite or SUITES:
+        # Свой генератор на набор: данные не зависят от того, какие наборы запущены
+        results.extend(runners[suite](args, np.random.default_rng(args.seed)))
+
+    report = {"environment": environment(args.seed), "results": results}
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"✅ Результаты сохранены: {args.output}")
+    if args.compare:
+        return 1 if compare(args.compare, results, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,79 +17,55 @@ from typing import Any
 import httpx
 from tqdm.asyncio import tqdm
 
-
-def format_product_text(product: dict[str, Any]) -> str:
-    """Формирует текстовое представление товара для векторизации."""
-    parts = []
-    
-    # Название (обязательное)
-    if title := product.get("title", "").strip():
-        parts.append(f"Название: {title}")
-    
-    # Категории
-    categories = []
-    for cat_key in ["greatgrandparent_category", "grandparent_category", "parent_category", "category"]:
-        if cat_val := product.get(cat_key):
-            if cat_val not in categories:
-                categories.append(cat_val)
-    if categories:
-        parts.append(f"Категории: {' > '.join(categories)}")
-    
-    # Описание (очищенное от HTML)
-    if desc := product.get("description", "").strip():
-        # Простая очистка HTML тегов
-        import re
-        clean_desc = re.sub(r'<[^>]+>', ' ', desc)
-        clean_desc = re.sub(r'\s+', ' ', clean_desc).strip()
-        if clean_desc:
-            parts.append(f"Описание: {clean_desc[:2000]}")  # Ограничение длины
-    
-    # Атрибуты
-    if attrs := product.get("attributes"):
-        if isinstance(attrs, list) and attrs:
-            parts.append(f"Характеристики: {'; '.join(str(a) for a in attrs[:10])}")
-    
-    # Продавец
-    if seller := product.get("seller", "").strip():
-        parts.append(f"Продавец: {seller}")
-    
-    # Рейтинг
-    if rating := product.get("rating"):
-        if rating > 0:
-            parts.append(f"Рейтинг: {rating}")
-    
-    return " | ".join(parts)
+from matching_service.catalog import extract_product_attributes, format_product_text
 
 
-async def upsert_product(
+async def upsert_batch(
     client: httpx.AsyncClient,
     base_url: str,
-    product: dict[str, Any],
+    products: list[dict[str, Any]],
     semaphore: asyncio.Semaphore,
-) -> tuple[int, bool, str | None]:
+) -> list[tuple[int, bool, str | None]]:
     """
-    Отправляет один продукт на сервер.
+    Отправляет батч продуктов на сервер одним запросом /upsert/batch.
     
     Returns:
-        (product_id, success, error_message)
+        [(product_id, success, error_message), ...]
     """
-    product_id = product.get("id")
-    if not product_id:
-        return 0, False, "Missing 'id' field"
+    results: list[tuple[int, bool, str | None]] = []
+    items = []
+    for product in products:
+        product_id = product.get("id")
+        if not product_id:
+            results.append((0, False, "Missing 'id' field"))
+            continue
+        text = format_product_text(product)
+        if not text:
+            results.append((product_id, False, "Empty text after formatting"))
+            continue
+        attributes = extract_product_attributes(product)
+        items.append(
+            {
+                "id": product_id,
+                "text": text,
+                "category": list(attributes.category) or None,
+                "seller": attributes.seller,
+                "rating": attributes.rating,
+            }
+        )
     
-    text = format_product_text(product)
-    if not text:
-        return product_id, False, "Empty text after formatting"
+    if not items:
+        return results
     
     async with semaphore:
         try:
             response = await client.post(
-                f"{base_url}/upsert",
-                json={"id": product_id, "text": text},
-                timeout=30.0,
+                f"{base_url}/upsert/batch",
+                json={"items": items},
+                timeout=300.0,
             )
             response.raise_for_status()
-            return product_id, True, None
+            results.extend((item["id"], True, None) for item in items)
         except httpx.HTTPStatusError as e:
             error_msg = f"HTTP {e.response.status_code}"
             try:
@@ -97,9 +73,10 @@ async def upsert_product(
                 error_msg += f": {error_detail.get('detail', '')}"
             except Exception:
                 pass
-            return product_id, False, error_msg
+            results.extend((item["id"], False, error_msg) for item in items)
         except Exception as e:
-            return product_id, False, str(e)
+            results.extend((item["id"], False, str(e)) for item in items)
+    return results
 
 
 async def load_jsonl_file(
@@ -149,8 +126,8 @@ async def load_jsonl_file(
     # Загружаем данные
     print(f"🚀 Начинаем загрузку с параметрами:")
     print(f"   Записей: {total}")
-    print(f"   Воркеров: {max_workers}")
-    print(f"   Размер батча: {batch_size}\n")
+    print(f"   Параллельных запросов: {max_workers}")
+    print(f"   Размер батча (/upsert/batch): {batch_size}\n")
     
     stats = {"total": total, "success": 0, "failed": 0}
     failed_ids = []
@@ -158,23 +135,14 @@ async def load_jsonl_file(
     semaphore = asyncio.Semaphore(max_workers)
     
     async with httpx.AsyncClient() as client:
-        # Обрабатываем батчами для контроля памяти
-        for i in range(0, total, batch_size):
-            batch = products[i:i + batch_size]
-            
-            tasks = [
-                upsert_product(client, base_url, product, semaphore)
-                for product in batch
-            ]
-            
-            # Выполняем с progress bar
-            results = await tqdm.gather(
-                *tasks,
-                desc=f"Батч {i//batch_size + 1}/{(total + batch_size - 1)//batch_size}",
-                total=len(tasks),
-            )
-            
-            for product_id, success, error in results:
+        tasks = [
+            upsert_batch(client, base_url, products[i:i + batch_size], semaphore)
+            for i in range(0, total, batch_size)
+        ]
+        
+        # Батчи отправляются параллельно (не более max_workers одновременно)
+        for batch_task in tqdm.as_completed(tasks, desc="Загрузка", unit="батч", total=len(tasks)):
+            for product_id, success, error in await batch_task:
                 if success:
                     stats["success"] += 1
                 else:
@@ -219,13 +187,13 @@ def main() -> int:
         "--batch-size",
         type=int,
         default=100,
-        help="Размер батча для обработки (default: 100)",
+        help="Кол-во товаров в одном запросе /upsert/batch (default: 100)",
     )
     parser.add_argument(
         "--workers",
         type=int,
         default=10,
-        help="Количество параллельных воркеров (default: 10)",
+        help="Количество параллельных batch-запросов (default: 10)",
     )
     
     args = parser.parse_args()
@@ -6,18 +6,29 @@
     python scripts/test_search.py
     python scripts/test_search.py --text "адаптер ELM327"
     python scripts/test_search.py --random --top-k 10
-    python scripts/test_search.py --load-test --count 1000
+    python scripts/test_search.py --load-test --count 1000 --rps 200 --duration 30
+    python scripts/test_search.py --load-test --mix search=8,batch=1,upsert=1 --poisson
+    python scripts/test_search.py --load-test --in-process --rps 500 --stub-latency-ms 2
 """
 
 import argparse
 import asyncio
+import hashlib
+import math
+import random
+import socket
 import sqlite3
 import sys
+import tempfile
+import threading
 import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
 import httpx
-from tqdm.asyncio import tqdm
+import numpy as np
 
 
 def get_random_product_from_db(db_path: Path) -> tuple[int, str] | None:
@@ -73,24 +84,6 @@ def search_products(base_url: str, query_text: str, top_k: int = 5) -> list[dict
         return None
 
 
-async def search_products_async(client: httpx.AsyncClient, base_url: str, query_text: str, top_k: int = 5) -> tuple[bool, float, int]:
-    """Асинхронный поиск. Возвращает (успех, время, количество результатов)."""
-    start_time = time.time()
-    try:
-        response = await client.get(
-            f"{base_url}/search",
-            params={"text": query_text, "top_k": top_k},
-            timeout=30.0,
-        )
-        response.raise_for_status()
-        results = response.json()
-        elapsed = time.time() - start_time
-        return True, elapsed, len(results) if results else 0
-    except Exception:
-        elapsed = time.time() - start_time
-        return False, elapsed, 0
-
-
 def print_results(query_id: int | None, query_text: str, results: list[dict]) -> None:
     """Выводит результаты поиска."""
     print("=" * 80)
@@ -112,60 +105,274 @@ def print_results(query_id: int | None, query_text: str, results: list[dict]) ->
         print()
 
 
-async def load_test(base_url: str, db_path: Path, count: int, top_k: int, workers: int) -> None:
-    """Нагрузочное тестирование поиска."""
-    print(f"📖 Загружаем {count} товаров из БД...")
-    products = get_products_from_db(db_path, count)
-    
-    if not products:
-        print("❌ БД пуста или недоступна")
-        return
-    
-    if len(products) < count:
-        print(f"⚠️  В БД только {len(products)} товаров, будет протестировано {len(products)}")
-        count = len(products)
-    
-    print(f"✅ Загружено {count} товаров\n")
-    print(f"🚀 Начинаем нагрузочное тестирование:")
-    print(f"   Товаров: {count}")
-    print(f"   Top-K: {top_k}")
-    print(f"   Воркеров: {workers}\n")
-    
-    stats = {"success": 0, "failed": 0, "total_time": 0.0, "total_results": 0}
-    semaphore = asyncio.Semaphore(workers)
-    
-    async def test_one(product_id: int, query_text: str, pbar: tqdm) -> None:
-        async with semaphore:
-            async with httpx.AsyncClient() as client:
-                success, elapsed, num_results = await search_products_async(client, base_url, query_text, top_k)
-                pbar.update(1)
-                if success:
-                    stats["success"] += 1
-                    stats["total_time"] += elapsed
-                    stats["total_results"] += num_results
+class LatencyHistogram:
+    """
+    Гистограмма в стиле HdrHistogram: линейные корзины внутри каждой степени двойки.
+
+    Значения хранятся в микросекундах, относительная ошибка перцентилей не больше 1/128 (< 0.8%).
+    """
+
+    SUB_BUCKET_BITS = 7
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+    MAX_SHIFT = 40
+
+    def __init__(self) -> None:
+        self.counts = [0] * (2 * self.SUB_BUCKETS + self.MAX_SHIFT * self.SUB_BUCKETS)
+        self.total = 0
+        self.sum_us = 0
+        self.max_us = 0
+
+    def _index(self, value_us: int) -> int:
+        if value_us < 2 * self.SUB_BUCKETS:
+            return value_us
+        shift = value_us.bit_length() - 1 - self.SUB_BUCKET_BITS
+        return 2 * self.SUB_BUCKETS + (shift - 1) * self.SUB_BUCKETS + (value_us >> shift) - self.SUB_BUCKETS
+
+    def _value(self, index: int) -> int:
+        if index < 2 * self.SUB_BUCKETS:
+            return index
+        shift, sub = divmod(index - 2 * self.SUB_BUCKETS, self.SUB_BUCKETS)
+        shift += 1
+        # Верхняя граница корзины: перцентиль не занижается
+        return ((sub + self.SUB_BUCKETS + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        value_us = max(int(seconds * 1_000_000), 0)
+        self.counts[self._index(value_us)] += 1
+        self.total += 1
+        self.sum_us += value_us
+        self.max_us = max(self.max_us, value_us)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts, strict=True)]
+        self.total += other.total
+        self.sum_us += other.sum_us
+        self.max_us = max(self.max_us, other.max_us)
+
+    def percentile_ms(self, percentile: float) -> float:
+        if self.total == 0:
+            return 0.0
+        target = max(math.ceil(percentile / 100 * self.total), 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._value(index), self.max_us) / 1000
+        return self.max_us / 1000
+
+    def mean_ms(self) -> float:
+        return self.sum_us / self.total / 1000 if self.total else 0.0
+
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+REQUEST_KINDS = ("search", "batch", "upsert")
+SYNTHETIC_WORDS = (
+    "адаптер", "кабель", "чехол", "фильтр", "масляный", "воздушный", "щетка", "коврик", "лампа", "светодиодная",
+    "аккумулятор", "зарядное", "устройство", "держатель", "телефона", "компрессор", "насос", "набор", "ключей",
+    "сканер", "масло", "моторное", "шина", "зимняя", "black", "pro", "usb", "12v", "led", "h7", "5w-30",
+)
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """Разбирает соотношение трафика вида search=8,batch=1,upsert=1."""
+    mix: dict[str, float] = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in REQUEST_KINDS:
+            raise argparse.ArgumentTypeError(f"неизвестный тип запроса: {kind} (допустимо: {', '.join(REQUEST_KINDS)})")
+        mix[kind] = float(weight or 1)
+    if sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("сумма весов должна быть больше нуля")
+    return mix
+
+
+def synthetic_products(count: int, seed: int) -> list[tuple[int, str]]:
+    """Синтетические товары для запуска без БД."""
+    rng = random.Random(seed)
+    return [(i, " ".join(rng.choices(SYNTHETIC_WORDS, k=rng.randint(4, 16)))) for i in range(1, count + 1)]
+
+
+class StubEmbedder:
+    """Детерминированные эмбеддинги из хеша текста вместо модели: нагружается только сервисная часть."""
+
+    def __init__(self, dim: int, latency_ms: float = 0.0) -> None:
+        self.embedding_dim = dim
+        self._latency = latency_ms / 1000
+
+    def encode(self, texts: list[str], batch_size: int, normalize: bool = True, show_progress: bool = True) -> np.ndarray:
+        if self._latency:
+            time.sleep(self._latency)
+        vectors = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+            vectors[row] = np.random.default_rng(seed).standard_normal(self.embedding_dim, dtype=np.float32)
+        if normalize:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+
+@contextmanager
+def in_process_service(products: list[tuple[int, str]], dim: int, latency_ms: float) -> Iterator[str]:
+    """Запускает сервис в этом процессе на временной БД со StubEmbedder, возвращает его URL."""
+    import uvicorn
+
+    from matching_service.config import APIConfig, CacheConfig, DBConfig, MLConfig
+    from matching_service.entrypoints.run_web_server import create_app
+    from matching_service.storage.repositories import SqliteVectorRepository
+
+    embedder = StubEmbedder(dim, latency_ms)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "vectors.db"
+        repository = SqliteVectorRepository(db_path=str(db_path))
+        for start in range(0, len(products), 1000):
+            chunk = products[start : start + 1000]
+            texts = [text for _, text in chunk]
+            repository.upsert_many([product_id for product_id, _ in chunk], texts, embedder.encode(texts, batch_size=len(texts)))
+        repository.close()
+
+        app = create_app(
+            DBConfig(vector_db_path=db_path),
+            MLConfig(model_name="stub", vector_dim=dim),
+            APIConfig(),
+            CacheConfig(snapshot_enabled=False),
+            embedder=embedder,
+        )
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        thread = threading.Thread(target=server.run, name="in-process-service", daemon=True)
+        thread.start()
+        try:
+            yield f"http://127.0.0.1:{port}"
+        finally:
+            server.should_exit = True
+            thread.join()
+
+
+async def wait_ready(client: httpx.AsyncClient, base_url: str, timeout: float) -> bool:
+    """Ждет, пока /health/ready не ответит 200 (модель и кэш загружены)."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            response = await client.get(f"{base_url}/health/ready", timeout=5.0)
+            if response.status_code == 200:
+                return True
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    return False
+
+
+async def load_test(
+    base_url: str,
+    products: list[tuple[int, str]],
+    rps: float,
+    duration: float,
+    warmup: float,
+    mix: dict[str, float],
+    top_k: int,
+    batch_size: int,
+    connections: int,
+    max_inflight: int,
+    poisson: bool,
+    seed: int,
+) -> int:
+    """
+    Нагрузочное тестирование в открытом цикле.
+
+    Запросы отправляются по расписанию с частотой rps независимо от того, ответил ли сервис на предыдущие.
+    Латентность считается от запланированного момента отправки, поэтому отставание генератора
+    (coordinated omission) попадает в перцентили, а не прячется.
+    """
+    rng = random.Random(seed)
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    histograms = {kind: LatencyHistogram() for kind in kinds}
+    sent: Counter[str] = Counter()
+    errors: Counter[tuple[str, str]] = Counter()
+    dropped = 0
+    max_lag = 0.0
+    inflight: set[asyncio.Task] = set()
+
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        if not await wait_ready(client, base_url, timeout=600.0):
+            print(f"❌ Сервис не готов: {base_url}/health/ready")
+            return 1
+
+        async def send(kind: str, scheduled: float, record: bool) -> None:
+            try:
+                if kind == "search":
+                    response = await client.get("/search", params={"text": rng.choice(products)[1], "top_k": top_k})
+                elif kind == "batch":
+                    queries = [{"text": text, "top_k": top_k} for _, text in rng.choices(products, k=batch_size)]
+                    response = await client.post("/search/batch", json={"queries": queries})
                 else:
-                    stats["failed"] += 1
-    
-    pbar = tqdm(total=count, desc="Тестирование", unit="запрос")
-    start_time = time.time()
-    
-    tasks = [test_one(product_id, query_text, pbar) for product_id, query_text in products]
-    await asyncio.gather(*tasks)
-    
-    pbar.close()
-    total_elapsed = time.time() - start_time
-    
+                    product_id, text = rng.choice(products)
+                    response = await client.post("/upsert", json={"id": product_id, "text": text})
+                error = None if response.is_success else f"HTTP {response.status_code}"
+            except httpx.HTTPError as e:
+                error = type(e).__name__
+            if not record:
+                return
+            histograms[kind].record(time.perf_counter() - scheduled)
+            sent[kind] += 1
+            if error is not None:
+                errors[(kind, error)] += 1
+
+        print(f"🚀 Открытый цикл: {rps:g} RPS, {duration:g} сек (+{warmup:g} сек прогрева), соединений: {connections}")
+        print(f"   Смесь: {', '.join(f'{kind}={mix[kind]:g}' for kind in kinds)}\n")
+        started = time.perf_counter()
+        measure_from = started + warmup
+        finish = measure_from + duration
+        scheduled = started
+        while scheduled < finish:
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                max_lag = max(max_lag, -delay)
+            record = scheduled >= measure_from
+            if len(inflight) >= max_inflight:
+                dropped += record
+            else:
+                task = asyncio.create_task(send(rng.choices(kinds, weights)[0], scheduled, record))
+                inflight.add(task)
+                task.add_done_callback(inflight.discard)
+            scheduled += rng.expovariate(rps) if poisson else 1 / rps
+        await asyncio.gather(*inflight)
+        elapsed = time.perf_counter() - measure_from
+
+    overall = LatencyHistogram()
+    for histogram in histograms.values():
+        overall.merge(histogram)
+    total_errors = sum(errors.values())
+    header = f"{'Тип':<10}{'Запросов':>10}{'Ошибок':>8}" + "".join(f"{f'p{p:g}':>10}" for p in PERCENTILES) + f"{'max':>10}{'mean':>10}"
+
     print(f"\n{'='*80}")
-    print(f"📊 РЕЗУЛЬТАТЫ НАГРУЗОЧНОГО ТЕСТИРОВАНИЯ")
+    print("📊 РЕЗУЛЬТАТЫ НАГРУЗОЧНОГО ТЕСТИРОВАНИЯ (латентность, мс)")
     print(f"{'='*80}")
-    print(f"Всего запросов:     {count}")
-    print(f"Успешных:           {stats['success']} ✅")
-    print(f"Ошибок:             {stats['failed']} ❌")
-    print(f"Общее время:        {total_elapsed:.2f} сек")
-    print(f"Среднее время:      {stats['total_time'] / stats['success']:.3f} сек/запрос" if stats['success'] > 0 else "N/A")
-    print(f"RPS (запросов/сек): {count / total_elapsed:.2f}")
-    print(f"Среднее результатов: {stats['total_results'] / stats['success']:.1f}" if stats['success'] > 0 else "N/A")
+    print(header)
+    for kind, histogram in [*histograms.items(), ("всего", overall)]:
+        kind_errors = total_errors if kind == "всего" else sum(n for (k, _), n in errors.items() if k == kind)
+        row = f"{kind:<10}{histogram.total:>10}{kind_errors:>8}"
+        row += "".join(f"{histogram.percentile_ms(p):>10.2f}" for p in PERCENTILES)
+        row += f"{histogram.max_us / 1000:>10.2f}{histogram.mean_ms():>10.2f}"
+        print(row)
+    print(f"\nЦелевой RPS:         {rps:g}")
+    print(f"Фактический RPS:     {overall.total / elapsed:.2f}")
+    print(f"Успешных:            {overall.total - total_errors} ✅")
+    print(f"Ошибок:              {total_errors} ❌")
+    print(f"Отброшено клиентом:  {dropped} (в полете было --max-inflight={max_inflight} запросов)")
+    print(f"Макс. отставание генератора: {max_lag * 1000:.1f} мс")
+    if errors:
+        print("\nОшибки:")
+        for (kind, error), count in errors.most_common():
+            print(f"   {kind:<8} {error:<24} {count}")
     print(f"{'='*80}")
+    return 0
 
 
 def main() -> int:
@@ -210,25 +417,69 @@ def main() -> int:
         "--count",
         type=int,
         default=1000,
-        help="Количество товаров для нагрузочного теста (default: 1000)",
+        help="Количество товаров, из которых берутся тексты для нагрузочного теста (default: 1000)",
     )
+    parser.add_argument("--rps", type=float, default=100.0, help="Целевая частота запросов (default: 100)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Длительность замера, сек (default: 30)")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Прогрев, не попадает в статистику, сек (default: 5)")
     parser.add_argument(
-        "--workers",
+        "--mix",
+        type=parse_mix,
+        default=parse_mix("search=8,batch=1,upsert=1"),
+        help="Соотношение запросов search/batch/upsert (default: search=8,batch=1,upsert=1)",
+    )
+    parser.add_argument("--batch-size", type=int, default=16, help="Запросов в одном /search/batch (default: 16)")
+    parser.add_argument("--connections", type=int, default=64, help="Размер пула keep-alive соединений (default: 64)")
+    parser.add_argument(
+        "--max-inflight",
         type=int,
-        default=10,
-        help="Количество параллельных воркеров для нагрузочного теста (default: 10)",
+        default=10000,
+        help="Макс. запросов в полете, сверх лимита запрос отбрасывается клиентом (default: 10000)",
     )
-    
+    parser.add_argument("--poisson", action="store_true", help="Пуассоновский поток вместо равномерного")
+    parser.add_argument("--seed", type=int, default=42, help="Seed выбора запросов (default: 42)")
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Запустить сервис в этом процессе на временной БД со StubEmbedder вместо модели",
+    )
+    parser.add_argument("--stub-dim", type=int, default=384, help="Размерность StubEmbedder (default: 384)")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0, help="Задержка StubEmbedder на батч, мс (default: 0)")
+
     args = parser.parse_args()
     
     # Нагрузочное тестирование
     if args.load_test:
-        if not args.db_path.exists():
+        if args.in_process:
+            products = synthetic_products(args.count, args.seed)
+        elif args.db_path.exists():
+            print(f"📖 Загружаем {args.count} товаров из БД...")
+            products = get_products_from_db(args.db_path, args.count)
+        else:
             print(f"❌ БД не найдена: {args.db_path}")
             return 1
-        asyncio.run(load_test(args.url, args.db_path, args.count, args.top_k, args.workers))
-        return 0
-    
+        if not products:
+            print("❌ БД пуста или недоступна")
+            return 1
+        options = dict(
+            products=products,
+            rps=args.rps,
+            duration=args.duration,
+            warmup=args.warmup,
+            mix=args.mix,
+            top_k=args.top_k,
+            batch_size=args.batch_size,
+            connections=args.connections,
+            max_inflight=args.max_inflight,
+            poisson=args.poisson,
+            seed=args.seed,
+        )
+        if not args.in_process:
+            return asyncio.run(load_test(args.url, **options))
+        print(f"🧪 Сервис в процессе: {len(products)} синтетических товаров, StubEmbedder dim={args.stub_dim}")
+        with in_process_service(products, args.stub_dim, args.stub_latency_ms) as base_url:
+            return asyncio.run(load_test(base_url, **options))
+
     # Определяем текст для поиска
     query_id = None
     query_text = args.text
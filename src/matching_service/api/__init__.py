@@ -1,3 +1,4 @@
 from matching_service.api.error_handlers import setup_exception_handlers
+from matching_service.api.middleware import MetricsMiddleware
 
-__all__ = ["setup_exception_handlers"]
+__all__ = ["setup_exception_handlers", "MetricsMiddleware"]
@@ -1,5 +1,8 @@
+from matching_service.api.controllers.delete import router as delete_router
 from matching_service.api.controllers.health import router as health_router
+from matching_service.api.controllers.metrics import router as metrics_router
 from matching_service.api.controllers.search import router as search_router
+from matching_service.api.controllers.stats import router as stats_router
 from matching_service.api.controllers.upsert import router as upsert_router
 
-__all__ = ["health_router", "search_router", "upsert_router"]
+__all__ = ["delete_router", "health_router", "metrics_router", "search_router", "stats_router", "upsert_router"]
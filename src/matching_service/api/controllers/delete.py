@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, Path, Response, status
+from matching_service.api.schemas import BatchDeleteRequest, BatchDeleteResponse, DeleteResponse
+from matching_service.dependencies.providers.services import (
+    get_api_config,
+    get_cache,
+    get_io_executor,
+    get_repository,
+    get_write_queue,
+)
+from matching_service.services.usecases import batch_delete_usecase, delete_usecase
+
+router = APIRouter()
+
+
+@router.delete("/items/{item_id}", response_model=DeleteResponse, responses={404: {"model": DeleteResponse}})
+async def delete_product(
+    response: Response,
+    item_id: int = Path(..., gt=0),
+    repository=Depends(get_repository),
+    cache=Depends(get_cache),
+    io_executor=Depends(get_io_executor),
+    write_queue=Depends(get_write_queue),
+) -> DeleteResponse:
+    result = await delete_usecase(
+        repository=repository,
+        cache=cache,
+        io_executor=io_executor,
+        vector_id=item_id,
+        write_queue=write_queue,
+    )
+    if result.action == "not_found":
+        response.status_code = status.HTTP_404_NOT_FOUND
+    return result
+
+
+@router.post("/items/delete", response_model=BatchDeleteResponse)
+async def batch_delete_products(
+    payload: BatchDeleteRequest,
+    repository=Depends(get_repository),
+    cache=Depends(get_cache),
+    io_executor=Depends(get_io_executor),
+    api_config=Depends(get_api_config),
+    write_queue=Depends(get_write_queue),
+) -> BatchDeleteResponse:
+    return await batch_delete_usecase(
+        repository=repository,
+        cache=cache,
+        io_executor=io_executor,
+        vector_ids=payload.ids,
+        max_batch_size=api_config.max_batch_size,
+        write_queue=write_queue,
+    )
@@ -1,17 +1,19 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, status
 from fastapi.responses import Response
-from matching_service.api.schemas import HealthResponse
+from matching_service.api.schemas import HealthResponse, LivenessResponse, ReadinessResponse
 from matching_service.dependencies.providers.services import (
+    get_api_config,
     get_cache,
     get_ml_config,
+    get_startup,
 )
-from matching_service.services.usecases import health_usecase
+from matching_service.services.usecases import health_usecase, readiness_usecase
 
 router = APIRouter()
 
 
 @router.get("/", response_model=HealthResponse)
-def health_check(
+async def health_check(
     cache=Depends(get_cache),
     ml_config=Depends(get_ml_config),
 ) -> HealthResponse:
@@ -19,5 +21,29 @@ def health_check(
 
 
 @router.head("/")
-def health_check_head() -> Response:
+async def health_check_head() -> Response:
     return Response(status_code=200)
+
+
+@router.get("/health/live", response_model=LivenessResponse)
+async def liveness(
+    response: Response,
+    startup=Depends(get_startup),
+) -> LivenessResponse:
+    if startup.failed:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return LivenessResponse(status="failed")
+    return LivenessResponse(status="ok")
+
+
+@router.get("/health/ready", response_model=ReadinessResponse)
+async def readiness(
+    response: Response,
+    startup=Depends(get_startup),
+    api_config=Depends(get_api_config),
+) -> ReadinessResponse:
+    result = readiness_usecase(startup=startup)
+    if not startup.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        response.headers["Retry-After"] = str(api_config.not_ready_retry_after)
+    return result
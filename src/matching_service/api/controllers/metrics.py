@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from matching_service.dependencies.providers.services import (
+    get_inference_executor,
+    get_io_executor,
+    get_optional_batcher,
+    get_optional_cache,
+    get_query_cache,
+    get_startup,
+    get_write_queue,
+)
+from matching_service.services.usecases import metrics_usecase
+
+router = APIRouter()
+
+_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics(
+    startup=Depends(get_startup),
+    batcher=Depends(get_optional_batcher),
+    query_cache=Depends(get_query_cache),
+    cache=Depends(get_optional_cache),
+    inference_executor=Depends(get_inference_executor),
+    io_executor=Depends(get_io_executor),
+    write_queue=Depends(get_write_queue),
+) -> PlainTextResponse:
+    body = metrics_usecase(
+        ready=startup.ready,
+        batcher=batcher,
+        query_cache=query_cache,
+        cache=cache,
+        executors=[inference_executor, io_executor],
+        write_queue=write_queue,
+    )
+    return PlainTextResponse(body, media_type=_CONTENT_TYPE)
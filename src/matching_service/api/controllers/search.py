@@ -1,33 +1,86 @@
 from typing import Annotated
 from fastapi import APIRouter, Query, Depends
-from matching_service.api.schemas import SearchResultItem
+from matching_service.api.schemas import BatchSearchRequest, BatchSearchResponse, SearchResultItem
 from matching_service.dependencies.providers.services import (
     get_api_config,
+    get_batcher,
     get_cache,
     get_embedder,
+    get_inference_executor,
+    get_io_executor,
     get_ml_config,
+    get_query_cache,
 )
-from matching_service.services.usecases import search_usecase
+from matching_service.services.usecases import batch_search_usecase, search_usecase
 
 router = APIRouter()
 
 
 @router.get("/search", response_model=list[SearchResultItem])
-def search_similar_products(
+async def search_similar_products(
     text: Annotated[str, Query(min_length=1, max_length=100000)],
     top_k: Annotated[int | None, Query(ge=1)] = None,
+    mode: Annotated[str | None, Query(description="exact, ivf or hnsw")] = None,
+    nprobe: Annotated[int | None, Query(ge=1)] = None,
+    ef_search: Annotated[int | None, Query(ge=1)] = None,
+    category: Annotated[str | None, Query(max_length=10000, description="Category path prefix, e.g. A > B")] = None,
+    seller: Annotated[str | None, Query(max_length=1000)] = None,
+    min_rating: Annotated[float | None, Query(ge=0.0)] = None,
+    max_rating: Annotated[float | None, Query(ge=0.0)] = None,
     cache=Depends(get_cache),
-    embedder=Depends(get_embedder),
+    batcher=Depends(get_batcher),
+    query_cache=Depends(get_query_cache),
+    io_executor=Depends(get_io_executor),
     api_config=Depends(get_api_config),
-    ml_config=Depends(get_ml_config),
 ) -> list[SearchResultItem]:
-    return search_usecase(
+    return await search_usecase(
         cache=cache,
-        embedder=embedder,
+        batcher=batcher,
+        query_cache=query_cache,
+        io_executor=io_executor,
         text=text,
         top_k=top_k,
         default_top_k=api_config.default_top_k,
         max_top_k=api_config.max_top_k,
         score_decimal_places=api_config.score_decimal_places,
+        mode=mode,
+        nprobe=nprobe,
+        ef_search=ef_search,
+        category=category,
+        seller=seller,
+        min_rating=min_rating,
+        max_rating=max_rating,
+    )
+
+
+@router.post("/search/batch", response_model=BatchSearchResponse)
+async def batch_search_similar_products(
+    payload: BatchSearchRequest,
+    cache=Depends(get_cache),
+    embedder=Depends(get_embedder),
+    query_cache=Depends(get_query_cache),
+    inference_executor=Depends(get_inference_executor),
+    io_executor=Depends(get_io_executor),
+    api_config=Depends(get_api_config),
+    ml_config=Depends(get_ml_config),
+) -> BatchSearchResponse:
+    return await batch_search_usecase(
+        cache=cache,
+        embedder=embedder,
+        query_cache=query_cache,
+        inference_executor=inference_executor,
+        io_executor=io_executor,
+        queries=payload.queries,
+        default_top_k=api_config.default_top_k,
+        max_top_k=api_config.max_top_k,
+        max_batch_size=api_config.max_batch_size,
+        score_decimal_places=api_config.score_decimal_places,
         embedding_batch_size=ml_config.embedding_batch_size,
+        mode=payload.mode,
+        nprobe=payload.nprobe,
+        ef_search=payload.ef_search,
+        category=payload.category,
+        seller=payload.seller,
+        min_rating=payload.min_rating,
+        max_rating=payload.max_rating,
     )
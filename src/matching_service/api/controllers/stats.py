@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends
+from matching_service.api.schemas import StatsResponse
+from matching_service.dependencies.providers.services import (
+    get_batcher,
+    get_cache,
+    get_inference_executor,
+    get_io_executor,
+    get_query_cache,
+    get_write_queue,
+)
+from matching_service.services.usecases import stats_usecase
+
+router = APIRouter()
+
+
+@router.get("/stats", response_model=StatsResponse)
+def service_stats(
+    batcher=Depends(get_batcher),
+    query_cache=Depends(get_query_cache),
+    cache=Depends(get_cache),
+    inference_executor=Depends(get_inference_executor),
+    io_executor=Depends(get_io_executor),
+    write_queue=Depends(get_write_queue),
+) -> StatsResponse:
+    return stats_usecase(
+        batcher=batcher,
+        query_cache=query_cache,
+        cache=cache,
+        executors=[inference_executor, io_executor],
+        write_queue=write_queue,
+    )
@@ -1,29 +1,66 @@
-from fastapi import APIRouter, Depends
-from matching_service.api.schemas import UpsertRequest, UpsertResponse
+from fastapi import APIRouter, Depends, Query
+from matching_service.api.schemas import BatchUpsertRequest, BatchUpsertResponse, UpsertRequest, UpsertResponse
 from matching_service.dependencies.providers.services import (
+    get_api_config,
+    get_batcher,
     get_cache,
     get_embedder,
+    get_inference_executor,
+    get_io_executor,
     get_ml_config,
     get_repository,
+    get_write_queue,
 )
-from matching_service.services.usecases import upsert_usecase
+from matching_service.services.usecases import batch_upsert_usecase, upsert_usecase
 
 router = APIRouter()
 
 
 @router.post("/upsert", response_model=UpsertResponse)
-def upsert_product(
+async def upsert_product(
     payload: UpsertRequest,
     repository=Depends(get_repository),
     cache=Depends(get_cache),
-    embedder=Depends(get_embedder),
-    ml_config=Depends(get_ml_config),
+    batcher=Depends(get_batcher),
+    io_executor=Depends(get_io_executor),
+    write_queue=Depends(get_write_queue),
+    durable: bool = Query(default=False, description="With DB_WRITE_BEHIND, respond after the SQLite commit"),
 ) -> UpsertResponse:
-    return upsert_usecase(
+    return await upsert_usecase(
         repository=repository,
         cache=cache,
-        embedder=embedder,
+        batcher=batcher,
+        io_executor=io_executor,
         vector_id=payload.id,
         text=payload.text,
+        attributes=payload.product_attributes(),
+        write_queue=write_queue,
+        durable=durable,
+    )
+
+
+@router.post("/upsert/batch", response_model=BatchUpsertResponse)
+async def batch_upsert_products(
+    payload: BatchUpsertRequest,
+    repository=Depends(get_repository),
+    cache=Depends(get_cache),
+    embedder=Depends(get_embedder),
+    inference_executor=Depends(get_inference_executor),
+    io_executor=Depends(get_io_executor),
+    api_config=Depends(get_api_config),
+    ml_config=Depends(get_ml_config),
+    write_queue=Depends(get_write_queue),
+    durable: bool = Query(default=False, description="With DB_WRITE_BEHIND, respond after the SQLite commit"),
+) -> BatchUpsertResponse:
+    return await batch_upsert_usecase(
+        repository=repository,
+        cache=cache,
+        embedder=embedder,
+        inference_executor=inference_executor,
+        io_executor=io_executor,
+        items=payload.items,
+        max_batch_size=api_config.max_batch_size,
         embedding_batch_size=ml_config.embedding_batch_size,
+        write_queue=write_queue,
+        durable=durable,
     )
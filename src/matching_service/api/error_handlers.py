@@ -2,10 +2,30 @@ import logging
 from fastapi import FastAPI, Request, status
 from fastapi.responses import JSONResponse
 
+from matching_service.services.shared_vector_cache import SharedLayoutBusyError
+from matching_service.services.startup import ServiceNotReadyError
+
 logger = logging.getLogger(__name__)
 
 
 def setup_exception_handlers(app: FastAPI) -> None:
+    @app.exception_handler(ServiceNotReadyError)
+    async def not_ready_handler(request: Request, exc: ServiceNotReadyError) -> JSONResponse:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": str(exc)},
+            headers={"Retry-After": str(request.app.state.api_config.not_ready_retry_after)},
+        )
+
+    @app.exception_handler(SharedLayoutBusyError)
+    async def layout_busy_handler(request: Request, exc: SharedLayoutBusyError) -> JSONResponse:
+        logger.warning("Search rejected: %s", exc)
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": str(exc)},
+            headers={"Retry-After": "1"},
+        )
+
     @app.exception_handler(ValueError)
     async def value_error_handler(request: Request, exc: ValueError) -> JSONResponse:
         logger.warning("Validation error: %s", exc)
@@ -0,0 +1,36 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from matching_service.services.metrics import REQUEST_SECONDS, RequestTimings, use_timings
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, server_timing: bool = True) -> None:
+        self._app = app
+        self._server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        timings = RequestTimings()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self._server_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", timings.header(time.perf_counter() - started))
+            await send(message)
+
+        try:
+            with use_timings(timings):
+                await self._app(scope, receive, send_with_timing)
+        finally:
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(time.perf_counter() - started, scope["method"], route, str(status))
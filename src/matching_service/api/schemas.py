@@ -1,9 +1,15 @@
+from typing import Annotated
+
 from pydantic import BaseModel, Field, field_validator
 
+from matching_service.catalog import ProductAttributes
 
 class UpsertRequest(BaseModel):
     id: int = Field(..., gt=0, examples=[12345])
     text: str = Field(..., min_length=1, max_length=100000)
+    category: list[str] | None = Field(default=None, max_length=16, examples=[["Автотовары", "Автоэлектроника"]])
+    seller: str | None = Field(default=None, max_length=1000)
+    rating: float | None = Field(default=None, ge=0.0)
 
     @field_validator("text")
     @classmethod
@@ -12,21 +18,170 @@ class UpsertRequest(BaseModel):
             raise ValueError("Текст не может быть пустым")
         return v.strip()
 
+    @field_validator("category")
+    @classmethod
+    def validate_category(cls, v: list[str] | None) -> list[str] | None:
+        if v is None:
+            return None
+        if any(">" in name for name in v):
+            raise ValueError("Категория не может содержать '>'")
+        return [name.strip() for name in v if name.strip()]
+
+    @field_validator("seller")
+    @classmethod
+    def validate_seller(cls, v: str | None) -> str | None:
+        if v is None:
+            return None
+        return v.strip() or None
+
+    def product_attributes(self) -> ProductAttributes:
+        return ProductAttributes(category=tuple(self.category or ()), seller=self.seller, rating=self.rating)
+
 
 class UpsertResponse(BaseModel):
     id: int = Field(..., gt=0)
     status: str
+    action: str = Field(..., description="inserted, updated or unchanged")
     message: str
 
 
+class BatchUpsertRequest(BaseModel):
+    items: list[UpsertRequest] = Field(..., min_length=1)
+
+
+class BatchUpsertResponse(BaseModel):
+    status: str
+    inserted: int = Field(..., ge=0)
+    updated: int = Field(..., ge=0)
+    unchanged: int = Field(..., ge=0)
+    items: list[UpsertResponse]
+
+
+class DeleteResponse(BaseModel):
+    id: int = Field(..., gt=0)
+    status: str
+    action: str = Field(..., description="deleted or not_found")
+    message: str
+
+
+class BatchDeleteRequest(BaseModel):
+    ids: list[Annotated[int, Field(gt=0)]] = Field(..., min_length=1, examples=[[12345, 67890]])
+
+
+class BatchDeleteResponse(BaseModel):
+    status: str
+    deleted: int = Field(..., ge=0)
+    not_found: int = Field(..., ge=0)
+    items: list[DeleteResponse]
+
+
 class SearchResultItem(BaseModel):
     id: int = Field(..., gt=0)
     score_rate: float = Field(..., ge=-1.0, le=1.0)
     text: str = Field(..., min_length=1)
 
 
+class BatchSearchQuery(BaseModel):
+    text: str = Field(..., max_length=100000)
+    top_k: int | None = None
+
+
+class BatchSearchRequest(BaseModel):
+    queries: list[BatchSearchQuery] = Field(..., min_length=1)
+    mode: str | None = Field(default=None, examples=["exact", "ivf", "hnsw"])
+    nprobe: int | None = Field(default=None, ge=1)
+    ef_search: int | None = Field(default=None, ge=1)
+    category: str | None = Field(default=None, max_length=10000, examples=["Автотовары > Автоэлектроника"])
+    seller: str | None = Field(default=None, max_length=1000)
+    min_rating: float | None = Field(default=None, ge=0.0)
+    max_rating: float | None = Field(default=None, ge=0.0)
+
+
+class BatchSearchItem(BaseModel):
+    results: list[SearchResultItem] = Field(default_factory=list)
+    error: str | None = None
+
+
+class BatchSearchResponse(BaseModel):
+    items: list[BatchSearchItem]
+
+
 class HealthResponse(BaseModel):
     status: str
     message: str
     model: str
     vectors_count: int
+
+
+class LivenessResponse(BaseModel):
+    status: str
+
+
+class ReadinessResponse(BaseModel):
+    status: str = Field(..., description="starting, ready or failed")
+    elapsed_seconds: float
+    phases: dict[str, float] = Field(..., description="Startup phase durations in seconds")
+    error: str | None = None
+
+
+class EmbeddingBatcherStats(BaseModel):
+    queue_depth: int
+    batches_total: int
+    texts_total: int
+    max_batch_size: int
+    max_wait_ms: float
+    batch_size_histogram: dict[int, int]
+    queue_wait_seconds_total: float
+    queue_wait_seconds_max: float
+
+
+class ExecutorStats(BaseModel):
+    max_workers: int
+    queued: int
+    active: int
+    tasks_total: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+    run_seconds_total: float
+
+
+class QueryEmbeddingCacheStats(BaseModel):
+    entries: int
+    bytes: int
+    max_entries: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+class VectorCacheStats(BaseModel):
+    size: int
+    capacity: int
+    vector_dim: int
+    storage_dtype: str
+    memory_bytes: int
+    recall_k: int | None = None
+    recall_at_k: float | None = None
+
+
+class WriteQueueStats(BaseModel):
+    queue_depth: int = Field(..., description="Rows waiting for a group commit")
+    max_rows: int
+    batch_rows: int
+    max_delay_ms: float
+    commits_total: int
+    rows_total: int
+    failed_rows_total: int
+    commit_rows_histogram: dict[int, int] = Field(..., description="Commits by size, rounded up to a power of two")
+    commit_seconds_total: float
+    commit_seconds_max: float
+    submit_wait_seconds_total: float
+
+
+class StatsResponse(BaseModel):
+    embedding_batcher: EmbeddingBatcherStats
+    executors: dict[str, ExecutorStats]
+    query_cache: QueryEmbeddingCacheStats
+    vector_cache: VectorCacheStats
+    write_queue: WriteQueueStats | None = None
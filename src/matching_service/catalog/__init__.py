@@ -0,0 +1,13 @@
+from matching_service.catalog.product_attributes import (
+    ProductAttributes,
+    extract_product_attributes,
+    parse_category_path,
+)
+from matching_service.catalog.product_text import format_product_text
+
+__all__ = [
+    "ProductAttributes",
+    "extract_product_attributes",
+    "format_product_text",
+    "parse_category_path",
+]
@@ -0,0 +1,45 @@
+from dataclasses import dataclass
+from typing import Any
+
+CATEGORY_KEYS = ("greatgrandparent_category", "grandparent_category", "parent_category", "category")
+CATEGORY_SEPARATOR = " > "
+
+
+@dataclass(frozen=True)
+class ProductAttributes:
+    category: tuple[str, ...] = ()
+    seller: str | None = None
+    rating: float | None = None
+
+    @property
+    def category_path(self) -> str | None:
+        return CATEGORY_SEPARATOR.join(self.category) if self.category else None
+
+
+def product_categories(product: dict[str, Any]) -> list[str]:
+    categories: list[str] = []
+    for cat_key in CATEGORY_KEYS:
+        if cat_val := product.get(cat_key):
+            if cat_val not in categories:
+                categories.append(cat_val)
+    return categories
+
+
+def parse_category_path(path: str | None) -> tuple[str, ...]:
+    if not path:
+        return ()
+    return tuple(part.strip() for part in path.split(CATEGORY_SEPARATOR.strip()) if part.strip())
+
+
+def extract_product_attributes(product: dict[str, Any]) -> ProductAttributes:
+    """Извлекает атрибуты товара для фильтрации поиска из тех же полей, что и format_product_text."""
+    seller = product.get("seller")
+    seller = seller.strip() if isinstance(seller, str) else ""
+    rating = product.get("rating")
+    if isinstance(rating, bool) or not isinstance(rating, int | float) or rating <= 0:
+        rating = None
+    return ProductAttributes(
+        category=tuple(str(category).strip() for category in product_categories(product)),
+        seller=seller or None,
+        rating=float(rating) if rating is not None else None,
+    )
@@ -0,0 +1,42 @@
+import re
+from typing import Any
+
+from matching_service.catalog.product_attributes import product_categories
+
+
+def format_product_text(product: dict[str, Any]) -> str:
+    """Формирует текстовое представление товара для векторизации."""
+    parts = []
+
+    # Название (обязательное)
+    if title := product.get("title", "").strip():
+        parts.append(f"Название: {title}")
+
+    # Категории
+    categories = product_categories(product)
+    if categories:
+        parts.append(f"Категории: {' > '.join(categories)}")
+
+    # Описание (очищенное от HTML)
+    if desc := product.get("description", "").strip():
+        # Простая очистка HTML тегов
+        clean_desc = re.sub(r'<[^>]+>', ' ', desc)
+        clean_desc = re.sub(r'\s+', ' ', clean_desc).strip()
+        if clean_desc:
+            parts.append(f"Описание: {clean_desc[:2000]}")  # Ограничение длины
+
+    # Атрибуты
+    if attrs := product.get("attributes"):
+        if isinstance(attrs, list) and attrs:
+            parts.append(f"Характеристики: {'; '.join(str(a) for a in attrs[:10])}")
+
+    # Продавец
+    if seller := product.get("seller", "").strip():
+        parts.append(f"Продавец: {seller}")
+
+    # Рейтинг
+    if rating := product.get("rating"):
+        if rating > 0:
+            parts.append(f"Рейтинг: {rating}")
+
+    return " | ".join(parts)
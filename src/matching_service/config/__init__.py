@@ -1,4 +1,5 @@
 from matching_service.config.api_config import APIConfig
+from matching_service.config.cache_config import CacheConfig
 from matching_service.config.db_config import DBConfig
 from matching_service.config.logging_config import LoggingConfig
 from matching_service.config.ml_config import MLConfig
@@ -11,11 +12,13 @@ class Config:
         db_config: DBConfig | None = None,
         ml_config: MLConfig | None = None,
         logging_config: LoggingConfig | None = None,
+        cache_config: CacheConfig | None = None,
     ) -> None:
         self.api = api_config or APIConfig()
         self.db = db_config or DBConfig()
         self.ml = ml_config or MLConfig()
         self.logging = logging_config or LoggingConfig()
+        self.cache = cache_config or CacheConfig()
 
     def print_config(self) -> None:
         print("=" * 70)
@@ -27,6 +30,7 @@ class Config:
         print(f"Device:       {self.ml.device or 'auto-detect'}")
         print(f"Vector Dim:   {self.ml.vector_dim}")
         print(f"Max Tokens:   {self.ml.max_text_length}")
+        print(f"Search Mode:  {self.cache.search_mode} (IVF nlist={self.cache.ivf_nlist}, nprobe={self.cache.ivf_nprobe})")
         print(f"Log Level:    {self.logging.level}")
         print("=" * 70)
 
@@ -34,6 +38,7 @@ class Config:
 __all__ = [
     "Config",
     "APIConfig",
+    "CacheConfig",
     "DBConfig",
     "MLConfig",
     "LoggingConfig",
@@ -11,5 +11,11 @@ class APIConfig(BaseConfig):
     reload: bool = Field(default=False)
     default_top_k: int = Field(default=5, ge=1, le=100)
     max_top_k: int = Field(default=50, ge=1, le=1000)
+    max_batch_size: int = Field(default=1000, ge=1, le=100000)
     score_decimal_places: int = Field(default=4, ge=0, le=10)
+    server_timing: bool = Field(default=True, description="Add a Server-Timing header with per-stage durations")
+    not_ready_retry_after: int = Field(default=5, ge=1, description="Retry-After seconds returned with 503 while starting")
+    io_workers: int = Field(default=8, ge=1, le=256, description="Threads running cache scans and SQLite I/O")
 
+    workers: int = Field(default=1, ge=1, le=64, description="Worker processes sharing one in-memory vector matrix")
+    worker_healthcheck_timeout: int = Field(default=60, ge=1, description="Seconds a worker may stay unresponsive while loading")
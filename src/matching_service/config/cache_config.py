@@ -0,0 +1,60 @@
+from pathlib import Path
+
+from pydantic import Field, field_validator, model_validator
+
+from matching_service.config.base import BaseConfig
+
+
+class CacheConfig(BaseConfig):
+    model_config = {"env_prefix": "CACHE_"}
+
+    initial_capacity: int = Field(default=10000, ge=1)
+    shrink_threshold: float = Field(default=0.25, ge=0.0, lt=0.5, description="Shrink the matrix when size < capacity * threshold, 0 disables it")
+    search_mode: str = Field(default="exact", description="exact, ivf or hnsw")
+    scan_threads: int = Field(default=1, ge=1, le=256, description="Threads scanning matrix shards in parallel, 1 scans in one pass")
+    scan_shard_size: int = Field(default=65536, ge=1024, description="Rows per scan shard")
+    ivf_nlist: int = Field(default=0, ge=0, description="Number of IVF lists, 0 disables the IVF index")
+    ivf_nprobe: int = Field(default=8, ge=1)
+    ivf_kmeans_iterations: int = Field(default=10, ge=1, le=100)
+    ivf_train_sample_size: int = Field(default=100000, ge=1)
+    ivf_retrain_growth: float = Field(default=2.0, ge=0.0, description="Retrain IVF once the vector count grows by this factor since training, 0 disables it")
+    hnsw_enabled: bool = Field(default=False)
+    hnsw_m: int = Field(default=16, ge=2, le=128)
+    hnsw_ef_construction: int = Field(default=100, ge=1, le=2000)
+    hnsw_ef_search: int = Field(default=64, ge=1, le=2000)
+    hnsw_path: Path | None = Field(default=None, description="Graph file, defaults to <db path>.hnsw.npz")
+    snapshot_enabled: bool = Field(default=True)
+    snapshot_path: Path | None = Field(default=None, description="Vector snapshot file, defaults to <db path>.snapshot")
+    quantization: str = Field(default="none", description="none or int8")
+    quantized_rerank_factor: int = Field(default=10, ge=1, le=100)
+    quantized_recall_queries: int = Field(default=200, ge=0, description="Queries for the startup recall@10 estimate, 0 disables it")
+
+    @field_validator("search_mode")
+    @classmethod
+    def validate_search_mode(cls, v: str) -> str:
+        allowed_modes = ("exact", "ivf", "hnsw")
+        v_lower = v.lower()
+        if v_lower not in allowed_modes:
+            raise ValueError(f"search_mode must be one of: {', '.join(allowed_modes)}")
+        return v_lower
+
+    @field_validator("quantization")
+    @classmethod
+    def validate_quantization(cls, v: str) -> str:
+        allowed = ("none", "int8")
+        v_lower = v.lower()
+        if v_lower not in allowed:
+            raise ValueError(f"quantization must be one of: {', '.join(allowed)}")
+        return v_lower
+
+    @model_validator(mode="after")
+    def validate_index_enabled(self) -> "CacheConfig":
+        if self.search_mode == "ivf" and self.ivf_nlist == 0:
+            raise ValueError("search_mode=ivf requires ivf_nlist > 0")
+        if 0 < self.ivf_retrain_growth <= 1:
+            raise ValueError("ivf_retrain_growth must be 0 or > 1")
+        if self.search_mode == "hnsw" and not self.hnsw_enabled:
+            raise ValueError("search_mode=hnsw requires hnsw_enabled=true")
+        if self.quantization != "none" and (self.ivf_nlist > 0 or self.hnsw_enabled):
+            raise ValueError("quantization cannot be combined with IVF or HNSW indexes")
+        return self
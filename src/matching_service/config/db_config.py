@@ -9,6 +9,10 @@ class DBConfig(BaseConfig):
     model_config = {"env_prefix": "DB_"}
 
     vector_db_path: Path = Field(default=Path("data/vectors.db"))
+    write_behind: bool = Field(default=False, description="Acknowledge writes after the cache update, commit them to SQLite in groups")
+    write_behind_max_rows: int = Field(default=10000, ge=1, description="Uncommitted rows before writes block")
+    write_behind_batch_rows: int = Field(default=500, ge=1, description="Rows per group commit")
+    write_behind_max_delay_ms: float = Field(default=10.0, ge=0.0, le=10000.0, description="Longest wait for a group to fill")
 
     @field_validator("vector_db_path")
     @classmethod
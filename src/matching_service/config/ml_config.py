@@ -1,4 +1,6 @@
-from pydantic import Field, field_validator
+from pathlib import Path
+
+from pydantic import Field, field_validator, model_validator
 
 from matching_service.config.base import BaseConfig
 
@@ -10,8 +12,19 @@ class MLConfig(BaseConfig):
     vector_dim: int = Field(default=384, ge=1, le=4096)
     device: str | None = Field(default=None, description="cpu, cuda, auto, or None for auto-detect")
     embedding_batch_size: int = Field(default=32, ge=1, le=512)
+    max_batch_tokens: int | None = Field(default=None, ge=1, description="Padded token budget per model batch, None for fixed batch sizes")
     max_text_length: int = Field(default=512, ge=1, le=8192)
     min_clamp_value: float = Field(default=1e-9, gt=0)
+    batcher_max_batch_size: int = Field(default=64, ge=1, le=512)
+    batcher_max_wait_ms: float = Field(default=5.0, ge=0, le=1000)
+    inference_workers: int = Field(default=1, ge=1, le=64, description="Threads running tokenization and model inference")
+    query_cache_max_entries: int = Field(default=10000, ge=0, description="Query embedding LRU size, 0 disables it")
+    query_cache_max_bytes: int = Field(default=64 * 1024 * 1024, ge=0)
+    backend: str = Field(default="torch", description="torch or onnx")
+    onnx_dir: Path | None = Field(default=None, description="Exported ONNX models, defaults to $HF_HOME/onnx")
+    onnx_tolerance: float = Field(default=1e-3, gt=0, description="Max abs difference to torch accepted after export")
+    quantize: bool = Field(default=False, description="Dynamic int8 quantization of Linear layers, torch on CPU only")
+    quantize_min_cosine: float = Field(default=0.99, gt=0, le=1, description="Min fp32/int8 cosine on the calibration set")
 
     @field_validator("device")
     @classmethod
@@ -20,3 +33,17 @@ class MLConfig(BaseConfig):
             raise ValueError("device must be 'cpu', 'cuda', 'auto', or None")
         return v.lower() if v else None
 
+    @field_validator("backend")
+    @classmethod
+    def validate_backend(cls, v: str) -> str:
+        if v.lower() not in ("torch", "onnx"):
+            raise ValueError("backend must be 'torch' or 'onnx'")
+        return v.lower()
+
+    @model_validator(mode="after")
+    def validate_quantize(self) -> "MLConfig":
+        if self.quantize and self.backend != "torch":
+            raise ValueError("quantize is supported by the torch backend only")
+        if self.quantize and self.device == "cuda":
+            raise ValueError("quantize runs on CPU only")
+        return self
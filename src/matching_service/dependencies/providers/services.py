@@ -1,21 +1,64 @@
 from fastapi import Request
+from starlette.datastructures import State
 
 from matching_service.config import APIConfig, MLConfig
 from matching_service.services.embedder import TextEmbedder
+from matching_service.services.embedding_batcher import EmbeddingBatcher
+from matching_service.services.executors import InstrumentedExecutor
+from matching_service.services.query_embedding_cache import QueryEmbeddingCache
+from matching_service.services.startup import StartupTracker
 from matching_service.services.vector_cache import VectorCache
+from matching_service.services.write_behind_queue import WriteBehindQueue
 from matching_service.storage.repositories import SqliteVectorRepository
 
 
+def _ready_state(request: Request) -> State:
+    request.app.state.startup.require_ready()
+    return request.app.state
+
+
+def get_startup(request: Request) -> StartupTracker:
+    return request.app.state.startup
+
+
 def get_cache(request: Request) -> VectorCache:
-    return request.app.state.cache
+    return _ready_state(request).cache
 
 
 def get_repository(request: Request) -> SqliteVectorRepository:
-    return request.app.state.repository
+    return _ready_state(request).repository
 
 
 def get_embedder(request: Request) -> TextEmbedder:
-    return request.app.state.embedder
+    return _ready_state(request).embedder
+
+
+def get_batcher(request: Request) -> EmbeddingBatcher:
+    return _ready_state(request).batcher
+
+
+def get_optional_cache(request: Request) -> VectorCache | None:
+    return request.app.state.cache
+
+
+def get_optional_batcher(request: Request) -> EmbeddingBatcher | None:
+    return request.app.state.batcher
+
+
+def get_write_queue(request: Request) -> WriteBehindQueue | None:
+    return request.app.state.write_queue
+
+
+def get_query_cache(request: Request) -> QueryEmbeddingCache:
+    return request.app.state.query_cache
+
+
+def get_inference_executor(request: Request) -> InstrumentedExecutor:
+    return request.app.state.inference_executor
+
+
+def get_io_executor(request: Request) -> InstrumentedExecutor:
+    return request.app.state.io_executor
 
 
 def get_api_config(request: Request) -> APIConfig:
@@ -27,9 +70,17 @@ def get_ml_config(request: Request) -> MLConfig:
 
 
 __all__ = [
+    "get_startup",
     "get_cache",
     "get_repository",
     "get_embedder",
+    "get_batcher",
+    "get_optional_cache",
+    "get_optional_batcher",
+    "get_write_queue",
+    "get_query_cache",
+    "get_inference_executor",
+    "get_io_executor",
     "get_api_config",
     "get_ml_config",
 ]
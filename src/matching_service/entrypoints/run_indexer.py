@@ -0,0 +1,240 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from matching_service.catalog import ProductAttributes, extract_product_attributes, format_product_text
+from matching_service.config import Config, DBConfig, MLConfig
+from matching_service.services import TextEmbedder
+from matching_service.storage.repositories import SqliteVectorRepository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IndexerStats:
+    lines: int = 0
+    indexed: int = 0
+    attributes_updated: int = 0
+    skipped: int = 0
+    unchanged: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def docs_per_sec(self) -> float:
+        return self.indexed / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class IndexCheckpoint:
+    def __init__(self, path: Path, source: Path) -> None:
+        self._path = path
+        self._source = str(source.resolve())
+
+    def load(self) -> int:
+        if not self._path.exists():
+            return 0
+        data = json.loads(self._path.read_text(encoding="utf-8"))
+        if data.get("source") != self._source:
+            raise ValueError(f"Checkpoint {self._path} belongs to {data.get('source')}, use --restart to discard it")
+        return int(data["line"])
+
+    def save(self, line: int, indexed: int) -> None:
+        tmp_path = self._path.with_suffix(self._path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps({"source": self._source, "line": line, "indexed": indexed}), encoding="utf-8")
+        os.replace(tmp_path, self._path)
+
+    def clear(self) -> None:
+        self._path.unlink(missing_ok=True)
+
+
+def iter_products(file_path: Path, start_line: int) -> Iterator[tuple[int, dict[str, Any] | None]]:
+    with open(file_path, encoding="utf-8") as f:
+        for line_num, line in enumerate(f, 1):
+            if line_num <= start_line:
+                continue
+            line = line.strip()
+            if not line:
+                yield line_num, None
+                continue
+            try:
+                product = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning("Line %s: invalid JSON - %s", line_num, e)
+                yield line_num, None
+                continue
+            if not isinstance(product, dict):
+                logger.warning("Line %s: expected a JSON object, got %s", line_num, type(product).__name__)
+                yield line_num, None
+                continue
+            yield line_num, product
+
+
+def _index_chunk(
+    repository: SqliteVectorRepository,
+    embedder: TextEmbedder,
+    chunk: dict[int, tuple[str, ProductAttributes]],
+    batch_size: int,
+    force: bool,
+) -> tuple[int, int, int]:
+    same_text: set[int] = set()
+    same_attributes: set[int] = set()
+    if not force:
+        same_text, same_attributes = repository.find_unchanged(
+            list(chunk),
+            [text for text, _ in chunk.values()],
+            [attributes for _, attributes in chunk.values()],
+        )
+    attribute_ids = [vector_id for vector_id in chunk if vector_id in same_text and vector_id not in same_attributes]
+    if attribute_ids:
+        repository.update_attributes(attribute_ids, [chunk[vector_id][1] for vector_id in attribute_ids])
+    vector_ids = sorted(
+        (vector_id for vector_id in chunk if vector_id not in same_text),
+        key=lambda vector_id: len(chunk[vector_id][0]),
+    )
+    if vector_ids:
+        texts = [chunk[vector_id][0] for vector_id in vector_ids]
+        embeddings = embedder.encode(texts, batch_size=batch_size, show_progress=False)
+        repository.upsert_many(
+            vector_ids,
+            texts,
+            embeddings.astype(np.float32, copy=False),
+            [chunk[vector_id][1] for vector_id in vector_ids],
+        )
+    return len(vector_ids), len(attribute_ids), len(same_text & same_attributes)
+
+
+def _add_chunk_stats(stats: IndexerStats, counts: tuple[int, int, int]) -> None:
+    embedded, attributes_updated, unchanged = counts
+    stats.indexed += embedded
+    stats.attributes_updated += attributes_updated
+    stats.unchanged += unchanged
+
+
+def run_indexer(
+    file_path: Path,
+    db_config: DBConfig,
+    ml_config: MLConfig,
+    chunk_size: int,
+    batch_size: int,
+    checkpoint_path: Path,
+    restart: bool = False,
+    force: bool = False,
+) -> IndexerStats:
+    checkpoint = IndexCheckpoint(checkpoint_path, file_path)
+    if restart:
+        checkpoint.clear()
+    start_line = checkpoint.load()
+    if start_line:
+        logger.info("Resuming from checkpoint | line=%s", start_line)
+
+    repository = SqliteVectorRepository(db_path=str(db_config.vector_db_path))
+    embedder = TextEmbedder(
+        model_name=ml_config.model_name,
+        device=ml_config.device,
+        max_text_length=ml_config.max_text_length,
+        min_clamp_value=ml_config.min_clamp_value,
+        backend=ml_config.backend,
+        onnx_dir=ml_config.onnx_dir,
+        onnx_tolerance=ml_config.onnx_tolerance,
+        quantize=ml_config.quantize,
+        quantize_min_cosine=ml_config.quantize_min_cosine,
+        max_batch_tokens=ml_config.max_batch_tokens,
+    )
+
+    stats = IndexerStats()
+    chunk: dict[int, tuple[str, ProductAttributes]] = {}
+    last_line = start_line
+    started = time.perf_counter()
+    try:
+        for line_num, product in iter_products(file_path, start_line):
+            last_line = line_num
+            stats.lines += 1
+            vector_id = product.get("id") if product else None
+            text = ""
+            attributes = ProductAttributes()
+            if product:
+                try:
+                    text = format_product_text(product)
+                    attributes = extract_product_attributes(product)
+                except (TypeError, ValueError, AttributeError) as e:
+                    # One malformed line must not abort the run: the checkpoint would stop on it again.
+                    logger.warning("Line %s: malformed product - %s", line_num, e)
+                    text = ""
+            if not isinstance(vector_id, int) or vector_id <= 0 or not text:
+                stats.skipped += 1
+            else:
+                chunk.pop(vector_id, None)
+                chunk[vector_id] = (text, attributes)
+            if len(chunk) >= chunk_size:
+                _add_chunk_stats(stats, _index_chunk(repository, embedder, chunk, batch_size, force))
+                chunk = {}
+                checkpoint.save(last_line, stats.indexed)
+                stats.elapsed = time.perf_counter() - started
+                logger.info(
+                    "Indexed %s docs | line=%s | %.1f docs/sec",
+                    f"{stats.indexed:,}",
+                    last_line,
+                    stats.docs_per_sec,
+                )
+        if chunk:
+            _add_chunk_stats(stats, _index_chunk(repository, embedder, chunk, batch_size, force))
+            checkpoint.save(last_line, stats.indexed)
+        checkpoint.clear()
+    finally:
+        stats.elapsed = time.perf_counter() - started
+        repository.close()
+
+    logger.info(
+        "Indexing finished | indexed=%s | attributes_updated=%s | unchanged=%s | skipped=%s | elapsed=%.1fs | %.1f docs/sec",
+        f"{stats.indexed:,}",
+        f"{stats.attributes_updated:,}",
+        f"{stats.unchanged:,}",
+        stats.skipped,
+        stats.elapsed,
+        stats.docs_per_sec,
+    )
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline bulk indexing of a JSONL catalog into the vector DB")
+    parser.add_argument("file", type=Path, help="Path to the JSONL file")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Documents per committed chunk (default: 10000)")
+    parser.add_argument("--batch-size", type=int, default=128, help="Texts per forward pass (default: 128)")
+    parser.add_argument("--checkpoint", type=Path, default=None, help="Checkpoint path (default: <db path>.index-checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and index from the first line")
+    parser.add_argument("--force", action="store_true", help="Re-embed documents whose text is unchanged (e.g. after a model change)")
+    args = parser.parse_args()
+
+    config = Config()
+    logging.basicConfig(level=getattr(logging, config.logging.level), format=config.logging.format)
+    if not args.file.exists():
+        logger.error("File not found: %s", args.file)
+        sys.exit(1)
+    if args.chunk_size < 1 or args.batch_size < 1:
+        logger.error("--chunk-size and --batch-size must be >= 1")
+        sys.exit(1)
+
+    checkpoint_path = args.checkpoint or config.db.vector_db_path.with_name(config.db.vector_db_path.name + ".index-checkpoint.json")
+    run_indexer(
+        file_path=args.file,
+        db_config=config.db,
+        ml_config=config.ml,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        checkpoint_path=checkpoint_path,
+        restart=args.restart,
+        force=args.force,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,313 @@
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+import secrets
+import tempfile
+import threading
+import time
 from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
 
+import numpy as np
 import uvicorn
 from fastapi import FastAPI
+from transformers import AutoConfig
 
-from matching_service.api import setup_exception_handlers
+from matching_service.api import MetricsMiddleware, setup_exception_handlers
 from matching_service.api.controllers import (
+    delete_router,
     health_router,
+    metrics_router,
     search_router,
+    stats_router,
     upsert_router,
 )
-from matching_service.config import APIConfig, Config, DBConfig, MLConfig
-from matching_service.services import TextEmbedder
-from matching_service.services.vector_cache import VectorCache
-from matching_service.storage.repositories import SqliteVectorRepository
+from matching_service.config import APIConfig, CacheConfig, Config, DBConfig, MLConfig
+from matching_service.services import EmbeddingBatcher, TextEmbedder, WriteBehindQueue
+from matching_service.services.executors import InstrumentedExecutor
+from matching_service.services.hnsw_index import HNSWIndex
+from matching_service.services.ivf_index import IVFIndex
+from matching_service.services.query_embedding_cache import QueryEmbeddingCache
+from matching_service.services.scalar_quantizer import ScalarQuantizer
+from matching_service.services.shared_vector_cache import SharedVectorCache
+from matching_service.services.shared_vector_store import SharedStoreAddress, SharedVectorStore, SharedVectorView
+from matching_service.services.startup import StartupTracker
+from matching_service.services.vector_cache import VectorCache, VectorSource
+from matching_service.services.writer_server import WriterServer
+from matching_service.storage.repositories import RemoteWriterRepository, SqliteVectorRepository, VectorSnapshot
 
 logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
-    ml_config: MLConfig = app.state.ml_config
-    cache: VectorCache = app.state.cache
-    repository: SqliteVectorRepository = app.state.repository
-    logger.info("Service starting | Model: %s | Vectors: %s", ml_config.model_name, f"{cache.count():,}")
+    loader: threading.Thread = app.state.loader
+    logger.info("Service starting | Model: %s", app.state.ml_config.model_name)
+    loader.start()
     yield
-    repository.close()
+    await asyncio.to_thread(loader.join)
+    _close_services(app)
+
+
+def _close_services(app: FastAPI) -> None:
+    state = app.state
+    if state.batcher is not None:
+        state.batcher.close()
+    state.inference_executor.shutdown()
+    state.io_executor.shutdown()
+    if state.write_queue is not None:
+        state.write_queue.close()
+    if state.cache is not None:
+        state.cache.close()
+    if state.repository is None:
+        return
+    if state.startup.ready:
+        if state.hnsw_path is not None:
+            state.cache.save_hnsw(state.hnsw_path, state.repository.get_watermark())
+        if state.snapshot is not None:
+            _refresh_snapshot(state.snapshot, state.repository, state.ml_config.vector_dim)
+    state.repository.close()
     logger.info("Service shutting down - database connection closed")
 
 
-def create_app(db_config: DBConfig, ml_config: MLConfig, api_config: APIConfig) -> FastAPI:
-    repository = SqliteVectorRepository(db_path=str(db_config.vector_db_path))
-    embedder = TextEmbedder(
-        model_name=ml_config.model_name,
-        device=ml_config.device,
-        max_text_length=ml_config.max_text_length,
-        min_clamp_value=ml_config.min_clamp_value,
+def _load_cache_from_snapshot(
+    cache: VectorCache,
+    repository: SqliteVectorRepository,
+    snapshot: VectorSnapshot,
+    vector_dim: int,
+) -> bool:
+    data = snapshot.load(vector_dim)
+    if data is None:
+        return False
+    texts_by_id = repository.get_texts()
+    ids = data.ids.tolist()
+    vectors = data.vectors
+    present = np.fromiter((vector_id in texts_by_id for vector_id in ids), dtype=bool, count=len(ids))
+    if not present.all():
+        logger.info("Vector snapshot has %s rows deleted from the database, skipping them", f"{int((~present).sum()):,}")
+        ids = data.ids[present].tolist()
+        vectors = vectors[present]
+    texts = [texts_by_id[vector_id] for vector_id in ids]
+    cache.load_all(ids, texts, vectors, copy=False)
+    changed_ids, changed_texts, changed_vectors = repository.get_vectors_updated_since(data.watermark[1])
+    cache.add_or_update_many(changed_ids, changed_texts, changed_vectors)
+    if cache.count() != len(texts_by_id):
+        logger.warning(
+            "Vector snapshot is inconsistent with the database (%s != %s), loading from the database",
+            cache.count(),
+            len(texts_by_id),
+        )
+        return False
+    logger.info("Cache loaded from snapshot | snapshot=%s | replayed=%s", f"{len(ids):,}", len(changed_ids))
+    return True
+
+
+def _load_cache(
+    cache: VectorCache,
+    repository: SqliteVectorRepository,
+    snapshot: VectorSnapshot | None,
+    vector_dim: int,
+) -> None:
+    started = time.perf_counter()
+    if snapshot is None or not _load_cache_from_snapshot(cache, repository, snapshot, vector_dim):
+        watermark = repository.get_watermark()
+        ids, texts, vectors = repository.get_all_vectors()
+        cache.load_all(ids, texts, vectors, copy=False)
+        if snapshot is not None and ids:
+            snapshot.save(ids, vectors, watermark)
+    logger.info("Cache loaded in %.2fs", time.perf_counter() - started)
+
+
+def _refresh_snapshot(snapshot: VectorSnapshot, repository: SqliteVectorRepository, vector_dim: int) -> None:
+    watermark = repository.get_watermark()
+    data = snapshot.load(vector_dim)
+    if data is not None:
+        if data.watermark == watermark:
+            return
+        changed_ids, _, changed_vectors = repository.get_vectors_updated_since(data.watermark[1])
+        del data
+        if changed_ids and snapshot.merge(changed_ids, changed_vectors, watermark):
+            return
+    ids, _, vectors = repository.get_all_vectors()
+    if ids:
+        snapshot.save(ids, vectors, watermark)
+
+
+def _build_cache(
+    db_config: DBConfig,
+    ml_config: MLConfig,
+    cache_config: CacheConfig,
+    repository: SqliteVectorRepository,
+    tracker: StartupTracker,
+    vector_source: VectorSource,
+) -> tuple[VectorCache, Path | None, VectorSnapshot | None]:
+    ivf_index = None
+    if cache_config.ivf_nlist > 0:
+        ivf_index = IVFIndex(
+            nlist=cache_config.ivf_nlist,
+            nprobe=cache_config.ivf_nprobe,
+            kmeans_iterations=cache_config.ivf_kmeans_iterations,
+            train_sample_size=cache_config.ivf_train_sample_size,
+            retrain_growth=cache_config.ivf_retrain_growth,
+        )
+    hnsw_index = None
+    hnsw_path = None
+    if cache_config.hnsw_enabled:
+        hnsw_index = HNSWIndex(
+            m=cache_config.hnsw_m,
+            ef_construction=cache_config.hnsw_ef_construction,
+            ef_search=cache_config.hnsw_ef_search,
+        )
+        hnsw_path = cache_config.hnsw_path or db_config.vector_db_path.with_suffix(".hnsw.npz")
+    quantizer = None
+    if cache_config.quantization == "int8":
+        quantizer = ScalarQuantizer(vector_dim=ml_config.vector_dim)
+    cache = VectorCache(
+        initial_capacity=cache_config.initial_capacity,
+        vector_dim=ml_config.vector_dim,
+        search_mode=cache_config.search_mode,
+        ivf_index=ivf_index,
+        hnsw_index=hnsw_index,
+        quantizer=quantizer,
+        vector_source=vector_source,
+        rerank_factor=cache_config.quantized_rerank_factor,
+        shrink_threshold=cache_config.shrink_threshold,
+        scan_threads=cache_config.scan_threads,
+        scan_shard_size=cache_config.scan_shard_size,
     )
-    if embedder.embedding_dim != ml_config.vector_dim:
-        logger.warning("Vector dimension mismatch: config=%d, model=%d", ml_config.vector_dim, embedder.embedding_dim)
-        ml_config.vector_dim = embedder.embedding_dim
+    snapshot = _snapshot_for(db_config, cache_config)
+    with tracker.phase("cache"):
+        _load_cache(cache, repository, snapshot, ml_config.vector_dim)
+        cache.set_attributes(repository.get_attributes())
+    if hnsw_index is not None:
+        with tracker.phase("hnsw"):
+            cache.prepare_hnsw(hnsw_path, repository.get_watermark())
+    if quantizer is not None:
+        with tracker.phase("recall_estimate"):
+            cache.estimate_recall(cache_config.quantized_recall_queries)
+    return cache, hnsw_path, snapshot
+
+
+def _snapshot_for(db_config: DBConfig, cache_config: CacheConfig) -> VectorSnapshot | None:
+    if not cache_config.snapshot_enabled:
+        return None
+    return VectorSnapshot(cache_config.snapshot_path or db_config.vector_db_path.with_suffix(".snapshot"))
+
+
+def _resolve_vector_dim(ml_config: MLConfig) -> None:
+    model_dim = AutoConfig.from_pretrained(ml_config.model_name).hidden_size
+    if model_dim != ml_config.vector_dim:
+        logger.warning("Vector dimension mismatch: config=%d, model=%d", ml_config.vector_dim, model_dim)
+        ml_config.vector_dim = model_dim
+
+
+def _load_embedder(ml_config: MLConfig, tracker: StartupTracker) -> TextEmbedder:
+    with tracker.phase("model"):
+        return TextEmbedder(
+            model_name=ml_config.model_name,
+            device=ml_config.device,
+            max_text_length=ml_config.max_text_length,
+            min_clamp_value=ml_config.min_clamp_value,
+            backend=ml_config.backend,
+            onnx_dir=ml_config.onnx_dir,
+            onnx_tolerance=ml_config.onnx_tolerance,
+            quantize=ml_config.quantize,
+            quantize_min_cosine=ml_config.quantize_min_cosine,
+            max_batch_tokens=ml_config.max_batch_tokens,
+        )
 
-    cache = VectorCache(vector_dim=ml_config.vector_dim)
-    ids, texts, vectors = repository.get_all_vectors()
-    cache.load_all(ids, texts, vectors)
-    logger.info("Cache initialized with %s vectors", cache.count())
 
+def _load_storage(
+    app: FastAPI,
+    db_config: DBConfig,
+    ml_config: MLConfig,
+    cache_config: CacheConfig,
+    shared: SharedStoreAddress | None,
+) -> None:
+    tracker: StartupTracker = app.state.startup
+    with tracker.phase("database"):
+        if shared is not None:
+            repository: SqliteVectorRepository = RemoteWriterRepository(
+                db_path=str(db_config.vector_db_path),
+                writer_address=shared.writer_address,
+                authkey=shared.authkey,
+            )
+        else:
+            repository = SqliteVectorRepository(db_path=str(db_config.vector_db_path))
+    app.state.repository = repository
+    if shared is None:
+        vector_source: VectorSource = repository.get_vectors_by_ids
+        if db_config.write_behind:
+            app.state.write_queue = WriteBehindQueue(
+                repository,
+                max_rows=db_config.write_behind_max_rows,
+                batch_rows=db_config.write_behind_batch_rows,
+                max_delay_ms=db_config.write_behind_max_delay_ms,
+            )
+            # Queued rows are not in SQLite yet: int8 re-ranking reads them from the queue.
+            vector_source = app.state.write_queue.get_vectors_by_ids
+        app.state.cache, app.state.hnsw_path, app.state.snapshot = _build_cache(
+            db_config, ml_config, cache_config, repository, tracker, vector_source
+        )
+        return
+    with tracker.phase("cache"):
+        view = SharedVectorView(shared.control_name)
+        if view.vector_dim != ml_config.vector_dim:
+            raise ValueError(f"Shared vector store has dim={view.vector_dim}, model has dim={ml_config.vector_dim}")
+        app.state.cache = SharedVectorCache(
+            view,
+            metadata_source=repository.get_metadata_updated_since,
+            scan_threads=cache_config.scan_threads,
+            scan_shard_size=cache_config.scan_shard_size,
+        )
+
+
+def _load_services(
+    app: FastAPI,
+    db_config: DBConfig,
+    ml_config: MLConfig,
+    cache_config: CacheConfig,
+    shared: SharedStoreAddress | None,
+    embedder: TextEmbedder | None,
+) -> None:
+    tracker: StartupTracker = app.state.startup
+    try:
+        if embedder is not None:
+            ml_config.vector_dim = embedder.embedding_dim
+            _load_storage(app, db_config, ml_config, cache_config, shared)
+        else:
+            with tracker.phase("model_config"):
+                _resolve_vector_dim(ml_config)
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix="startup") as pool:
+                embedder_future = pool.submit(_load_embedder, ml_config, tracker)
+                storage_future = pool.submit(_load_storage, app, db_config, ml_config, cache_config, shared)
+                embedder = embedder_future.result()
+                storage_future.result()
+        app.state.embedder = embedder
+        app.state.batcher = EmbeddingBatcher(
+            embedder=embedder,
+            executor=app.state.inference_executor,
+            max_batch_size=ml_config.batcher_max_batch_size,
+            max_wait_ms=ml_config.batcher_max_wait_ms,
+        )
+    except Exception as e:
+        logger.exception("Service startup failed")
+        tracker.mark_failed(f"{type(e).__name__}: {e}")
+        return
+    logger.info("Cache initialized with %s vectors", app.state.cache.count())
+    tracker.mark_ready()
+
+
+def create_app(
+    db_config: DBConfig,
+    ml_config: MLConfig,
+    api_config: APIConfig,
+    cache_config: CacheConfig | None = None,
+    shared: SharedStoreAddress | None = None,
+    embedder: TextEmbedder | None = None,
+) -> FastAPI:
+    cache_config = cache_config or CacheConfig()
     app = FastAPI(
         title="Product Matching Service",
         description="Векторный поиск похожих товаров",
@@ -57,17 +318,98 @@ def create_app(db_config: DBConfig, ml_config: MLConfig, api_config: APIConfig)
     )
     app.state.api_config = api_config
     app.state.ml_config = ml_config
-    app.state.cache = cache
-    app.state.repository = repository
-    app.state.embedder = embedder
+    app.state.startup = StartupTracker()
+    app.state.inference_executor = InstrumentedExecutor("inference", max_workers=ml_config.inference_workers)
+    app.state.io_executor = InstrumentedExecutor("io", max_workers=api_config.io_workers)
+    app.state.query_cache = QueryEmbeddingCache(
+        model_name=ml_config.model_name,
+        max_text_length=ml_config.max_text_length,
+        max_entries=ml_config.query_cache_max_entries,
+        max_bytes=ml_config.query_cache_max_bytes,
+    )
+    app.state.repository = None
+    app.state.cache = None
+    app.state.embedder = None
+    app.state.batcher = None
+    app.state.write_queue = None
+    app.state.hnsw_path = None
+    app.state.snapshot = None
+    # Model load and cache hydration run after the server binds, so probes can tell "starting" from "dead".
+    app.state.loader = threading.Thread(
+        target=_load_services,
+        args=(app, db_config, ml_config, cache_config, shared, embedder),
+        name="startup",
+        daemon=True,
+    )
 
+    app.add_middleware(MetricsMiddleware, server_timing=api_config.server_timing)
     setup_exception_handlers(app)
     app.include_router(health_router, tags=["health"])
+    app.include_router(metrics_router, tags=["metrics"])
     app.include_router(search_router, tags=["search"])
     app.include_router(upsert_router, tags=["upsert"])
+    app.include_router(delete_router, tags=["delete"])
+    app.include_router(stats_router, tags=["stats"])
     return app
 
 
+def create_worker_app() -> FastAPI:
+    config = Config()
+    logging.basicConfig(level=getattr(logging, config.logging.level), format=config.logging.format)
+    shared = SharedStoreAddress.from_env()
+    if shared is None:
+        raise RuntimeError("Worker started without a shared vector store, run it through main()")
+    return create_app(
+        db_config=config.db,
+        ml_config=config.ml,
+        api_config=config.api,
+        cache_config=config.cache,
+        shared=shared,
+    )
+
+
+def _run_workers(config: Config) -> None:
+    cache_config = config.cache
+    if cache_config.quantization != "none" or cache_config.ivf_nlist > 0 or cache_config.hnsw_enabled:
+        raise ValueError("API_WORKERS > 1 supports only exact float32 search (no quantization, IVF or HNSW)")
+    if config.db.write_behind:
+        raise ValueError("DB_WRITE_BEHIND cannot be combined with API_WORKERS > 1")
+    _resolve_vector_dim(config.ml)
+    vector_dim = config.ml.vector_dim
+    repository = SqliteVectorRepository(db_path=str(config.db.vector_db_path))
+    snapshot = _snapshot_for(config.db, cache_config)
+    cache = VectorCache(initial_capacity=cache_config.initial_capacity, vector_dim=vector_dim)
+    _load_cache(cache, repository, snapshot, vector_dim)
+    ids, vectors = cache.export_vectors()
+    store = SharedVectorStore(vector_dim, capacity=max(cache_config.initial_capacity, len(ids) + len(ids) // 4))
+    store.load(ids, vectors)
+    del cache, ids, vectors
+    with tempfile.TemporaryDirectory(prefix="matching-service-") as socket_dir:
+        shared = SharedStoreAddress(
+            control_name=store.control_name,
+            writer_address=str(Path(socket_dir) / "writer.sock"),
+            authkey=secrets.token_bytes(32),
+        )
+        writer = WriterServer(repository, store, shared.writer_address, shared.authkey)
+        shared.export_env()
+        try:
+            uvicorn.run(
+                "matching_service.entrypoints.run_web_server:create_worker_app",
+                factory=True,
+                host=config.api.host,
+                port=config.api.port,
+                workers=config.api.workers,
+                timeout_worker_healthcheck=config.api.worker_healthcheck_timeout,
+                log_level=config.logging.level.lower(),
+            )
+        finally:
+            writer.close()
+            if snapshot is not None:
+                _refresh_snapshot(snapshot, repository, vector_dim)
+            store.close()
+            repository.close()
+
+
 def main() -> None:
     config = Config()
     logging.basicConfig(level=getattr(logging, config.logging.level), format=config.logging.format)
@@ -76,7 +418,12 @@ def main() -> None:
     logger.info("Starting Matching Service on %s:%s", config.api.host, config.api.port)
     if config.api.reload:
         logger.warning("Auto-reload enabled (development mode - not for production!)")
-    app = create_app(db_config=config.db, ml_config=config.ml, api_config=config.api)
+    if config.api.workers > 1:
+        if config.api.reload:
+            raise ValueError("API_RELOAD cannot be combined with API_WORKERS > 1")
+        _run_workers(config)
+        return
+    app = create_app(db_config=config.db, ml_config=config.ml, api_config=config.api, cache_config=config.cache)
     uvicorn.run(
         app,
         host=config.api.host,
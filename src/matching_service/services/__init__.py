@@ -1,5 +1,9 @@
 from matching_service.services.embedder import TextEmbedder
+from matching_service.services.embedding_batcher import EmbeddingBatcher
+from matching_service.services.write_behind_queue import WriteBehindQueue
 
 __all__ = [
     "TextEmbedder",
+    "EmbeddingBatcher",
+    "WriteBehindQueue",
 ]
@@ -0,0 +1,118 @@
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from matching_service.catalog import ProductAttributes
+
+
+@dataclass(frozen=True)
+class SearchFilter:
+    category: tuple[str, ...] = ()
+    seller: str | None = None
+    min_rating: float | None = None
+    max_rating: float | None = None
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.category and self.seller is None and self.min_rating is None and self.max_rating is None
+
+
+class AttributeIndex:
+    # Dictionary-encoded columns aligned with the vector rows: code 0 means "no value".
+    def __init__(self, capacity: int) -> None:
+        self._categories: dict[tuple[str, ...], int] = {}
+        self._category_paths: list[tuple[str, ...]] = []
+        self._category_subtrees: dict[tuple[str, ...], list[int]] = {}
+        self._sellers: dict[str, int] = {}
+        self._seller_names: list[str] = []
+        self.reset(capacity)
+
+    @property
+    def capacity(self) -> int:
+        return len(self._ratings)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self._category_codes.nbytes + self._seller_codes.nbytes + self._ratings.nbytes)
+
+    def reset(self, capacity: int) -> None:
+        self._categories.clear()
+        self._category_paths.clear()
+        self._category_subtrees.clear()
+        self._sellers.clear()
+        self._seller_names.clear()
+        self._category_codes = np.zeros(capacity, dtype=np.int32)
+        self._seller_codes = np.zeros(capacity, dtype=np.int32)
+        self._ratings = np.full(capacity, np.nan, dtype=np.float32)
+
+    def resize(self, capacity: int, keep_rows: int) -> None:
+        category_codes = np.zeros(capacity, dtype=np.int32)
+        seller_codes = np.zeros(capacity, dtype=np.int32)
+        ratings = np.full(capacity, np.nan, dtype=np.float32)
+        category_codes[:keep_rows] = self._category_codes[:keep_rows]
+        seller_codes[:keep_rows] = self._seller_codes[:keep_rows]
+        ratings[:keep_rows] = self._ratings[:keep_rows]
+        self._category_codes, self._seller_codes, self._ratings = category_codes, seller_codes, ratings
+
+    def set(self, row: int, attributes: ProductAttributes | None) -> None:
+        if attributes is None:
+            self._category_codes[row] = 0
+            self._seller_codes[row] = 0
+            self._ratings[row] = np.nan
+            return
+        self._category_codes[row] = self._category_code(attributes.category) if attributes.category else 0
+        self._seller_codes[row] = self._seller_code(attributes.seller) if attributes.seller else 0
+        self._ratings[row] = attributes.rating if attributes.rating is not None else np.nan
+
+    def get(self, row: int) -> ProductAttributes:
+        category_code = int(self._category_codes[row])
+        seller_code = int(self._seller_codes[row])
+        rating = float(self._ratings[row])
+        return ProductAttributes(
+            category=self._category_paths[category_code - 1] if category_code else (),
+            seller=self._seller_names[seller_code - 1] if seller_code else None,
+            rating=None if np.isnan(rating) else rating,
+        )
+
+    def move(self, holes: npt.NDArray[np.int64], sources: npt.NDArray[np.int64]) -> None:
+        self._category_codes[holes] = self._category_codes[sources]
+        self._seller_codes[holes] = self._seller_codes[sources]
+        self._ratings[holes] = self._ratings[sources]
+
+    def mask(self, size: int, search_filter: SearchFilter) -> npt.NDArray[np.bool_]:
+        mask = np.ones(size, dtype=bool)
+        if search_filter.category:
+            codes = self._category_subtrees.get(search_filter.category)
+            if not codes:
+                return np.zeros(size, dtype=bool)
+            # A category matches its own rows and every deeper path below it.
+            lookup = np.zeros(len(self._category_paths) + 1, dtype=bool)
+            lookup[codes] = True
+            mask &= lookup[self._category_codes[:size]]
+        if search_filter.seller is not None:
+            seller_code = self._sellers.get(search_filter.seller)
+            if seller_code is None:
+                return np.zeros(size, dtype=bool)
+            mask &= self._seller_codes[:size] == seller_code
+        if search_filter.min_rating is not None:
+            mask &= self._ratings[:size] >= np.float32(search_filter.min_rating)
+        if search_filter.max_rating is not None:
+            mask &= self._ratings[:size] <= np.float32(search_filter.max_rating)
+        return mask
+
+    def _category_code(self, path: tuple[str, ...]) -> int:
+        code = self._categories.get(path)
+        if code is None:
+            self._category_paths.append(path)
+            code = self._categories[path] = len(self._category_paths)
+            for depth in range(1, len(path) + 1):
+                self._category_subtrees.setdefault(path[:depth], []).append(code)
+        return code
+
+    def _seller_code(self, seller: str) -> int:
+        code = self._sellers.get(seller)
+        if code is None:
+            self._seller_names.append(seller)
+            code = self._sellers[seller] = len(self._seller_names)
+        return code
@@ -1,18 +1,66 @@
 import logging
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
 
 import numpy as np
 import numpy.typing as npt
 import torch
+from huggingface_hub import constants as hf_constants
 from transformers import (
+    AutoConfig,
     AutoModel,
     AutoTokenizer,
+    BatchEncoding,
     PreTrainedModel,
     PreTrainedTokenizer,
 )
 from tqdm import tqdm
 
+from matching_service.services.metrics import stage
+from matching_service.services.onnx_encoder import OnnxEncoder, export_onnx, onnx_model_path
+
 logger = logging.getLogger(__name__)
 
+_Features = dict[str, list[list[int]]]
+
+_CALIBRATION_TEXTS = [
+    "Смартфон Apple iPhone 15 128GB черный",
+    "Ноутбук Lenovo IdeaPad 5 14 дюймов, 16 ГБ RAM",
+    "wireless bluetooth headphones with noise cancelling",
+    "Кроссовки мужские Nike Air Max 90, размер 43, белые",
+    "Шуруповерт аккумуляторный Makita DF333DWYE 12 В, 2 аккумулятора, кейс",
+    "Кофемашина DeLonghi Magnifica S ECAM 22.110.B автоматическая, капучинатор",
+    "Детский конструктор LEGO City Пожарная часть 60320, 540 деталей",
+    "Масло моторное Castrol EDGE 5W-30 LL синтетическое 4 л",
+    "Чехол силиконовый для Samsung Galaxy S23 прозрачный",
+    "Robot vacuum cleaner Xiaomi Mi Robot Vacuum-Mop 2 Pro, white",
+    "Подгузники Pampers Premium Care 4 (9-14 кг) 82 шт.",
+    "Шампунь Head & Shoulders против перхоти 400 мл",
+    "Монитор 27\" Dell UltraSharp U2723QE 4K IPS USB-C",
+    "Набор кастрюль из нержавеющей стали 6 предметов с крышками",
+    "Книга: Мастер и Маргарита, М. А. Булгаков, твердый переплет",
+    "x",
+]
+
+
+class _PadAdviceFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        return "followed by a call to the `pad` method" not in record.getMessage()
+
+
+@contextmanager
+def _suppress_pad_advice() -> Iterator[None]:
+    # encode() tokenizes once to sort by length and pads per batch, which is the intended use of pad().
+    hf_logger = logging.getLogger("transformers.tokenization_utils_base")
+    pad_filter = _PadAdviceFilter()
+    hf_logger.addFilter(pad_filter)
+    try:
+        yield
+    finally:
+        hf_logger.removeFilter(pad_filter)
+
 
 class TextEmbedder:
     def __init__(
@@ -21,20 +69,89 @@ class TextEmbedder:
         device: str | None = None,
         max_text_length: int = 256,
         min_clamp_value: float = 1e-9,
+        backend: str = "torch",
+        onnx_dir: Path | None = None,
+        onnx_tolerance: float = 1e-3,
+        quantize: bool = False,
+        quantize_min_cosine: float = 0.99,
+        max_batch_tokens: int | None = None,
     ) -> None:
+        if backend not in ("torch", "onnx"):
+            raise ValueError(f"Unknown embedding backend: {backend}")
+        if quantize and backend != "torch":
+            raise ValueError("Dynamic int8 quantization is supported by the torch backend only")
         if device is None:
             device = "cpu"
-            if torch.cuda.is_available():
+            if torch.cuda.is_available() and not quantize:
                 device = "cuda"
                 logger.info("CUDA available - using GPU acceleration")
         self._device: str = device
         self._max_text_length: int = max_text_length
         self._min_clamp_value: float = min_clamp_value
+        self._max_batch_tokens = max_batch_tokens
+        self._tokenizer_lock = threading.Lock()
         self._tokenizer: PreTrainedTokenizer = AutoTokenizer.from_pretrained(model_name)
-        self._model: PreTrainedModel = AutoModel.from_pretrained(model_name).to(self._device)
-        self._model.eval()
-        self._embedding_dim: int = self._model.config.hidden_size
-        logger.info("TextEmbedder initialized | model=%s | device=%s | dim=%s", model_name, self._device, self._embedding_dim)
+        self._backend = backend
+        self._model: PreTrainedModel | None = None
+        self._onnx: OnnxEncoder | None = None
+        if quantize and self._device != "cpu":
+            raise ValueError(f"Dynamic int8 quantization runs on CPU only, device={self._device}")
+        if backend == "onnx":
+            self._embedding_dim: int = AutoConfig.from_pretrained(model_name).hidden_size
+            self._onnx = self._load_onnx(model_name, onnx_dir or Path(hf_constants.HF_HOME) / "onnx", onnx_tolerance)
+        else:
+            self._model = AutoModel.from_pretrained(model_name).to(self._device)
+            self._model.eval()
+            self._embedding_dim = self._model.config.hidden_size
+            if quantize:
+                self._model = self._quantize(self._model, quantize_min_cosine)
+        self._quantized = quantize
+        logger.info(
+            "TextEmbedder initialized | model=%s | backend=%s | device=%s | dim=%s | int8=%s",
+            model_name,
+            backend,
+            self._device,
+            self._embedding_dim,
+            quantize,
+        )
+
+    def _quantize(self, model: PreTrainedModel, min_cosine: float) -> PreTrainedModel:
+        quantized: PreTrainedModel = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        features = self._tokenize(_CALIBRATION_TEXTS)
+        with torch.no_grad():
+            expected = self._embed_torch(model, features, normalize=True)
+            actual = self._embed_torch(quantized, features, normalize=True)
+        cosines = np.einsum("ij,ij->i", expected, actual)
+        if float(cosines.min()) < min_cosine:
+            raise RuntimeError(
+                f"Dynamic int8 model diverges from fp32: min cosine {cosines.min():.4f} < {min_cosine} "
+                f"on {len(_CALIBRATION_TEXTS)} calibration texts"
+            )
+        logger.info(
+            "Dynamic int8 quantization applied | cosine min=%.4f mean=%.4f",
+            float(cosines.min()),
+            float(cosines.mean()),
+        )
+        return quantized
+
+    def _load_onnx(self, model_name: str, onnx_dir: Path, tolerance: float) -> OnnxEncoder:
+        path = onnx_model_path(onnx_dir, model_name)
+        if path.exists():
+            return OnnxEncoder(path, self._device)
+        model = AutoModel.from_pretrained(model_name)
+        model.eval()
+        export_onnx(model, self._tokenizer, path)
+        encoder = OnnxEncoder(path, self._device)
+        features = self._tokenize(_CALIBRATION_TEXTS)
+        with torch.no_grad():
+            expected = self._embed_torch(model, features, normalize=True)
+        actual = self._embed_onnx(encoder, features, normalize=True)
+        max_diff = float(np.abs(expected - actual).max())
+        if max_diff > tolerance:
+            path.unlink(missing_ok=True)
+            raise RuntimeError(f"ONNX export of {model_name} differs from torch by {max_diff:.2e} (tolerance {tolerance:.0e})")
+        logger.info("ONNX parity check passed | max_abs_diff=%.2e", max_diff)
+        return encoder
 
     def _mean_pooling(self, token_embeddings: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
         mask = attention_mask.unsqueeze(-1).expand(token_embeddings.size()).float()
@@ -42,26 +159,81 @@ class TextEmbedder:
         sum_mask = mask.sum(dim=1).clamp(min=self._min_clamp_value)
         return sum_embeddings / sum_mask
 
-    def _process_batch(self, texts: list[str], normalize: bool) -> npt.NDArray[np.float32]:
-        enc = self._tokenizer(texts, padding=True, truncation=True, max_length=self._max_text_length, return_tensors="pt").to(self._device)
-        token_emb = self._model(**enc).last_hidden_state
-        sentence_emb = self._mean_pooling(token_emb, enc["attention_mask"])
-        if normalize:
-            sentence_emb = torch.nn.functional.normalize(sentence_emb, p=2, dim=1)
-        return sentence_emb.cpu().numpy().astype(np.float32)
+    def _mean_pooling_np(self, token_embeddings: npt.NDArray[np.float32], attention_mask: npt.NDArray) -> npt.NDArray[np.float32]:
+        mask = attention_mask[:, :, np.newaxis].astype(np.float32)
+        sum_embeddings = np.einsum("bsd,bsx->bd", token_embeddings, mask)
+        sum_mask = np.maximum(mask.sum(axis=1), self._min_clamp_value)
+        return sum_embeddings / sum_mask
+
+    def _tokenize(self, texts: list[str]) -> _Features:
+        with self._tokenizer_lock:
+            return dict(self._tokenizer(texts, truncation=True, max_length=self._max_text_length))
+
+    def _pad(self, features: _Features, return_tensors: str) -> BatchEncoding:
+        with stage("pad"), self._tokenizer_lock, _suppress_pad_advice():
+            return self._tokenizer.pad(features, return_tensors=return_tensors)
+
+    def _embed_torch(self, model: PreTrainedModel, features: _Features, normalize: bool) -> npt.NDArray[np.float32]:
+        enc = self._pad(features, "pt").to(model.device)
+        with stage("forward"):
+            token_emb = model(**enc).last_hidden_state
+            sentence_emb = self._mean_pooling(token_emb, enc["attention_mask"])
+            if normalize:
+                sentence_emb = torch.nn.functional.normalize(sentence_emb, p=2, dim=1)
+            return sentence_emb.cpu().numpy().astype(np.float32)
+
+    def _embed_onnx(self, encoder: OnnxEncoder, features: _Features, normalize: bool) -> npt.NDArray[np.float32]:
+        enc = self._pad(features, "np")
+        with stage("forward"):
+            sentence_emb = self._mean_pooling_np(encoder(enc), enc["attention_mask"])
+            if normalize:
+                sentence_emb /= np.maximum(np.linalg.norm(sentence_emb, axis=1, keepdims=True), 1e-12)
+            return sentence_emb.astype(np.float32, copy=False)
+
+    def _process_batch(self, features: _Features, normalize: bool) -> npt.NDArray[np.float32]:
+        if self._onnx is not None:
+            return self._embed_onnx(self._onnx, features, normalize)
+        assert self._model is not None
+        return self._embed_torch(self._model, features, normalize)
+
+    def _plan_batches(self, sorted_lengths: npt.NDArray[np.int64], batch_size: int) -> list[tuple[int, int]]:
+        batches: list[tuple[int, int]] = []
+        start = 0
+        while start < len(sorted_lengths):
+            end = min(start + batch_size, len(sorted_lengths))
+            if self._max_batch_tokens is not None:
+                # Lengths are sorted descending, so the first text sets the padded length of the batch.
+                end = min(end, start + max(1, self._max_batch_tokens // max(int(sorted_lengths[start]), 1)))
+            batches.append((start, end))
+            start = end
+        return batches
 
     @torch.no_grad()
     def encode(self, texts: list[str], batch_size: int, normalize: bool = True, show_progress: bool = True) -> npt.NDArray[np.float32]:
-        all_embeddings: list[npt.NDArray[np.float32]] = []
-        batch_range = tqdm(range(0, len(texts), batch_size), desc="Encoding", unit="batch") if show_progress else range(0, len(texts), batch_size)
-        for i in batch_range:
-            batch_texts = texts[i : i + batch_size]
-            batch_embeddings = self._process_batch(batch_texts, normalize)
-            all_embeddings.append(batch_embeddings)
-        result: npt.NDArray[np.float32] = np.vstack(all_embeddings)
-        logger.debug("Encoded %s texts into %s", len(texts), result.shape)
+        result = np.empty((len(texts), self._embedding_dim), dtype=np.float32)
+        if not texts:
+            return result
+        with stage("tokenize"):
+            features = self._tokenize(texts)
+        lengths = np.fromiter((len(ids) for ids in features["input_ids"]), dtype=np.int64, count=len(texts))
+        order = np.argsort(-lengths, kind="stable")
+        batches = self._plan_batches(lengths[order], batch_size)
+        for start, end in tqdm(batches, desc="Encoding", unit="batch") if show_progress else batches:
+            rows = order[start:end]
+            batch = {key: [values[row] for row in rows] for key, values in features.items()}
+            result[rows] = self._process_batch(batch, normalize)
+        padded_tokens = sum((end - start) * int(lengths[order[start]]) for start, end in batches)
+        logger.debug("Encoded %s texts in %s batches | tokens=%s | padded=%s", len(texts), len(batches), int(lengths.sum()), padded_tokens)
         return result
 
     @property
     def embedding_dim(self) -> int:
         return self._embedding_dim
+
+    @property
+    def backend(self) -> str:
+        return self._backend
+
+    @property
+    def quantized(self) -> bool:
+        return self._quantized
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from matching_service.services.embedder import TextEmbedder
+from matching_service.services.executors import InstrumentedExecutor
+from matching_service.services.metrics import RequestTimings, current_timings, record_stage, use_timings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BatcherStats:
+    queue_depth: int
+    batches_total: int
+    texts_total: int
+    max_batch_size: int
+    max_wait_ms: float
+    batch_size_histogram: dict[int, int]
+    queue_wait_seconds_total: float
+    queue_wait_seconds_max: float
+
+
+_PendingText = tuple[str, Future, float, RequestTimings | None]
+
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        embedder: TextEmbedder,
+        executor: InstrumentedExecutor,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must be >= 0")
+        self._embedder = embedder
+        self._executor = executor
+        self._slots = threading.Semaphore(executor.max_workers)
+        self._max_batch_size = max_batch_size
+        self._max_wait_ms = max_wait_ms
+        self._queue: queue.Queue[_PendingText | None] = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes: Counter[int] = Counter()
+        self._batches_total = 0
+        self._texts_total = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+        logger.info("EmbeddingBatcher started | max_batch_size=%s | max_wait_ms=%s", max_batch_size, max_wait_ms)
+
+    def submit(self, text: str) -> Future:
+        if self._closed:
+            raise RuntimeError("EmbeddingBatcher is closed")
+        future: Future = Future()
+        self._queue.put((text, future, time.perf_counter(), current_timings()))
+        return future
+
+    def encode_one(self, text: str) -> npt.NDArray[np.float32]:
+        return self.submit(text).result()
+
+    async def encode_async(self, text: str) -> npt.NDArray[np.float32]:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            self._slots.acquire()
+            batch: list[_PendingText] = []
+            while not batch:
+                item = self._queue.get()
+                if item is None:
+                    break
+                self._admit(item, batch)
+            if not batch:
+                self._slots.release()
+                break
+            deadline = time.monotonic() + self._max_wait_ms / 1000
+            while len(batch) < self._max_batch_size:
+                try:
+                    remaining = deadline - time.monotonic()
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                self._admit(item, batch)
+            try:
+                self._executor.submit(self._process_batch, batch)
+            except RuntimeError as e:
+                self._slots.release()
+                for _, future, _, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    @staticmethod
+    def _admit(item: _PendingText, batch: list[_PendingText]) -> None:
+        # A caller that has already given up (cancelled await) is dropped; a running future can no longer be cancelled.
+        if item[1].set_running_or_notify_cancel():
+            batch.append(item)
+
+    def _process_batch(self, batch: list[_PendingText]) -> None:
+        try:
+            self._encode_batch(batch)
+        finally:
+            self._slots.release()
+
+    def _encode_batch(self, batch: list[_PendingText]) -> None:
+        started = time.perf_counter()
+        waits = [started - enqueued for _, _, enqueued, _ in batch]
+        texts = [text for text, _, _, _ in batch]
+        for (_, _, _, timings), wait in zip(batch, waits, strict=True):
+            record_stage("queue", wait, timings)
+        batch_timings = RequestTimings()
+        try:
+            with use_timings(batch_timings):
+                embeddings = self._embedder.encode(texts, batch_size=len(texts), show_progress=False)
+        except Exception as e:
+            logger.error("Batch encode failed | size=%s | error=%s", len(texts), e)
+            for _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _, timings), embedding in zip(batch, embeddings, strict=True):
+            if timings is not None:
+                timings.merge(batch_timings)
+            if not future.done():
+                future.set_result(embedding)
+        with self._stats_lock:
+            self._batch_sizes[len(batch)] += 1
+            self._batches_total += 1
+            self._texts_total += len(batch)
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+        logger.debug("Encoded micro-batch | size=%s | queue_depth=%s", len(batch), self._queue.qsize())
+
+    def stats(self) -> BatcherStats:
+        with self._stats_lock:
+            return BatcherStats(
+                queue_depth=self._queue.qsize(),
+                batches_total=self._batches_total,
+                texts_total=self._texts_total,
+                max_batch_size=self._max_batch_size,
+                max_wait_ms=self._max_wait_ms,
+                batch_size_histogram=dict(sorted(self._batch_sizes.items())),
+                queue_wait_seconds_total=self._wait_total,
+                queue_wait_seconds_max=self._wait_max,
+            )
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        logger.info("EmbeddingBatcher stopped")
@@ -0,0 +1,93 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class ExecutorStats:
+    name: str
+    max_workers: int
+    queued: int
+    active: int
+    tasks_total: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+    run_seconds_total: float
+
+
+class InstrumentedExecutor:
+    def __init__(self, name: str, max_workers: int) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be >= 1")
+        self._name = name
+        self._max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._tasks_total = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+        logger.info("Executor started | name=%s | max_workers=%s", name, max_workers)
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    def submit(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> Future:
+        submitted = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+        context = contextvars.copy_context()
+        return self._pool.submit(context.run, self._call, submitted, fn, args, kwargs)
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def _call(self, submitted: float, fn: Callable[..., T], args: tuple, kwargs: dict) -> T:
+        started = time.perf_counter()
+        waited = started - submitted
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._tasks_total += 1
+                self._run_total += time.perf_counter() - started
+
+    def stats(self) -> ExecutorStats:
+        with self._lock:
+            return ExecutorStats(
+                name=self._name,
+                max_workers=self._max_workers,
+                queued=self._queued,
+                active=self._active,
+                tasks_total=self._tasks_total,
+                wait_seconds_total=self._wait_total,
+                wait_seconds_max=self._wait_max,
+                run_seconds_total=self._run_total,
+            )
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
+        logger.info("Executor stopped | name=%s", self._name)
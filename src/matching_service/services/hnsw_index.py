@@ -0,0 +1,402 @@
+import heapq
+import logging
+import math
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+
+logger = logging.getLogger(__name__)
+
+
+class HNSWIndex:
+    _FORMAT_VERSION = 1
+
+    def __init__(
+        self,
+        m: int = 16,
+        ef_construction: int = 100,
+        ef_search: int = 64,
+        seed: int = 0,
+    ) -> None:
+        if m < 2:
+            raise ValueError("M must be >= 2")
+        if ef_construction < 1 or ef_search < 1:
+            raise ValueError("ef_construction and ef_search must be >= 1")
+        self._m = m
+        self._m0 = 2 * m
+        self._ef_construction = max(ef_construction, m)
+        self._ef_search = ef_search
+        self._level_mult = 1 / math.log(m)
+        self._rng = np.random.default_rng(seed)
+        self.reset()
+
+    @property
+    def ef_search(self) -> int:
+        return self._ef_search
+
+    @property
+    def is_built(self) -> bool:
+        return self._built
+
+    def reset(self) -> None:
+        self._built = False
+        self._entry_point = -1
+        self._max_level = -1
+        self._node_count = 0
+        self._levels = np.full(0, -1, dtype=np.int8)
+        self._level0 = np.full((0, self._m0), -1, dtype=np.int32)
+        self._level0_counts = np.zeros(0, dtype=np.int32)
+        self._upper: list[dict[int, list[int]]] = []
+
+    def build(self, vectors: npt.NDArray[np.float32]) -> None:
+        self.reset()
+        self._reserve(len(vectors))
+        started = time.perf_counter()
+        for row in range(len(vectors)):
+            self._insert(row, vectors)
+            if (row + 1) % 100000 == 0:
+                logger.info("HNSW build progress | %s/%s vectors", f"{row + 1:,}", f"{len(vectors):,}")
+        self._built = True
+        logger.info(
+            "HNSW index built | vectors=%s | M=%s | ef_construction=%s | elapsed=%.2fs",
+            f"{len(vectors):,}",
+            self._m,
+            self._ef_construction,
+            time.perf_counter() - started,
+        )
+
+    def add(self, row: int, vectors: npt.NDArray[np.float32]) -> None:
+        self._reserve(row + 1)
+        self._insert(row, vectors)
+
+    def update(self, row: int, vectors: npt.NDArray[np.float32]) -> None:
+        level = int(self._levels[row])
+        self._level0[row] = -1
+        self._level0_counts[row] = 0
+        for lc in range(1, level + 1):
+            self._upper[lc - 1][row] = []
+        if self._node_count == 1:
+            return
+        entry = self._entry_point if self._entry_point != row else self._any_neighbor(row)
+        if entry < 0:
+            return
+        self._connect(row, level, entry, vectors)
+
+    def remove_rows(
+        self,
+        deleted: npt.NDArray[np.int64],
+        sources: npt.NDArray[np.int64],
+        holes: npt.NDArray[np.int64],
+        vectors: npt.NDArray[np.float32],
+    ) -> None:
+        count = self._node_count
+        gone = set(deleted.tolist())
+        referencing = np.flatnonzero(np.isin(self._level0[:count], deleted).any(axis=1))
+        for row in referencing.tolist():
+            if row not in gone:
+                self._repair(row, 0, gone, vectors)
+        for lc, links in enumerate(self._upper, start=1):
+            for row, neighbors in list(links.items()):
+                if row not in gone and not gone.isdisjoint(neighbors):
+                    self._repair(row, lc, gone, vectors)
+
+        new_count = count - len(deleted)
+        if new_count == 0:
+            self.reset()
+            self._built = True
+            return
+        remap = np.arange(count + 1, dtype=np.int32)
+        remap[count] = -1
+        remap[deleted] = -1
+        remap[sources] = holes
+        self._levels[holes] = self._levels[sources]
+        self._level0[holes] = self._level0[sources]
+        self._level0_counts[holes] = self._level0_counts[sources]
+        self._levels[new_count:count] = -1
+        self._level0[new_count:count] = -1
+        self._level0_counts[new_count:count] = 0
+        self._level0[:new_count] = remap[self._level0[:new_count]]
+        row_map = remap.tolist()
+        self._upper = [
+            {row_map[row]: [row_map[n] for n in neighbors] for row, neighbors in links.items() if row_map[row] >= 0}
+            for links in self._upper
+        ]
+        if self._entry_point in gone:
+            self._entry_point = int(np.argmax(self._levels[:new_count]))
+            self._max_level = int(self._levels[self._entry_point])
+            del self._upper[self._max_level :]
+        else:
+            self._entry_point = row_map[self._entry_point]
+        self._node_count = new_count
+
+    def _repair(self, row: int, level: int, gone: set[int], vectors: npt.NDArray[np.float32]) -> None:
+        # Neighbors of the removed nodes are the closest replacements for the links they leave behind.
+        links = self._links(row, level)
+        pool = {n for n in links if n not in gone}
+        for removed in links:
+            if removed in gone:
+                pool.update(n for n in self._links(removed, level) if n not in gone and n != row)
+        candidates = list(pool)
+        sims = vectors[candidates] @ vectors[row] if candidates else np.empty(0, dtype=np.float32)
+        max_links = self._m0 if level == 0 else self._m
+        self._set_links(row, level, self._select_neighbors(list(zip(sims.tolist(), candidates, strict=True)), max_links, vectors))
+
+    def search(
+        self,
+        query: npt.NDArray[np.float32],
+        k: int,
+        vectors: npt.NDArray[np.float32],
+        ef_search: int | None = None,
+    ) -> tuple[npt.NDArray[np.float32], npt.NDArray[np.int64]]:
+        if self._entry_point < 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        ef = max(ef_search or self._ef_search, k)
+        entry = self._entry_point
+        entry_sim = float(vectors[entry] @ query)
+        for lc in range(self._max_level, 0, -1):
+            entry, entry_sim = self._greedy_search(query, entry, entry_sim, lc, vectors)
+        found = self._search_layer(query, [(entry_sim, entry)], ef, 0, vectors)
+        best = heapq.nlargest(k, found)
+        scores = np.array([sim for sim, _ in best], dtype=np.float32)
+        rows = np.array([row for _, row in best], dtype=np.int64)
+        return scores, rows
+
+    def save(self, path: Path, ids: list[int], watermark: tuple[int, int]) -> None:
+        upper_rows: dict[str, npt.NDArray] = {}
+        for lc, links in enumerate(self._upper, start=1):
+            rows = np.fromiter(links.keys(), dtype=np.int64, count=len(links))
+            offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(links[int(row)]) for row in rows])
+            flat = np.fromiter((n for row in rows for n in links[int(row)]), dtype=np.int32, count=int(offsets[-1]))
+            upper_rows[f"upper_{lc}_rows"] = rows
+            upper_rows[f"upper_{lc}_offsets"] = offsets
+            upper_rows[f"upper_{lc}_links"] = flat
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                version=np.array(self._FORMAT_VERSION),
+                params=np.array([self._m, self._ef_construction]),
+                watermark=np.array(watermark, dtype=np.int64),
+                ids=np.array(ids[: self._node_count], dtype=np.int64),
+                entry=np.array([self._entry_point, self._max_level]),
+                levels=self._levels[: self._node_count],
+                level0=self._level0[: self._node_count],
+                level0_counts=self._level0_counts[: self._node_count],
+                **upper_rows,
+            )
+        os.replace(tmp_path, path)
+        logger.info("HNSW index saved | path=%s | vectors=%s", path, f"{self._node_count:,}")
+
+    def load(self, path: Path, id_to_index: dict[int, int], watermark: tuple[int, int]) -> bool:
+        if not path.exists():
+            return False
+        try:
+            with np.load(path) as data:
+                if int(data["version"]) != self._FORMAT_VERSION:
+                    logger.info("HNSW file %s has an old format, rebuilding", path)
+                    return False
+                if tuple(data["params"]) != (self._m, self._ef_construction):
+                    logger.info("HNSW file %s was built with other M/ef_construction, rebuilding", path)
+                    return False
+                if tuple(data["watermark"]) != tuple(watermark):
+                    logger.info("HNSW file %s is stale (database changed), rebuilding", path)
+                    return False
+                saved_ids = data["ids"]
+                if len(saved_ids) != len(id_to_index):
+                    return False
+                row_map = np.fromiter((id_to_index.get(int(i), -1) for i in saved_ids), dtype=np.int64, count=len(saved_ids))
+                if (row_map < 0).any():
+                    return False
+                self._restore(data, row_map)
+        except (OSError, KeyError, ValueError) as e:
+            logger.warning("Failed to load HNSW index from %s: %s", path, e)
+            self.reset()
+            return False
+        logger.info("HNSW index loaded | path=%s | vectors=%s", path, f"{self._node_count:,}")
+        return True
+
+    def _restore(self, data: np.lib.npyio.NpzFile, row_map: npt.NDArray[np.int64]) -> None:
+        count = len(row_map)
+        self.reset()
+        self._reserve(count)
+        remap = np.append(row_map, -1).astype(np.int32)
+        self._levels[row_map] = data["levels"]
+        self._level0[row_map] = remap[data["level0"]]
+        self._level0_counts[row_map] = data["level0_counts"]
+        entry_point, max_level = (int(v) for v in data["entry"])
+        self._entry_point = int(row_map[entry_point]) if entry_point >= 0 else -1
+        self._max_level = max_level
+        self._upper = []
+        for lc in range(1, max_level + 1):
+            rows = data[f"upper_{lc}_rows"]
+            offsets = data[f"upper_{lc}_offsets"]
+            links = remap[data[f"upper_{lc}_links"]].tolist()
+            self._upper.append(
+                {int(row_map[row]): links[offsets[i] : offsets[i + 1]] for i, row in enumerate(rows)}
+            )
+        self._node_count = count
+        self._built = True
+
+    def _reserve(self, required: int) -> None:
+        capacity = len(self._levels)
+        if required <= capacity:
+            return
+        new_capacity = max(required, capacity * 2)
+        levels = np.full(new_capacity, -1, dtype=np.int8)
+        levels[:capacity] = self._levels
+        level0 = np.full((new_capacity, self._m0), -1, dtype=np.int32)
+        level0[:capacity] = self._level0
+        counts = np.zeros(new_capacity, dtype=np.int32)
+        counts[:capacity] = self._level0_counts
+        self._levels, self._level0, self._level0_counts = levels, level0, counts
+
+    def _random_level(self) -> int:
+        return min(int(-math.log(1.0 - self._rng.random()) * self._level_mult), 32)
+
+    def _insert(self, row: int, vectors: npt.NDArray[np.float32]) -> None:
+        level = self._random_level()
+        self._levels[row] = level
+        self._node_count = max(self._node_count, row + 1)
+        while len(self._upper) < level:
+            self._upper.append({})
+        for lc in range(1, level + 1):
+            self._upper[lc - 1][row] = []
+        if self._entry_point < 0:
+            self._entry_point = row
+            self._max_level = level
+            return
+        self._connect(row, level, self._entry_point, vectors)
+        if level > self._max_level:
+            self._entry_point = row
+            self._max_level = level
+
+    def _connect(self, row: int, level: int, entry: int, vectors: npt.NDArray[np.float32]) -> None:
+        query = vectors[row]
+        entry_sim = float(vectors[entry] @ query)
+        for lc in range(self._max_level, level, -1):
+            entry, entry_sim = self._greedy_search(query, entry, entry_sim, lc, vectors)
+        candidates = [(entry_sim, entry)]
+        for lc in range(min(level, self._max_level), -1, -1):
+            candidates = self._search_layer(query, candidates, self._ef_construction, lc, vectors)
+            candidates = [(sim, node) for sim, node in candidates if node != row]
+            max_links = self._m0 if lc == 0 else self._m
+            selected = self._select_neighbors(candidates, self._m, vectors)
+            self._set_links(row, lc, selected)
+            for neighbor in selected:
+                links = self._links(neighbor, lc)
+                if row in links:
+                    continue
+                if len(links) < max_links:
+                    self._set_links(neighbor, lc, [*links, row])
+                    continue
+                neighbor_vector = vectors[neighbor]
+                pool = [*links, row]
+                sims = vectors[pool] @ neighbor_vector
+                shrunk = self._select_neighbors(list(zip(sims.tolist(), pool, strict=True)), max_links, vectors)
+                self._set_links(neighbor, lc, shrunk)
+            if not candidates:
+                candidates = [(entry_sim, entry)]
+
+    def _links(self, row: int, level: int) -> list[int]:
+        if level == 0:
+            return self._level0[row, : self._level0_counts[row]].tolist()
+        return self._upper[level - 1].get(row, [])
+
+    def _set_links(self, row: int, level: int, links: list[int]) -> None:
+        if level == 0:
+            self._level0[row] = -1
+            self._level0[row, : len(links)] = links
+            self._level0_counts[row] = len(links)
+        else:
+            self._upper[level - 1][row] = list(links)
+
+    def _any_neighbor(self, row: int) -> int:
+        for candidate in range(self._node_count):
+            if candidate != row and self._levels[candidate] >= 0:
+                return candidate
+        return -1
+
+    def _greedy_search(
+        self,
+        query: npt.NDArray[np.float32],
+        entry: int,
+        entry_sim: float,
+        level: int,
+        vectors: npt.NDArray[np.float32],
+    ) -> tuple[int, float]:
+        changed = True
+        while changed:
+            changed = False
+            links = self._links(entry, level)
+            if not links:
+                break
+            sims = vectors[links] @ query
+            best = int(np.argmax(sims))
+            if sims[best] > entry_sim:
+                entry, entry_sim = links[best], float(sims[best])
+                changed = True
+        return entry, entry_sim
+
+    def _search_layer(
+        self,
+        query: npt.NDArray[np.float32],
+        entry_points: list[tuple[float, int]],
+        ef: int,
+        level: int,
+        vectors: npt.NDArray[np.float32],
+    ) -> list[tuple[float, int]]:
+        visited = {node for _, node in entry_points}
+        candidates = [(-sim, node) for sim, node in entry_points]
+        heapq.heapify(candidates)
+        results = list(entry_points)
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+        while candidates:
+            neg_sim, node = heapq.heappop(candidates)
+            if -neg_sim < results[0][0] and len(results) >= ef:
+                break
+            unvisited = [n for n in self._links(node, level) if n not in visited]
+            if not unvisited:
+                continue
+            visited.update(unvisited)
+            sims = (vectors[unvisited] @ query).tolist()
+            for neighbor, sim in zip(unvisited, sims, strict=True):
+                if len(results) < ef or sim > results[0][0]:
+                    heapq.heappush(candidates, (-sim, neighbor))
+                    heapq.heappush(results, (sim, neighbor))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+        return results
+
+    def _select_neighbors(
+        self,
+        candidates: list[tuple[float, int]],
+        max_links: int,
+        vectors: npt.NDArray[np.float32],
+    ) -> list[int]:
+        ordered = sorted(candidates, reverse=True)
+        if len(ordered) <= max_links:
+            return [node for _, node in ordered]
+        nodes = [node for _, node in ordered]
+        query_sims = [sim for sim, _ in ordered]
+        candidate_vectors = vectors[nodes]
+        gram = candidate_vectors @ candidate_vectors.T
+        closest_selected = np.full(len(nodes), -np.inf, dtype=np.float32)
+        selected: list[int] = []
+        skipped: list[int] = []
+        for i, node in enumerate(nodes):
+            if len(selected) >= max_links:
+                break
+            if closest_selected[i] < query_sims[i]:
+                selected.append(node)
+                np.maximum(closest_selected, gram[i], out=closest_selected)
+            else:
+                skipped.append(node)
+        if len(selected) < max_links:
+            selected.extend(skipped[: max_links - len(selected)])
+        return selected
@@ -0,0 +1,169 @@
+import copy
+import logging
+import time
+
+import numpy as np
+import numpy.typing as npt
+
+logger = logging.getLogger(__name__)
+
+
+class IVFIndex:
+    _ASSIGN_CHUNK_SIZE = 65536
+
+    def __init__(
+        self,
+        nlist: int,
+        nprobe: int = 8,
+        kmeans_iterations: int = 10,
+        train_sample_size: int = 100000,
+        retrain_growth: float = 2.0,
+        seed: int = 0,
+    ) -> None:
+        if nlist < 1:
+            raise ValueError("nlist must be >= 1")
+        if nprobe < 1:
+            raise ValueError("nprobe must be >= 1")
+        if retrain_growth != 0 and retrain_growth <= 1:
+            raise ValueError("retrain_growth must be 0 or > 1")
+        self._nlist = nlist
+        self._nprobe = nprobe
+        self._kmeans_iterations = kmeans_iterations
+        self._train_sample_size = max(train_sample_size, nlist)
+        self._retrain_growth = retrain_growth
+        self._seed = seed
+        self._centroids: npt.NDArray[np.float32] | None = None
+        self._trained_size = 0
+        self._lists: list[list[int]] = []
+        self._list_arrays: list[npt.NDArray[np.int64] | None] = []
+        self._assignments = np.empty(0, dtype=np.int32)
+
+    @property
+    def nlist(self) -> int:
+        return self._nlist
+
+    @property
+    def nprobe(self) -> int:
+        return self._nprobe
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    def can_train(self, num_vectors: int) -> bool:
+        return num_vectors >= self._nlist
+
+    def needs_retrain(self, num_vectors: int) -> bool:
+        # Centroids fitted on the first vectors drift away from a growing catalog; the geometric
+        # threshold keeps the amortized retraining cost per insert constant.
+        return self.is_trained and self._retrain_growth > 0 and num_vectors >= self._trained_size * self._retrain_growth
+
+    def reset(self) -> None:
+        self._centroids = None
+        self._trained_size = 0
+        self._lists = []
+        self._list_arrays = []
+        self._assignments = np.empty(0, dtype=np.int32)
+
+    def train(self, vectors: npt.NDArray[np.float32]) -> None:
+        if not self.can_train(len(vectors)):
+            raise ValueError(f"IVF training needs at least nlist={self._nlist} vectors, got {len(vectors)}")
+        started = time.perf_counter()
+        self._centroids = self._kmeans(vectors)
+        self._trained_size = len(vectors)
+        assignments = self._assign(vectors, self._centroids)
+        self._assignments = assignments
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(self._nlist + 1))
+        self._lists = [order[bounds[i] : bounds[i + 1]].tolist() for i in range(self._nlist)]
+        self._list_arrays = [None] * self._nlist
+        logger.info(
+            "IVF index trained | vectors=%s | nlist=%s | elapsed=%.2fs",
+            f"{len(vectors):,}",
+            self._nlist,
+            time.perf_counter() - started,
+        )
+
+    def trained_copy(self, vectors: npt.NDArray[np.float32]) -> "IVFIndex":
+        # The live index keeps serving searches and inserts while the copy is trained.
+        index = copy.copy(self)
+        index.reset()
+        index.train(vectors)
+        return index
+
+    def add(self, row: int, vector: npt.NDArray[np.float32]) -> None:
+        assert self._centroids is not None
+        list_id = int(np.argmax(self._centroids @ vector))
+        if row >= len(self._assignments):
+            grown = np.full(max(row + 1, len(self._assignments) * 2), -1, dtype=np.int32)
+            grown[: len(self._assignments)] = self._assignments
+            self._assignments = grown
+        self._assignments[row] = list_id
+        self._lists[list_id].append(row)
+        self._list_arrays[list_id] = None
+
+    def update(self, row: int, vector: npt.NDArray[np.float32]) -> None:
+        assert self._centroids is not None
+        old_list_id = int(self._assignments[row])
+        new_list_id = int(np.argmax(self._centroids @ vector))
+        if old_list_id == new_list_id:
+            return
+        self._lists[old_list_id].remove(row)
+        self._list_arrays[old_list_id] = None
+        self._assignments[row] = new_list_id
+        self._lists[new_list_id].append(row)
+        self._list_arrays[new_list_id] = None
+
+    def remove_rows(self, deleted: npt.NDArray[np.int64], sources: npt.NDArray[np.int64], holes: npt.NDArray[np.int64]) -> None:
+        assert self._centroids is not None
+        gone = set(deleted.tolist())
+        moved = dict(zip(sources.tolist(), holes.tolist(), strict=True))
+        for list_id in set(self._assignments[deleted].tolist()) | set(self._assignments[sources].tolist()):
+            self._lists[list_id] = [moved.get(row, row) for row in self._lists[list_id] if row not in gone]
+            self._list_arrays[list_id] = None
+        self._assignments[holes] = self._assignments[sources]
+        self._assignments[sources] = -1
+        self._assignments[deleted[~np.isin(deleted, holes)]] = -1
+
+    def probe(self, queries: npt.NDArray[np.float32], nprobe: int | None = None) -> npt.NDArray[np.int64]:
+        assert self._centroids is not None
+        actual_nprobe = min(nprobe or self._nprobe, self._nlist)
+        centroid_sims = queries @ self._centroids.T
+        kth = self._nlist - actual_nprobe
+        return np.argpartition(centroid_sims, kth, axis=1)[:, kth:]
+
+    def rows_in_lists(self, list_ids: npt.NDArray[np.int64]) -> npt.NDArray[np.int64]:
+        arrays = [self._list_array(int(list_id)) for list_id in list_ids]
+        return np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int64)
+
+    def _list_array(self, list_id: int) -> npt.NDArray[np.int64]:
+        array = self._list_arrays[list_id]
+        if array is None:
+            array = np.array(self._lists[list_id], dtype=np.int64)
+            self._list_arrays[list_id] = array
+        return array
+
+    def _kmeans(self, vectors: npt.NDArray[np.float32]) -> npt.NDArray[np.float32]:
+        rng = np.random.default_rng(self._seed)
+        sample = vectors
+        if len(vectors) > self._train_sample_size:
+            sample = vectors[np.sort(rng.choice(len(vectors), size=self._train_sample_size, replace=False))]
+        centroids = sample[rng.choice(len(sample), size=self._nlist, replace=False)].copy()
+        for _ in range(self._kmeans_iterations):
+            assignments = self._assign(sample, centroids)
+            counts = np.bincount(assignments, minlength=self._nlist)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()), replace=False)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = (sums / np.maximum(norms, 1e-12)).astype(np.float32)
+        return centroids
+
+    def _assign(self, vectors: npt.NDArray[np.float32], centroids: npt.NDArray[np.float32]) -> npt.NDArray[np.int32]:
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), self._ASSIGN_CHUNK_SIZE):
+            chunk = vectors[start : start + self._ASSIGN_CHUNK_SIZE]
+            assignments[start : start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+        return assignments
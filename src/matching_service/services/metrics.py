@@ -0,0 +1,134 @@
+import bisect
+import threading
+import time
+from collections.abc import Generator, Iterable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+_DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_ROW_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+
+@dataclass(frozen=True)
+class MetricFamily:
+    name: str
+    kind: str
+    help: str
+    samples: list[tuple[dict[str, str], float]] = field(default_factory=list)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = _DEFAULT_BUCKETS) -> None:
+        self._name = name
+        self._help = help
+        self._labelnames = labelnames
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = ([0] * (len(self._buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def render(self) -> list[str]:
+        with self._lock:
+            series = {labels: (list(counts), total[0]) for labels, (counts, total) in self._series.items()}
+        lines = [f"# HELP {self._name} {self._help}", f"# TYPE {self._name} histogram"]
+        for labelvalues, (counts, total) in sorted(series.items()):
+            labels = dict(zip(self._labelnames, labelvalues, strict=True))
+            cumulative = 0
+            for bound, count in zip((*self._buckets, float("inf")), counts, strict=True):
+                cumulative += count
+                lines.append(f"{self._name}_bucket{_labels({**labels, 'le': _number(bound)})} {cumulative}")
+            lines.append(f"{self._name}_sum{_labels(labels)} {_number(total)}")
+            lines.append(f"{self._name}_count{_labels(labels)} {cumulative}")
+        return lines
+
+
+class RequestTimings:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stages: dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._stages[stage] = self._stages.get(stage, 0.0) + seconds
+
+    def merge(self, other: "RequestTimings") -> None:
+        for stage, seconds in other.items():
+            self.add(stage, seconds)
+
+    def items(self) -> list[tuple[str, float]]:
+        with self._lock:
+            return list(self._stages.items())
+
+    def header(self, total_seconds: float) -> str:
+        entries = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in self.items()]
+        entries.append(f"total;dur={total_seconds * 1000:.2f}")
+        return ", ".join(entries)
+
+
+STAGE_SECONDS = Histogram("matching_stage_seconds", "Time spent in request processing stages", ("stage",))
+REQUEST_SECONDS = Histogram("matching_http_request_seconds", "HTTP request latency", ("method", "route", "status"))
+WRITE_COMMIT_ROWS = Histogram("matching_write_commit_rows", "Rows per write-behind group commit", buckets=_ROW_BUCKETS)
+
+_current_timings: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> RequestTimings | None:
+    return _current_timings.get()
+
+
+@contextmanager
+def use_timings(timings: RequestTimings) -> Generator[None, None, None]:
+    token = _current_timings.set(timings)
+    try:
+        yield
+    finally:
+        _current_timings.reset(token)
+
+
+def record_stage(name: str, seconds: float, timings: RequestTimings | None = None) -> None:
+    STAGE_SECONDS.observe(seconds, name)
+    timings = timings or _current_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def stage(name: str) -> Generator[None, None, None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def render(families: Iterable[MetricFamily]) -> str:
+    lines: list[str] = []
+    for family in families:
+        lines.append(f"# HELP {family.name} {family.help}")
+        lines.append(f"# TYPE {family.name} {family.kind}")
+        lines.extend(f"{family.name}{_labels(labels)} {_number(value)}" for labels, value in family.samples)
+    for histogram in (STAGE_SECONDS, REQUEST_SECONDS, WRITE_COMMIT_ROWS):
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
+
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped, strict=True)) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
@@ -0,0 +1,72 @@
+import inspect
+import logging
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+import torch
+from transformers import PreTrainedModel, PreTrainedTokenizer
+
+logger = logging.getLogger(__name__)
+
+_OPSET_VERSION = 14
+
+
+def onnx_model_path(onnx_dir: Path, model_name: str) -> Path:
+    return onnx_dir / f"{re.sub(r'[^A-Za-z0-9._-]+', '--', model_name.strip('/'))}.onnx"
+
+
+def export_onnx(model: PreTrainedModel, tokenizer: PreTrainedTokenizer, path: Path) -> None:
+    sample = tokenizer(["onnx export sample", "a longer onnx export sample text"], padding=True, return_tensors="pt")
+    input_names = [name for name in inspect.signature(model.forward).parameters if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    kwargs = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        with torch.no_grad():
+            torch.onnx.export(
+                model.cpu(),
+                ({name: sample[name] for name in input_names},),
+                str(tmp_path),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=_OPSET_VERSION,
+                **kwargs,
+            )
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    logger.info("ONNX model exported | path=%s", path)
+
+
+class OnnxEncoder:
+    def __init__(self, path: Path, device: str) -> None:
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError("ML_BACKEND=onnx requires onnxruntime: install matching-service[onnx]") from e
+        providers = ["CPUExecutionProvider"]
+        if device == "cuda":
+            if "CUDAExecutionProvider" in ort.get_available_providers():
+                providers.insert(0, "CUDAExecutionProvider")
+            else:
+                logger.warning("CUDAExecutionProvider is not available, ONNX Runtime falls back to CPU")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(str(path), sess_options=options, providers=providers)
+        self._input_names = [i.name for i in self._session.get_inputs()]
+        logger.info("ONNX Runtime session created | path=%s | providers=%s", path, self._session.get_providers())
+
+    @property
+    def input_names(self) -> list[str]:
+        return self._input_names
+
+    def __call__(self, inputs: dict[str, npt.NDArray[np.int64]]) -> npt.NDArray[np.float32]:
+        feed = {name: np.asarray(inputs[name], dtype=np.int64) for name in self._input_names}
+        last_hidden_state: npt.NDArray[np.float32] = self._session.run(["last_hidden_state"], feed)[0]
+        return last_hidden_state
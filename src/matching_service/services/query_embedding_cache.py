@@ -0,0 +1,105 @@
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class QueryCacheStats:
+    entries: int
+    bytes: int
+    max_entries: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+_CacheKey = tuple[str, int, str]
+
+
+class QueryEmbeddingCache:
+    def __init__(self, model_name: str, max_text_length: int, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024) -> None:
+        if max_entries < 0:
+            raise ValueError("max_entries must be >= 0")
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be >= 0")
+        self._model_name = model_name
+        self._max_text_length = max_text_length
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[_CacheKey, npt.NDArray[np.float32]] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+        logger.info("QueryEmbeddingCache initialized | max_entries=%s | max_bytes=%s", max_entries, max_bytes)
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_entries > 0 and self._max_bytes > 0
+
+    def get(self, text: str) -> npt.NDArray[np.float32] | None:
+        if not self.enabled:
+            return None
+        key = self._key(text)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return embedding
+
+    def put(self, text: str, embedding: npt.NDArray[np.float32]) -> None:
+        if not self.enabled:
+            return
+        key = self._key(text)
+        stored = np.array(embedding, dtype=np.float32)
+        stored.flags.writeable = False
+        size = self._entry_size(key, stored)
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= self._entry_size(key, previous)
+            self._entries[key] = stored
+            self._bytes += size
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(evicted_key, evicted)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> QueryCacheStats:
+        with self._lock:
+            return QueryCacheStats(
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_entries=self._max_entries,
+                max_bytes=self._max_bytes,
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+            )
+
+    def _key(self, text: str) -> _CacheKey:
+        normalized = unicodedata.normalize("NFC", " ".join(text.split()))
+        return self._model_name, self._max_text_length, normalized
+
+    @staticmethod
+    def _entry_size(key: _CacheKey, embedding: npt.NDArray[np.float32]) -> int:
+        return embedding.nbytes + len(key[2].encode("utf-8"))
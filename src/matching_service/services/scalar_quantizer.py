@@ -0,0 +1,47 @@
+import logging
+
+import numpy as np
+import numpy.typing as npt
+
+logger = logging.getLogger(__name__)
+
+
+class ScalarQuantizer:
+    _LEVELS = 255
+    _CODE_OFFSET = 128
+    _CHUNK_SIZE = 16384
+    _MIN_TRAIN_SIZE = 1000
+
+    def __init__(self, vector_dim: int, value_range: tuple[float, float] = (-1.0, 1.0)) -> None:
+        self._vector_dim = vector_dim
+        low, high = value_range
+        self._offset = np.full(vector_dim, low, dtype=np.float32)
+        self._scale = np.full(vector_dim, (high - low) / self._LEVELS, dtype=np.float32)
+
+    def train(self, vectors: npt.NDArray[np.float32]) -> None:
+        if len(vectors) < self._MIN_TRAIN_SIZE:
+            logger.info("ScalarQuantizer keeps the default range: %s vectors < %s", len(vectors), self._MIN_TRAIN_SIZE)
+            return
+        low = vectors.min(axis=0).astype(np.float32)
+        high = vectors.max(axis=0).astype(np.float32)
+        self._offset = low
+        self._scale = np.maximum((high - low) / self._LEVELS, np.float32(1e-8))
+        logger.debug("ScalarQuantizer trained on %s vectors", len(vectors))
+
+    def encode(self, vectors: npt.NDArray[np.float32]) -> npt.NDArray[np.int8]:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        codes = np.rint((vectors - self._offset) / self._scale) - self._CODE_OFFSET
+        return np.clip(codes, -128, 127).astype(np.int8)
+
+    def decode(self, codes: npt.NDArray[np.int8]) -> npt.NDArray[np.float32]:
+        return (codes.astype(np.float32) + self._CODE_OFFSET) * self._scale + self._offset
+
+    def scores(self, codes: npt.NDArray[np.int8], queries: npt.NDArray[np.float32]) -> npt.NDArray[np.float32]:
+        scaled_queries = (queries * self._scale).astype(np.float32)
+        bias = queries @ (self._CODE_OFFSET * self._scale + self._offset)
+        result = np.empty((queries.shape[0], len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), self._CHUNK_SIZE):
+            chunk = codes[start : start + self._CHUNK_SIZE].astype(np.float32)
+            result[:, start : start + len(chunk)] = scaled_queries @ chunk.T
+        result += bias[:, np.newaxis]
+        return result
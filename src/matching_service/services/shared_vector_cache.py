@@ -0,0 +1,155 @@
+import logging
+import time
+from collections.abc import Callable
+
+import numpy as np
+import numpy.typing as npt
+
+from matching_service.catalog import ProductAttributes
+from matching_service.services.attribute_index import SearchFilter
+from matching_service.services.shared_vector_store import SharedVectorView
+from matching_service.services.vector_cache import VectorCache
+
+logger = logging.getLogger(__name__)
+
+MetadataSource = Callable[[int], tuple[dict[int, tuple[str, ProductAttributes]], int]]
+
+
+class SharedLayoutBusyError(Exception):
+    def __init__(self, attempts: int) -> None:
+        super().__init__(f"Vector rows are being moved by the writer, search retried {attempts} times")
+        self.attempts = attempts
+
+
+class SharedVectorCache(VectorCache):
+    _SCAN_ATTEMPTS = 3
+    _RETRY_DELAY_SECONDS = 0.002
+
+    def __init__(
+        self,
+        view: SharedVectorView,
+        metadata_source: MetadataSource,
+        scan_threads: int = 1,
+        scan_shard_size: int = 65536,
+    ) -> None:
+        super().__init__(
+            initial_capacity=1,
+            vector_dim=view.vector_dim,
+            scan_threads=scan_threads,
+            scan_shard_size=scan_shard_size,
+        )
+        self._view = view
+        self._metadata_source = metadata_source
+        self._synced_at = 0
+        self._layout = 0
+        self.sync()
+
+    def sync(self) -> None:
+        with self._lock:
+            layout = self._view.layout
+            state = self._view.poll()
+            if state is None:
+                return
+            ids, vectors, size = state
+            metadata, self._synced_at = self._metadata_source(self._synced_at)
+            self._vectors = vectors
+            self._capacity = len(vectors)
+            if self._attributes.capacity != self._capacity:
+                self._attributes.resize(self._capacity, min(self._size, self._capacity))
+            if layout != self._layout:
+                self._reload_rows(ids, size)
+                self._layout = layout
+            for row in range(self._size, size):
+                vector_id = int(ids[row])
+                self._id_to_index[vector_id] = row
+                self._ids.append(vector_id)
+                self._texts.append("")
+                self._attributes.set(row, None)
+            for vector_id, (text, attributes) in metadata.items():
+                idx = self._id_to_index.get(vector_id)
+                if idx is not None:
+                    self._texts[idx] = text
+                    self._attributes.set(idx, attributes)
+            if size != self._size:
+                logger.debug("Shared cache synced | size=%s -> %s", self._size, size)
+            self._size = size
+
+    def _reload_rows(self, ids: npt.NDArray[np.int64], size: int) -> None:
+        # Deletes moved rows in the writer: the row mapping is rebuilt from the shared ids.
+        metadata_by_id = {
+            vector_id: (text, self._attributes.get(row))
+            for row, (vector_id, text) in enumerate(zip(self._ids, self._texts, strict=True))
+        }
+        self._ids = ids[:size].tolist()
+        self._texts = [""] * size
+        self._id_to_index = {vector_id: row for row, vector_id in enumerate(self._ids)}
+        self._attributes.reset(self._capacity)
+        for row, vector_id in enumerate(self._ids):
+            text, attributes = metadata_by_id.get(vector_id, ("", None))
+            self._texts[row] = text
+            self._attributes.set(row, attributes)
+        logger.debug("Shared cache rows reloaded after deletes | size=%s", size)
+        self._size = size
+
+    def load_all(self, ids: list[int], texts: list[str], vectors: npt.NDArray[np.float32], copy: bool = True) -> None:
+        raise RuntimeError("SharedVectorCache is loaded by the writer process")
+
+    def add_or_update(
+        self,
+        vector_id: int,
+        text: str,
+        vector: npt.NDArray[np.float32],
+        attributes: ProductAttributes | None = None,
+    ) -> None:
+        self.sync()
+
+    def add_or_update_many(
+        self,
+        vector_ids: list[int],
+        texts: list[str],
+        vectors: npt.NDArray[np.float32],
+        attributes: list[ProductAttributes] | None = None,
+    ) -> None:
+        self.sync()
+
+    def set_attributes(self, attributes: dict[int, ProductAttributes]) -> None:
+        self.sync()
+
+    def delete_many(self, vector_ids: list[int]) -> None:
+        self.sync()
+
+    def search_vectors(
+        self,
+        query_vectors: npt.NDArray[np.float32],
+        top_k: int,
+        mode: str | None = None,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+        search_filter: SearchFilter | None = None,
+    ) -> tuple[npt.NDArray[np.float32], npt.NDArray[np.int32]]:
+        for attempt in range(self._SCAN_ATTEMPTS):
+            if attempt:
+                # Give the writer time to finish moving rows before the next scan.
+                time.sleep(self._RETRY_DELAY_SECONDS * attempt)
+            with self._lock:
+                layout = self._view.layout
+                self.sync()
+                result = super().search_vectors(
+                    query_vectors,
+                    top_k,
+                    mode=mode,
+                    nprobe=nprobe,
+                    ef_search=ef_search,
+                    search_filter=search_filter,
+                )
+                if layout % 2 == 0 and self._view.layout == layout:
+                    return result
+        # Every scan overlapped a delete in the writer: its result may mix ids and rows, so it is not served.
+        logger.warning("Shared scan overlapped row moves | attempts=%s", self._SCAN_ATTEMPTS)
+        raise SharedLayoutBusyError(self._SCAN_ATTEMPTS)
+
+    def count(self) -> int:
+        return self._view.size
+
+    def is_empty(self) -> bool:
+        return self._view.size == 0
@@ -0,0 +1,208 @@
+import logging
+import os
+import secrets
+import threading
+from dataclasses import dataclass
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import numpy.typing as npt
+
+logger = logging.getLogger(__name__)
+
+_CONTROL_SIZE = 128
+_NAME_OFFSET = 64
+_GENERATION, _SIZE, _CAPACITY, _DIM, _LAYOUT = range(5)
+
+
+@dataclass(frozen=True)
+class SharedStoreAddress:
+    control_name: str
+    writer_address: str
+    authkey: bytes
+
+    _ENV_CONTROL = "MATCHING_SERVICE_SHARED_CONTROL"
+    _ENV_WRITER = "MATCHING_SERVICE_WRITER_ADDRESS"
+    _ENV_AUTHKEY = "MATCHING_SERVICE_WRITER_AUTHKEY"
+
+    @classmethod
+    def from_env(cls) -> "SharedStoreAddress | None":
+        control_name = os.environ.get(cls._ENV_CONTROL)
+        if not control_name:
+            return None
+        return cls(
+            control_name=control_name,
+            writer_address=os.environ[cls._ENV_WRITER],
+            authkey=bytes.fromhex(os.environ[cls._ENV_AUTHKEY]),
+        )
+
+    def export_env(self) -> None:
+        os.environ[self._ENV_CONTROL] = self.control_name
+        os.environ[self._ENV_WRITER] = self.writer_address
+        os.environ[self._ENV_AUTHKEY] = self.authkey.hex()
+
+
+def _attach(name: str) -> SharedMemory:
+    # Spawned workers inherit the owner's resource tracker, where registering again is a no-op.
+    # A process with its own tracker would unlink the segment on exit, so it has to forget it.
+    shared_tracker = resource_tracker._resource_tracker._fd is not None  # type: ignore[attr-defined]
+    shm = SharedMemory(name=name)
+    if not shared_tracker:
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    return shm
+
+
+def _data_views(shm: SharedMemory, dim: int) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.float32]]:
+    capacity = shm.size // (8 + dim * 4)
+    ids = np.ndarray((capacity,), dtype=np.int64, buffer=shm.buf)
+    vectors = np.ndarray((capacity, dim), dtype=np.float32, buffer=shm.buf, offset=capacity * 8)
+    return ids, vectors
+
+
+class SharedVectorStore:
+    def __init__(self, vector_dim: int, capacity: int) -> None:
+        self._vector_dim = vector_dim
+        self._lock = threading.Lock()
+        self._control = SharedMemory(name=f"msvc_{secrets.token_hex(6)}", create=True, size=_CONTROL_SIZE)
+        self._header = np.ndarray((5,), dtype=np.int64, buffer=self._control.buf)
+        self._header[:] = 0
+        self._header[_DIM] = vector_dim
+        self._id_to_row: dict[int, int] = {}
+        self._data: SharedMemory | None = None
+        self._allocate(max(capacity, 1))
+        logger.info("Shared vector store created | control=%s | capacity=%s", self._control.name, f"{max(capacity, 1):,}")
+
+    @property
+    def control_name(self) -> str:
+        return self._control.name
+
+    def load(self, ids: list[int], vectors: npt.NDArray[np.float32]) -> None:
+        with self._lock:
+            if len(ids) > self._capacity:
+                self._allocate(len(ids))
+            self._ids[: len(ids)] = ids
+            if len(ids):
+                self._vectors[: len(ids)] = vectors
+            self._id_to_row = {vector_id: row for row, vector_id in enumerate(ids)}
+            self._publish(len(ids))
+
+    def write(self, vector_ids: list[int], vectors: npt.NDArray[np.float32]) -> None:
+        with self._lock:
+            size = int(self._header[_SIZE])
+            new_ids = {vector_id for vector_id in vector_ids if vector_id not in self._id_to_row}
+            if size + len(new_ids) > self._capacity:
+                self._allocate(max(self._capacity * 2, size + len(new_ids)), size)
+            for vector_id, vector in zip(vector_ids, vectors, strict=True):
+                row = self._id_to_row.get(vector_id)
+                if row is None:
+                    row = size
+                    size += 1
+                    self._id_to_row[vector_id] = row
+                    self._ids[row] = vector_id
+                self._vectors[row] = vector
+            self._publish(size)
+
+    def touch(self) -> None:
+        with self._lock:
+            self._publish(int(self._header[_SIZE]))
+
+    def delete(self, vector_ids: list[int]) -> None:
+        with self._lock:
+            rows = sorted({self._id_to_row.pop(vector_id) for vector_id in vector_ids if vector_id in self._id_to_row})
+            if not rows:
+                return
+            size = int(self._header[_SIZE])
+            deleted = np.array(rows, dtype=np.int64)
+            new_size = size - len(deleted)
+            holes = deleted[deleted < new_size]
+            sources = np.setdiff1d(np.arange(new_size, size), deleted)
+            # Odd layout counter while rows move: readers retry a scan that overlapped it.
+            self._header[_LAYOUT] += 1
+            self._ids[holes] = self._ids[sources]
+            self._vectors[holes] = self._vectors[sources]
+            for row in holes.tolist():
+                self._id_to_row[int(self._ids[row])] = row
+            self._publish(new_size)
+            self._header[_LAYOUT] += 1
+
+    def _allocate(self, capacity: int, keep_rows: int = 0) -> None:
+        data = SharedMemory(name=f"{self._control.name}_{secrets.token_hex(4)}", create=True, size=capacity * (8 + self._vector_dim * 4))
+        ids, vectors = _data_views(data, self._vector_dim)
+        if self._data is not None:
+            ids[:keep_rows] = self._ids[:keep_rows]
+            vectors[:keep_rows] = self._vectors[:keep_rows]
+            del self._ids, self._vectors
+            self._data.close()
+            self._data.unlink()
+        self._data = data
+        self._ids, self._vectors = ids, vectors
+        self._capacity = capacity
+        name = data.name.encode()
+        self._control.buf[_NAME_OFFSET : _NAME_OFFSET + len(name) + 1] = name + b"\0"
+        self._header[_CAPACITY] = capacity
+        logger.info("Shared vector segment allocated | name=%s | capacity=%s", data.name, f"{capacity:,}")
+
+    def _publish(self, size: int) -> None:
+        self._header[_SIZE] = size
+        self._header[_GENERATION] += 1
+
+    def close(self) -> None:
+        with self._lock:
+            del self._header, self._ids, self._vectors
+            for shm in (self._data, self._control):
+                if shm is not None:
+                    shm.close()
+                    shm.unlink()
+            self._data = None
+        logger.info("Shared vector store removed")
+
+
+class SharedVectorView:
+    def __init__(self, control_name: str) -> None:
+        self._control = _attach(control_name)
+        self._header = np.ndarray((5,), dtype=np.int64, buffer=self._control.buf)
+        self._generation = -1
+        self._data: SharedMemory | None = None
+        self._data_name = ""
+        self._retired: list[SharedMemory] = []
+
+    @property
+    def vector_dim(self) -> int:
+        return int(self._header[_DIM])
+
+    @property
+    def size(self) -> int:
+        return int(self._header[_SIZE])
+
+    @property
+    def layout(self) -> int:
+        return int(self._header[_LAYOUT])
+
+    def poll(self) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.float32], int] | None:
+        generation = int(self._header[_GENERATION])
+        if generation == self._generation:
+            return None
+        size = int(self._header[_SIZE])
+        name = bytes(self._control.buf[_NAME_OFFSET:_CONTROL_SIZE]).split(b"\0", 1)[0].decode()
+        if int(self._header[_GENERATION]) != generation:
+            return None
+        if name != self._data_name:
+            if self._data is not None:
+                self._retired.append(self._data)
+            self._data = _attach(name)
+            self._data_name = name
+        self._close_retired()
+        assert self._data is not None
+        ids, vectors = _data_views(self._data, self.vector_dim)
+        vectors.flags.writeable = False
+        self._generation = generation
+        return ids, vectors, size
+
+    def _close_retired(self) -> None:
+        for shm in list(self._retired):
+            try:
+                shm.close()
+            except BufferError:
+                continue
+            self._retired.remove(shm)
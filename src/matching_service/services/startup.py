@@ -0,0 +1,81 @@
+import logging
+import threading
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceNotReadyError(Exception):
+    def __init__(self, state: str) -> None:
+        super().__init__(f"Service is {state}")
+        self.state = state
+
+
+@dataclass(frozen=True)
+class StartupStatus:
+    state: str
+    error: str | None
+    elapsed_seconds: float
+    phases: dict[str, float]
+
+
+class StartupTracker:
+    STARTING = "starting"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._state = self.STARTING
+        self._error: str | None = None
+        self._started = time.perf_counter()
+        self._finished: float | None = None
+        self._phases: dict[str, float] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self._state == self.READY
+
+    @property
+    def failed(self) -> bool:
+        return self._state == self.FAILED
+
+    @contextmanager
+    def phase(self, name: str) -> Generator[None, None, None]:
+        started = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._phases[name] = elapsed
+        logger.info("Startup phase %s finished in %.2fs", name, elapsed)
+
+    def mark_ready(self) -> None:
+        with self._lock:
+            self._state = self.READY
+            self._finished = time.perf_counter()
+            phases = ", ".join(f"{name}={elapsed:.2f}s" for name, elapsed in self._phases.items())
+        logger.info("Service ready in %.2fs | %s", self._finished - self._started, phases)
+
+    def mark_failed(self, error: str) -> None:
+        with self._lock:
+            self._state = self.FAILED
+            self._error = error
+            self._finished = time.perf_counter()
+        logger.error("Service failed to start: %s", error)
+
+    def require_ready(self) -> None:
+        if self._state != self.READY:
+            raise ServiceNotReadyError(self._state)
+
+    def status(self) -> StartupStatus:
+        with self._lock:
+            finished = self._finished if self._finished is not None else time.perf_counter()
+            return StartupStatus(
+                state=self._state,
+                error=self._error,
+                elapsed_seconds=finished - self._started,
+                phases=dict(self._phases),
+            )
@@ -1,10 +1,24 @@
+from matching_service.services.usecases.batch_delete_usecase import batch_delete_usecase
+from matching_service.services.usecases.batch_search_usecase import batch_search_usecase
+from matching_service.services.usecases.batch_upsert_usecase import batch_upsert_usecase
+from matching_service.services.usecases.delete_usecase import delete_usecase
 from matching_service.services.usecases.health_usecase import health_usecase
+from matching_service.services.usecases.metrics_usecase import metrics_usecase
+from matching_service.services.usecases.readiness_usecase import readiness_usecase
 from matching_service.services.usecases.search_usecase import search_usecase
+from matching_service.services.usecases.stats_usecase import stats_usecase
 from matching_service.services.usecases.upsert_usecase import upsert_usecase
 
 __all__ = [
     "search_usecase",
+    "batch_search_usecase",
     "upsert_usecase",
+    "batch_upsert_usecase",
+    "delete_usecase",
+    "batch_delete_usecase",
     "health_usecase",
+    "readiness_usecase",
+    "metrics_usecase",
+    "stats_usecase",
 ]
 
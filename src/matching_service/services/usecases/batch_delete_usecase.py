@@ -0,0 +1,37 @@
+import logging
+
+from matching_service.api.schemas import BatchDeleteResponse
+from matching_service.services.executors import InstrumentedExecutor
+from matching_service.services.usecases.delete_usecase import build_delete_response, remove_rows
+from matching_service.services.vector_cache import VectorCache
+from matching_service.services.write_behind_queue import WriteBehindQueue
+from matching_service.storage.repositories import SqliteVectorRepository
+
+logger = logging.getLogger(__name__)
+
+
+async def batch_delete_usecase(
+    repository: SqliteVectorRepository,
+    cache: VectorCache,
+    io_executor: InstrumentedExecutor,
+    vector_ids: list[int],
+    max_batch_size: int,
+    write_queue: WriteBehindQueue | None = None,
+) -> BatchDeleteResponse:
+    if not vector_ids:
+        raise ValueError("Batch cannot be empty")
+    if len(vector_ids) > max_batch_size:
+        raise ValueError(f"Batch size must be <= {max_batch_size}")
+    if any(vector_id <= 0 for vector_id in vector_ids):
+        raise ValueError("ID must be positive")
+
+    deleted = await remove_rows(repository, cache, io_executor, vector_ids, write_queue)
+
+    responses = [build_delete_response(vector_id, vector_id in deleted) for vector_id in vector_ids]
+    logger.info("Batch delete | requested=%s | deleted=%s", len(vector_ids), len(deleted))
+    return BatchDeleteResponse(
+        status="ok",
+        deleted=len(deleted),
+        not_found=len(set(vector_ids) - deleted),
+        items=responses,
+    )
@@ -0,0 +1,126 @@
+import logging
+
+import numpy as np
+import numpy.typing as npt
+
+from matching_service.api.schemas import BatchSearchItem, BatchSearchQuery, BatchSearchResponse
+from matching_service.services.attribute_index import SearchFilter
+from matching_service.services.embedder import TextEmbedder
+from matching_service.services.executors import InstrumentedExecutor
+from matching_service.services.metrics import stage
+from matching_service.services.query_embedding_cache import QueryEmbeddingCache
+from matching_service.services.usecases.search_usecase import build_search_filter, build_search_results, resolve_top_k
+from matching_service.services.vector_cache import VectorCache
+
+logger = logging.getLogger(__name__)
+
+
+def _rank_batch(
+    cache: VectorCache,
+    query_embeddings: npt.NDArray[np.float32],
+    positions: list[int],
+    top_ks: list[int],
+    items: list[BatchSearchItem],
+    score_decimal_places: int,
+    mode: str | None,
+    nprobe: int | None,
+    ef_search: int | None,
+    search_filter: SearchFilter | None,
+) -> None:
+    with cache.pinned_rows():
+        with stage("cache_scan"):
+            scores, indices = cache.search_vectors(
+                query_embeddings,
+                max(top_ks),
+                mode=mode,
+                nprobe=nprobe,
+                ef_search=ef_search,
+                search_filter=search_filter,
+            )
+        with stage("metadata"):
+            for row, (position, top_k) in enumerate(zip(positions, top_ks, strict=True)):
+                try:
+                    results = build_search_results(cache, scores[row, :top_k], indices[row, :top_k], score_decimal_places)
+                except IndexError as e:
+                    items[position] = BatchSearchItem(error=str(e))
+                    continue
+                items[position] = BatchSearchItem(results=results)
+
+
+async def batch_search_usecase(
+    cache: VectorCache,
+    embedder: TextEmbedder,
+    query_cache: QueryEmbeddingCache,
+    inference_executor: InstrumentedExecutor,
+    io_executor: InstrumentedExecutor,
+    queries: list[BatchSearchQuery],
+    default_top_k: int,
+    max_top_k: int,
+    max_batch_size: int,
+    score_decimal_places: int,
+    embedding_batch_size: int,
+    mode: str | None = None,
+    nprobe: int | None = None,
+    ef_search: int | None = None,
+    category: str | None = None,
+    seller: str | None = None,
+    min_rating: float | None = None,
+    max_rating: float | None = None,
+) -> BatchSearchResponse:
+    if not queries:
+        raise ValueError("Batch cannot be empty")
+    if len(queries) > max_batch_size:
+        raise ValueError(f"Batch size must be <= {max_batch_size}")
+    search_filter = build_search_filter(category, seller, min_rating, max_rating)
+
+    items = [BatchSearchItem() for _ in queries]
+    positions: list[int] = []
+    texts: list[str] = []
+    top_ks: list[int] = []
+    for position, query in enumerate(queries):
+        try:
+            top_k = resolve_top_k(query.text, query.top_k, default_top_k, max_top_k)
+        except ValueError as e:
+            items[position] = BatchSearchItem(error=str(e))
+            continue
+        positions.append(position)
+        texts.append(query.text)
+        top_ks.append(top_k)
+
+    if texts and not cache.is_empty():
+        cached = [query_cache.get(text) for text in texts]
+        missing = [row for row, embedding in enumerate(cached) if embedding is None]
+        if missing:
+            computed: npt.NDArray = await inference_executor.run(
+                embedder.encode,
+                [texts[row] for row in missing],
+                batch_size=embedding_batch_size,
+                show_progress=False,
+            )
+            for row, embedding in zip(missing, computed, strict=True):
+                cached[row] = embedding
+                query_cache.put(texts[row], embedding)
+        query_embeddings = np.stack(cached)
+        await io_executor.run(
+            _rank_batch,
+            cache,
+            query_embeddings,
+            positions,
+            top_ks,
+            items,
+            score_decimal_places,
+            mode,
+            nprobe,
+            ef_search,
+            search_filter,
+        )
+
+    logger.info(
+        "Batch search | queries=%s | valid=%s | failed=%s | filtered=%s",
+        len(queries),
+        len(texts),
+        len(queries) - len(texts),
+        search_filter is not None,
+    )
+
+    return BatchSearchResponse(items=items)
@@ -0,0 +1,149 @@
+import logging
+
+import numpy.typing as npt
+
+from matching_service.api.schemas import BatchUpsertResponse, UpsertRequest, UpsertResponse
+from matching_service.catalog import ProductAttributes
+from matching_service.services.embedder import TextEmbedder
+from matching_service.services.executors import InstrumentedExecutor
+from matching_service.services.metrics import stage
+from matching_service.services.usecases.upsert_usecase import enqueue_rows, update_attributes_rows
+from matching_service.services.vector_cache import VectorCache
+from matching_service.services.write_behind_queue import WriteBehindQueue
+from matching_service.storage.repositories import SqliteVectorRepository
+
+logger = logging.getLogger(__name__)
+
+
+def _store_many(
+    repository: SqliteVectorRepository,
+    cache: VectorCache,
+    vector_ids: list[int],
+    texts: list[str],
+    embeddings: npt.NDArray,
+    attributes: list[ProductAttributes],
+) -> list[tuple[int, bool]]:
+    with stage("sqlite_upsert"):
+        results = repository.upsert_many(vector_ids, texts, embeddings, attributes)
+    cache.add_or_update_many(vector_ids, texts, embeddings, attributes)
+    return results
+
+
+async def batch_upsert_usecase(
+    repository: SqliteVectorRepository,
+    cache: VectorCache,
+    embedder: TextEmbedder,
+    inference_executor: InstrumentedExecutor,
+    io_executor: InstrumentedExecutor,
+    items: list[UpsertRequest],
+    max_batch_size: int,
+    embedding_batch_size: int,
+    write_queue: WriteBehindQueue | None = None,
+    durable: bool = False,
+) -> BatchUpsertResponse:
+    if not items:
+        raise ValueError("Batch cannot be empty")
+    if len(items) > max_batch_size:
+        raise ValueError(f"Batch size must be <= {max_batch_size}")
+
+    vector_ids = [item.id for item in items]
+    texts = [item.text for item in items]
+    attributes = [item.product_attributes() for item in items]
+    for vector_id, text in zip(vector_ids, texts, strict=True):
+        if not text.strip():
+            raise ValueError("Text cannot be empty")
+        if vector_id <= 0:
+            raise ValueError("ID must be positive")
+
+    find_unchanged = write_queue.find_unchanged if write_queue is not None else repository.find_unchanged
+    same_text, same_attributes = await io_executor.run(find_unchanged, vector_ids, texts, attributes)
+    unchanged_ids = same_text & same_attributes
+    # Only the attributes changed: the stored vector is still valid, so the model is not called.
+    attribute_ids = same_text - same_attributes
+    if attribute_ids:
+        await update_attributes_rows(
+            repository,
+            cache,
+            io_executor,
+            [vector_id for vector_id in vector_ids if vector_id in attribute_ids],
+            [
+                item_attributes
+                for vector_id, item_attributes in zip(vector_ids, attributes, strict=True)
+                if vector_id in attribute_ids
+            ],
+            write_queue,
+            durable,
+        )
+    changed_ids = [vector_id for vector_id in vector_ids if vector_id not in same_text]
+    changed_texts = [text for vector_id, text in zip(vector_ids, texts, strict=True) if vector_id not in same_text]
+    changed_attributes = [
+        item_attributes
+        for vector_id, item_attributes in zip(vector_ids, attributes, strict=True)
+        if vector_id not in same_text
+    ]
+
+    upsert_results: list[tuple[int, bool]] = []
+    if changed_ids:
+        embeddings: npt.NDArray = await inference_executor.run(
+            embedder.encode,
+            changed_texts,
+            batch_size=embedding_batch_size,
+            show_progress=False,
+        )
+        if write_queue is None:
+            upsert_results = await io_executor.run(
+                _store_many,
+                repository,
+                cache,
+                changed_ids,
+                changed_texts,
+                embeddings,
+                changed_attributes,
+            )
+        else:
+            is_new = await enqueue_rows(
+                write_queue,
+                cache,
+                io_executor,
+                changed_ids,
+                changed_texts,
+                embeddings,
+                changed_attributes,
+                durable,
+            )
+            upsert_results = list(zip(changed_ids, is_new, strict=True))
+
+    results_iter = iter(upsert_results)
+
+    responses = []
+    inserted = 0
+    updated = 0
+    for vector_id in vector_ids:
+        if vector_id in unchanged_ids:
+            action = "unchanged"
+        elif vector_id in attribute_ids:
+            action = "updated"
+            updated += 1
+        else:
+            _, is_new = next(results_iter)
+            action = "inserted" if is_new else "updated"
+            inserted += is_new
+            updated += not is_new
+        responses.append(
+            UpsertResponse(
+                id=vector_id,
+                status="ok",
+                action=action,
+                message=f"Upserted (ID: {vector_id}, {action})",
+            )
+        )
+
+    unchanged = len(items) - inserted - updated
+    logger.info("Batch upserted %s items (inserted=%s, updated=%s, unchanged=%s)", len(items), inserted, updated, unchanged)
+    return BatchUpsertResponse(
+        status="ok",
+        inserted=inserted,
+        updated=updated,
+        unchanged=unchanged,
+        items=responses,
+    )
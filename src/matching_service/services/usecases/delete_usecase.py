@@ -0,0 +1,59 @@
+import asyncio
+import logging
+
+from matching_service.api.schemas import DeleteResponse
+from matching_service.services.executors import InstrumentedExecutor
+from matching_service.services.metrics import stage
+from matching_service.services.vector_cache import VectorCache
+from matching_service.services.write_behind_queue import WriteBehindQueue
+from matching_service.storage.repositories import SqliteVectorRepository
+
+logger = logging.getLogger(__name__)
+
+
+def delete_rows(repository: SqliteVectorRepository, cache: VectorCache, vector_ids: list[int]) -> set[int]:
+    with stage("sqlite_delete"):
+        deleted = repository.delete_many(vector_ids)
+    cache.delete_many(deleted)
+    return set(deleted)
+
+
+async def remove_rows(
+    repository: SqliteVectorRepository,
+    cache: VectorCache,
+    io_executor: InstrumentedExecutor,
+    vector_ids: list[int],
+    write_queue: WriteBehindQueue | None,
+) -> set[int]:
+    if write_queue is None:
+        return await io_executor.run(delete_rows, repository, cache, vector_ids)
+    # Deletes go through the queue so they commit after earlier queued upserts of the same ids.
+    committed = await io_executor.run(write_queue.delete, cache, vector_ids)
+    with stage("sqlite_commit_wait"):
+        return set(await asyncio.wrap_future(committed))
+
+
+def build_delete_response(vector_id: int, deleted: bool) -> DeleteResponse:
+    action = "deleted" if deleted else "not_found"
+    return DeleteResponse(
+        id=vector_id,
+        status="ok",
+        action=action,
+        message=f"Deleted (ID: {vector_id})" if deleted else f"Not found (ID: {vector_id})",
+    )
+
+
+async def delete_usecase(
+    repository: SqliteVectorRepository,
+    cache: VectorCache,
+    io_executor: InstrumentedExecutor,
+    vector_id: int,
+    write_queue: WriteBehindQueue | None = None,
+) -> DeleteResponse:
+    if vector_id <= 0:
+        raise ValueError("ID must be positive")
+
+    deleted = await remove_rows(repository, cache, io_executor, [vector_id], write_queue)
+
+    logger.info("Delete ID: %s (%s)", vector_id, "deleted" if deleted else "not found")
+    return build_delete_response(vector_id, vector_id in deleted)
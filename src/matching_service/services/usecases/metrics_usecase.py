@@ -0,0 +1,65 @@
+from matching_service.services.embedding_batcher import EmbeddingBatcher
+from matching_service.services.executors import InstrumentedExecutor
+from matching_service.services.metrics import MetricFamily, render
+from matching_service.services.query_embedding_cache import QueryEmbeddingCache
+from matching_service.services.vector_cache import VectorCache
+from matching_service.services.write_behind_queue import WriteBehindQueue
+
+
+def metrics_usecase(
+    ready: bool,
+    batcher: EmbeddingBatcher | None,
+    query_cache: QueryEmbeddingCache,
+    cache: VectorCache | None,
+    executors: list[InstrumentedExecutor],
+    write_queue: WriteBehindQueue | None = None,
+) -> str:
+    families = [MetricFamily("matching_ready", "gauge", "1 once the model and vector cache are loaded", [({}, float(ready))])]
+    if cache is not None:
+        cache_stats = cache.stats()
+        families += [
+            MetricFamily("matching_vector_cache_size", "gauge", "Vectors held in the in-memory cache", [({}, cache_stats.size)]),
+            MetricFamily("matching_vector_cache_capacity", "gauge", "Allocated rows of the vector matrix", [({}, cache_stats.capacity)]),
+            MetricFamily("matching_vector_cache_memory_bytes", "gauge", "Bytes of the vector matrix", [({}, cache_stats.memory_bytes)]),
+        ]
+    query_cache_stats = query_cache.stats()
+    families += [
+        MetricFamily("matching_query_cache_entries", "gauge", "Query embeddings held in the LRU", [({}, query_cache_stats.entries)]),
+        MetricFamily("matching_query_cache_bytes", "gauge", "Bytes of cached query embeddings", [({}, query_cache_stats.bytes)]),
+        MetricFamily("matching_query_cache_hits_total", "counter", "Query embedding cache hits", [({}, query_cache_stats.hits)]),
+        MetricFamily("matching_query_cache_misses_total", "counter", "Query embedding cache misses", [({}, query_cache_stats.misses)]),
+        MetricFamily("matching_query_cache_evictions_total", "counter", "Query embedding cache evictions", [({}, query_cache_stats.evictions)]),
+    ]
+    if batcher is not None:
+        batcher_stats = batcher.stats()
+        families += [
+            MetricFamily("matching_batcher_queue_depth", "gauge", "Texts waiting for the embedding batcher", [({}, batcher_stats.queue_depth)]),
+            MetricFamily("matching_batcher_batches_total", "counter", "Batches sent to the embedder", [({}, batcher_stats.batches_total)]),
+            MetricFamily("matching_batcher_texts_total", "counter", "Texts sent to the embedder", [({}, batcher_stats.texts_total)]),
+        ]
+    if write_queue is not None:
+        write_queue_stats = write_queue.stats()
+        families += [
+            MetricFamily("matching_write_queue_depth", "gauge", "Rows waiting for a SQLite group commit", [({}, write_queue_stats.queue_depth)]),
+            MetricFamily("matching_write_queue_commits_total", "counter", "SQLite group commits", [({}, write_queue_stats.commits_total)]),
+            MetricFamily("matching_write_queue_rows_total", "counter", "Rows written by group commits", [({}, write_queue_stats.rows_total)]),
+            MetricFamily(
+                "matching_write_queue_failed_rows_total",
+                "counter",
+                "Rows of failed group commits",
+                [({}, write_queue_stats.failed_rows_total)],
+            ),
+        ]
+    executor_stats = [executor.stats() for executor in executors]
+    families += [
+        MetricFamily("matching_executor_queued", "gauge", "Tasks waiting for a thread", [({"executor": s.name}, s.queued) for s in executor_stats]),
+        MetricFamily("matching_executor_active", "gauge", "Tasks running on a thread", [({"executor": s.name}, s.active) for s in executor_stats]),
+        MetricFamily("matching_executor_tasks_total", "counter", "Completed tasks", [({"executor": s.name}, s.tasks_total) for s in executor_stats]),
+        MetricFamily(
+            "matching_executor_wait_seconds_total",
+            "counter",
+            "Time tasks spent queued for a thread",
+            [({"executor": s.name}, s.wait_seconds_total) for s in executor_stats],
+        ),
+    ]
+    return render(families)
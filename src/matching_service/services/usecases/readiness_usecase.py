@@ -0,0 +1,12 @@
+from matching_service.api.schemas import ReadinessResponse
+from matching_service.services.startup import StartupTracker
+
+
+def readiness_usecase(startup: StartupTracker) -> ReadinessResponse:
+    status = startup.status()
+    return ReadinessResponse(
+        status=status.state,
+        elapsed_seconds=round(status.elapsed_seconds, 3),
+        phases={name: round(elapsed, 3) for name, elapsed in status.phases.items()},
+        error=status.error,
+    )
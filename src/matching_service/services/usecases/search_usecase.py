@@ -1,45 +1,60 @@
 import logging
 
+import numpy as np
 import numpy.typing as npt
 
 from matching_service.api.schemas import SearchResultItem
-from matching_service.services.embedder import TextEmbedder
+from matching_service.catalog import parse_category_path
+from matching_service.services.attribute_index import SearchFilter
+from matching_service.services.embedding_batcher import EmbeddingBatcher
+from matching_service.services.executors import InstrumentedExecutor
+from matching_service.services.metrics import stage
+from matching_service.services.query_embedding_cache import QueryEmbeddingCache
 from matching_service.services.vector_cache import VectorCache
 
 logger = logging.getLogger(__name__)
 
 
-def search_usecase(
-    cache: VectorCache,
-    embedder: TextEmbedder,
-    text: str,
-    top_k: int | None,
-    default_top_k: int,
-    max_top_k: int,
-    score_decimal_places: int,
-    embedding_batch_size: int,
-) -> list[SearchResultItem]:
+def resolve_top_k(text: str, top_k: int | None, default_top_k: int, max_top_k: int) -> int:
     if not text.strip():
         raise ValueError("Query text cannot be empty")
+    if top_k is not None and top_k < 1:
+        raise ValueError("top_k must be >= 1")
 
     actual_top_k = top_k or default_top_k
     if actual_top_k > max_top_k:
         raise ValueError(f"top_k must be <= {max_top_k}")
+    return actual_top_k
 
-    if cache.is_empty():
-        logger.info("Search | len=%s | storage is empty | found=0", len(text))
-        return []
 
-    query_embedding: npt.NDArray = embedder.encode(
-        [text],
-        batch_size=embedding_batch_size,
-        show_progress=False,
-    )
+def build_search_filter(
+    category: str | None,
+    seller: str | None,
+    min_rating: float | None,
+    max_rating: float | None,
+) -> SearchFilter | None:
+    if min_rating is not None and max_rating is not None and min_rating > max_rating:
+        raise ValueError("min_rating must be <= max_rating")
+    category_path = parse_category_path(category)
+    if category is not None and not category_path:
+        raise ValueError("Category filter cannot be empty")
+    seller = seller.strip() if seller is not None else None
+    if seller == "":
+        raise ValueError("Seller filter cannot be empty")
+    search_filter = SearchFilter(category=category_path, seller=seller, min_rating=min_rating, max_rating=max_rating)
+    return None if search_filter.is_empty else search_filter
 
-    scores, indices = cache.search_vectors(query_embedding, actual_top_k)
 
+def build_search_results(
+    cache: VectorCache,
+    scores: npt.NDArray[np.float32],
+    indices: npt.NDArray[np.int32],
+    score_decimal_places: int,
+) -> list[SearchResultItem]:
     results = []
-    for score, idx in zip(scores[0], indices[0], strict=False):
+    for score, idx in zip(scores, indices, strict=False):
+        if idx < 0:
+            continue
         vector_id, vector_text = cache.get_metadata(int(idx))
         results.append(
             SearchResultItem(
@@ -48,13 +63,82 @@ def search_usecase(
                 text=vector_text,
             )
         )
+    return results
+
+
+def rank_query(
+    cache: VectorCache,
+    query_embedding: npt.NDArray[np.float32],
+    top_k: int,
+    score_decimal_places: int,
+    mode: str | None = None,
+    nprobe: int | None = None,
+    ef_search: int | None = None,
+    search_filter: SearchFilter | None = None,
+) -> list[SearchResultItem]:
+    with cache.pinned_rows():
+        with stage("cache_scan"):
+            scores, indices = cache.search_vectors(
+                query_embedding,
+                top_k,
+                mode=mode,
+                nprobe=nprobe,
+                ef_search=ef_search,
+                search_filter=search_filter,
+            )
+        with stage("metadata"):
+            return build_search_results(cache, scores[0], indices[0], score_decimal_places)
+
+
+async def search_usecase(
+    cache: VectorCache,
+    batcher: EmbeddingBatcher,
+    query_cache: QueryEmbeddingCache,
+    io_executor: InstrumentedExecutor,
+    text: str,
+    top_k: int | None,
+    default_top_k: int,
+    max_top_k: int,
+    score_decimal_places: int,
+    mode: str | None = None,
+    nprobe: int | None = None,
+    ef_search: int | None = None,
+    category: str | None = None,
+    seller: str | None = None,
+    min_rating: float | None = None,
+    max_rating: float | None = None,
+) -> list[SearchResultItem]:
+    actual_top_k = resolve_top_k(text, top_k, default_top_k, max_top_k)
+    search_filter = build_search_filter(category, seller, min_rating, max_rating)
+
+    if cache.is_empty():
+        logger.info("Search | len=%s | storage is empty | found=0", len(text))
+        return []
+
+    query_embedding: npt.NDArray | None = query_cache.get(text)
+    if query_embedding is None:
+        query_embedding = await batcher.encode_async(text)
+        query_cache.put(text, query_embedding)
+
+    results = await io_executor.run(
+        rank_query,
+        cache,
+        query_embedding,
+        actual_top_k,
+        score_decimal_places,
+        mode=mode,
+        nprobe=nprobe,
+        ef_search=ef_search,
+        search_filter=search_filter,
+    )
 
     logger.info(
-        "Search | len=%s | top_k=%s | found=%s",
+        "Search | len=%s | top_k=%s | mode=%s | filtered=%s | found=%s",
         len(text),
         actual_top_k,
+        mode or "default",
+        search_filter is not None,
         len(results),
     )
 
     return results
-
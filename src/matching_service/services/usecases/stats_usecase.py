@@ -0,0 +1,84 @@
+from matching_service.api.schemas import (
+    EmbeddingBatcherStats,
+    ExecutorStats,
+    QueryEmbeddingCacheStats,
+    StatsResponse,
+    VectorCacheStats,
+    WriteQueueStats,
+)
+from matching_service.services.embedding_batcher import EmbeddingBatcher
+from matching_service.services.executors import InstrumentedExecutor
+from matching_service.services.query_embedding_cache import QueryEmbeddingCache
+from matching_service.services.vector_cache import VectorCache
+from matching_service.services.write_behind_queue import WriteBehindQueue
+
+
+def stats_usecase(
+    batcher: EmbeddingBatcher,
+    query_cache: QueryEmbeddingCache,
+    cache: VectorCache,
+    executors: list[InstrumentedExecutor],
+    write_queue: WriteBehindQueue | None = None,
+) -> StatsResponse:
+    batcher_stats = batcher.stats()
+    executor_stats = [executor.stats() for executor in executors]
+    query_cache_stats = query_cache.stats()
+    cache_stats = cache.stats()
+    write_queue_stats = write_queue.stats() if write_queue is not None else None
+    return StatsResponse(
+        embedding_batcher=EmbeddingBatcherStats(
+            queue_depth=batcher_stats.queue_depth,
+            batches_total=batcher_stats.batches_total,
+            texts_total=batcher_stats.texts_total,
+            max_batch_size=batcher_stats.max_batch_size,
+            max_wait_ms=batcher_stats.max_wait_ms,
+            batch_size_histogram=batcher_stats.batch_size_histogram,
+            queue_wait_seconds_total=batcher_stats.queue_wait_seconds_total,
+            queue_wait_seconds_max=batcher_stats.queue_wait_seconds_max,
+        ),
+        executors={
+            stats.name: ExecutorStats(
+                max_workers=stats.max_workers,
+                queued=stats.queued,
+                active=stats.active,
+                tasks_total=stats.tasks_total,
+                wait_seconds_total=stats.wait_seconds_total,
+                wait_seconds_max=stats.wait_seconds_max,
+                run_seconds_total=stats.run_seconds_total,
+            )
+            for stats in executor_stats
+        },
+        query_cache=QueryEmbeddingCacheStats(
+            entries=query_cache_stats.entries,
+            bytes=query_cache_stats.bytes,
+            max_entries=query_cache_stats.max_entries,
+            max_bytes=query_cache_stats.max_bytes,
+            hits=query_cache_stats.hits,
+            misses=query_cache_stats.misses,
+            evictions=query_cache_stats.evictions,
+        ),
+        vector_cache=VectorCacheStats(
+            size=cache_stats.size,
+            capacity=cache_stats.capacity,
+            vector_dim=cache_stats.vector_dim,
+            storage_dtype=cache_stats.storage_dtype,
+            memory_bytes=cache_stats.memory_bytes,
+            recall_k=cache_stats.recall_k,
+            recall_at_k=cache_stats.recall_at_k,
+        ),
+        write_queue=WriteQueueStats(
+            queue_depth=write_queue_stats.queue_depth,
+            max_rows=write_queue_stats.max_rows,
+            batch_rows=write_queue_stats.batch_rows,
+            max_delay_ms=write_queue_stats.max_delay_ms,
+            commits_total=write_queue_stats.commits_total,
+            rows_total=write_queue_stats.rows_total,
+            failed_rows_total=write_queue_stats.failed_rows_total,
+            commit_rows_histogram=write_queue_stats.commit_rows_histogram,
+            commit_seconds_total=write_queue_stats.commit_seconds_total,
+            commit_seconds_max=write_queue_stats.commit_seconds_max,
+            submit_wait_seconds_total=write_queue_stats.submit_wait_seconds_total,
+        )
+        if write_queue_stats is not None
+        else None,
+    )
@@ -1,42 +1,151 @@
+import asyncio
 import logging
 
+import numpy as np
 import numpy.typing as npt
 
 from matching_service.api.schemas import UpsertResponse
-from matching_service.services.embedder import TextEmbedder
+from matching_service.catalog import ProductAttributes
+from matching_service.services.embedding_batcher import EmbeddingBatcher
+from matching_service.services.executors import InstrumentedExecutor
+from matching_service.services.metrics import stage
 from matching_service.services.vector_cache import VectorCache
+from matching_service.services.write_behind_queue import WriteBehindQueue
 from matching_service.storage.repositories import SqliteVectorRepository
 
 logger = logging.getLogger(__name__)
 
 
-def upsert_usecase(
+def _store(
     repository: SqliteVectorRepository,
     cache: VectorCache,
-    embedder: TextEmbedder,
     vector_id: int,
     text: str,
-    embedding_batch_size: int,
+    embedding: npt.NDArray,
+    attributes: ProductAttributes | None,
+) -> tuple[int, bool]:
+    with stage("sqlite_upsert"):
+        result_id, is_new = repository.upsert(vector_id, text, embedding, attributes)
+    cache.add_or_update(result_id, text, embedding, attributes)
+    return result_id, is_new
+
+
+def _store_attributes(
+    repository: SqliteVectorRepository,
+    cache: VectorCache,
+    vector_ids: list[int],
+    attributes: list[ProductAttributes],
+) -> None:
+    with stage("sqlite_upsert"):
+        repository.update_attributes(vector_ids, attributes)
+    cache.set_attributes(dict(zip(vector_ids, attributes, strict=True)))
+
+
+async def update_attributes_rows(
+    repository: SqliteVectorRepository,
+    cache: VectorCache,
+    io_executor: InstrumentedExecutor,
+    vector_ids: list[int],
+    attributes: list[ProductAttributes],
+    write_queue: WriteBehindQueue | None,
+    durable: bool,
+) -> None:
+    if write_queue is None:
+        await io_executor.run(_store_attributes, repository, cache, vector_ids, attributes)
+        return
+    with stage("write_queue"):
+        committed = await io_executor.run(write_queue.update_attributes, cache, vector_ids, attributes)
+    if durable:
+        with stage("sqlite_commit_wait"):
+            await asyncio.wrap_future(committed)
+
+
+async def enqueue_rows(
+    write_queue: WriteBehindQueue,
+    cache: VectorCache,
+    io_executor: InstrumentedExecutor,
+    vector_ids: list[int],
+    texts: list[str],
+    embeddings: npt.NDArray,
+    attributes: list[ProductAttributes],
+    durable: bool,
+) -> list[bool]:
+    with stage("write_queue"):
+        is_new, committed = await io_executor.run(write_queue.upsert, cache, vector_ids, texts, embeddings, attributes)
+    if durable:
+        with stage("sqlite_commit_wait"):
+            await asyncio.wrap_future(committed)
+    return is_new
+
+
+async def upsert_usecase(
+    repository: SqliteVectorRepository,
+    cache: VectorCache,
+    batcher: EmbeddingBatcher,
+    io_executor: InstrumentedExecutor,
+    vector_id: int,
+    text: str,
+    attributes: ProductAttributes | None = None,
+    write_queue: WriteBehindQueue | None = None,
+    durable: bool = False,
 ) -> UpsertResponse:
     if not text.strip():
         raise ValueError("Text cannot be empty")
     if vector_id <= 0:
         raise ValueError("ID must be positive")
 
-    embedding: npt.NDArray = embedder.encode(
-        [text], batch_size=embedding_batch_size, show_progress=False
-    )[0]
+    find_unchanged = write_queue.find_unchanged if write_queue is not None else repository.find_unchanged
+    same_text, same_attributes = await io_executor.run(find_unchanged, [vector_id], [text], [attributes])
+    if vector_id in same_text and vector_id in same_attributes:
+        logger.info("Upsert skipped, text and attributes unchanged: ID %s", vector_id)
+        return UpsertResponse(
+            id=vector_id,
+            status="ok",
+            action="unchanged",
+            message=f"Upserted (ID: {vector_id}, unchanged)",
+        )
+    if vector_id in same_text:
+        await update_attributes_rows(
+            repository,
+            cache,
+            io_executor,
+            [vector_id],
+            [attributes or ProductAttributes()],
+            write_queue,
+            durable,
+        )
+        logger.info("Upserted ID: %s (updated, attributes only)", vector_id)
+        return UpsertResponse(
+            id=vector_id,
+            status="ok",
+            action="updated",
+            message=f"Upserted (ID: {vector_id}, updated)",
+        )
 
-    result_id, is_new = repository.upsert(vector_id, text, embedding)
+    embedding: npt.NDArray = await batcher.encode_async(text)
+
+    if write_queue is None:
+        result_id, is_new = await io_executor.run(_store, repository, cache, vector_id, text, embedding, attributes)
+    else:
+        result_id = vector_id
+        [is_new] = await enqueue_rows(
+            write_queue,
+            cache,
+            io_executor,
+            [vector_id],
+            [text],
+            embedding[np.newaxis, :],
+            [attributes or ProductAttributes()],
+            durable,
+        )
     action = "inserted" if is_new else "updated"
     logger.debug("%s vector ID: %s", action.capitalize(), result_id)
 
-    cache.add_or_update(result_id, text, embedding)
-
     logger.info("Upserted ID: %s (%s)", result_id, action)
     return UpsertResponse(
         id=result_id,
         status="ok",
+        action=action,
         message=f"Upserted (ID: {result_id}, {action})",
     )
 
@@ -1,25 +1,106 @@
 import logging
 import threading
+from collections.abc import Callable, Generator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
 
 import numpy as np
 import numpy.typing as npt
 
+from matching_service.catalog import ProductAttributes
+from matching_service.services.attribute_index import AttributeIndex, SearchFilter
+from matching_service.services.hnsw_index import HNSWIndex
+from matching_service.services.ivf_index import IVFIndex
+from matching_service.services.scalar_quantizer import ScalarQuantizer
+
 logger = logging.getLogger(__name__)
 
+SEARCH_MODES = ("exact", "ivf", "hnsw")
+
+VectorSource = Callable[[list[int]], npt.NDArray[np.float32]]
+RowScorer = Callable[[int, int], npt.NDArray[np.float32]]
+
+
+@dataclass(frozen=True)
+class VectorCacheStats:
+    size: int
+    capacity: int
+    vector_dim: int
+    storage_dtype: str
+    memory_bytes: int
+    recall_k: int | None
+    recall_at_k: float | None
+
 
 class VectorCache:
-    def __init__(self, initial_capacity: int = 10000, vector_dim: int = 384) -> None:
+    # Gathering matching rows costs several times a sequential scan per row: wide filters scan and mask instead.
+    _FILTER_GATHER_RATIO = 0.2
+
+    def __init__(
+        self,
+        initial_capacity: int = 10000,
+        vector_dim: int = 384,
+        search_mode: str = "exact",
+        ivf_index: IVFIndex | None = None,
+        hnsw_index: HNSWIndex | None = None,
+        quantizer: ScalarQuantizer | None = None,
+        vector_source: VectorSource | None = None,
+        rerank_factor: int = 10,
+        shrink_threshold: float = 0.25,
+        scan_threads: int = 1,
+        scan_shard_size: int = 65536,
+    ) -> None:
+        if quantizer is not None and (ivf_index is not None or hnsw_index is not None):
+            raise ValueError("Quantized storage cannot be combined with IVF or HNSW indexes")
+        if quantizer is not None and vector_source is None:
+            raise ValueError("Quantized storage requires a vector_source for re-ranking")
+        if rerank_factor < 1:
+            raise ValueError("rerank_factor must be >= 1")
+        if not 0 <= shrink_threshold < 0.5:
+            raise ValueError("shrink_threshold must be in [0, 0.5)")
+        if scan_threads < 1:
+            raise ValueError("scan_threads must be >= 1")
+        if scan_shard_size < 1:
+            raise ValueError("scan_shard_size must be >= 1")
+        self._search_mode = search_mode
+        self._ivf = ivf_index
+        self._hnsw = hnsw_index
+        self._quantizer = quantizer
+        self._vector_source = vector_source
+        self._rerank_factor = rerank_factor
+        self._shrink_threshold = shrink_threshold
+        self._scan_shard_size = scan_shard_size
+        self._scan_pool = ThreadPoolExecutor(max_workers=scan_threads, thread_name_prefix="scan") if scan_threads > 1 else None
+        self._min_capacity = initial_capacity
+        self._storage_dtype = np.int8 if quantizer is not None else np.float32
+        self._recall: tuple[int, float] | None = None
+        self._validate_search_mode(search_mode)
         self._capacity = initial_capacity
         self._size = 0
         self._vector_dim = vector_dim
         self._ids: list[int] = []
         self._texts: list[str] = []
-        self._vectors = np.zeros((initial_capacity, vector_dim), dtype=np.float32)
+        self._vectors = np.zeros((initial_capacity, vector_dim), dtype=self._storage_dtype)
         self._id_to_index: dict[int, int] = {}
+        self._attributes = AttributeIndex(initial_capacity)
         self._lock = threading.RLock()
-        logger.debug("VectorCache initialized with capacity=%s, dim=%s", initial_capacity, vector_dim)
+        # Bumped whenever rows move or the cache is reloaded: a retrain started before that is discarded.
+        self._layout_version = 0
+        self._ivf_retrain: threading.Thread | None = None
+        # Rows written while a retrain is in flight, re-assigned in the retrained index before the swap.
+        self._ivf_dirty: set[int] = set()
+        self._pin = threading.local()
+        logger.debug(
+            "VectorCache initialized with capacity=%s, dim=%s, storage=%s, scan_threads=%s",
+            initial_capacity,
+            vector_dim,
+            np.dtype(self._storage_dtype).name,
+            scan_threads,
+        )
 
-    def load_all(self, ids: list[int], texts: list[str], vectors: npt.NDArray[np.float32]) -> None:
+    def load_all(self, ids: list[int], texts: list[str], vectors: npt.NDArray[np.float32], copy: bool = True) -> None:
         with self._lock:
             num_vectors = len(ids)
             if num_vectors == 0:
@@ -27,8 +108,16 @@ class VectorCache:
                 logger.debug("Cache loaded: 0 vectors (empty)")
                 return
             self._validate_vector_dimension(vectors)
-            self._ensure_capacity(num_vectors)
+            if self._quantizer is not None:
+                self._quantizer.train(vectors)
+            if not copy and self._quantizer is None:
+                self._vectors = vectors
+                self._capacity = len(vectors)
+            else:
+                self._ensure_capacity(num_vectors)
+            self._attributes.reset(self._capacity)
             self._populate_cache(ids, texts, vectors, num_vectors)
+            self._rebuild_indexes()
             logger.debug("Cache loaded: %s vectors", num_vectors)
 
     def _clear_cache(self) -> None:
@@ -36,6 +125,12 @@ class VectorCache:
         self._texts = []
         self._size = 0
         self._id_to_index = {}
+        self._attributes.reset(self._capacity)
+        self._layout_version += 1
+        if self._ivf is not None:
+            self._ivf.reset()
+        if self._hnsw is not None:
+            self._hnsw.reset()
 
     def _validate_vector_dimension(self, vectors: npt.NDArray[np.float32]) -> None:
         if vectors.shape[1] != self._vector_dim:
@@ -44,25 +139,34 @@ class VectorCache:
     def _ensure_capacity(self, required: int) -> None:
         if required > self._capacity:
             new_capacity = max(required, self._capacity * 2)
-            self._vectors = np.zeros((new_capacity, self._vector_dim), dtype=np.float32)
+            self._vectors = np.zeros((new_capacity, self._vector_dim), dtype=self._storage_dtype)
             self._capacity = new_capacity
             logger.debug("Cache expanded to capacity=%s", new_capacity)
 
     def _populate_cache(self, ids: list[int], texts: list[str], vectors: npt.NDArray[np.float32], num_vectors: int) -> None:
         self._ids = ids.copy()
         self._texts = texts.copy()
-        self._vectors[:num_vectors] = vectors
+        if self._vectors is not vectors:
+            self._vectors[:num_vectors] = self._encode(vectors)
         self._size = num_vectors
         self._id_to_index = {vector_id: idx for idx, vector_id in enumerate(ids)}
 
-    def add_or_update(self, vector_id: int, text: str, vector: npt.NDArray[np.float32]) -> None:
+    def add_or_update(
+        self,
+        vector_id: int,
+        text: str,
+        vector: npt.NDArray[np.float32],
+        attributes: ProductAttributes | None = None,
+    ) -> None:
         if len(vector) != self._vector_dim:
             raise ValueError(f"Vector dimension mismatch: expected {self._vector_dim}, got {len(vector)}")
         with self._lock:
             if vector_id in self._id_to_index:
                 idx = self._id_to_index[vector_id]
                 self._texts[idx] = text
-                self._vectors[idx] = vector
+                self._vectors[idx] = self._encode(vector)
+                self._attributes.set(idx, attributes)
+                self._index_row(idx, is_new=False)
                 logger.debug("Cache updated: ID=%s", vector_id)
             else:
                 if self._size >= self._capacity:
@@ -71,33 +175,444 @@ class VectorCache:
                 self._id_to_index[vector_id] = idx
                 self._ids.append(vector_id)
                 self._texts.append(text)
-                self._vectors[idx] = vector
+                self._vectors[idx] = self._encode(vector)
+                self._attributes.set(idx, attributes)
                 self._size += 1
+                self._index_row(idx, is_new=True)
                 logger.debug("Cache added: ID=%s (size=%s/%s)", vector_id, self._size, self._capacity)
 
-    def _expand(self) -> None:
-        new_capacity = self._capacity * 2
-        new_vectors = np.zeros((new_capacity, self._vector_dim), dtype=np.float32)
+    def add_or_update_many(
+        self,
+        vector_ids: list[int],
+        texts: list[str],
+        vectors: npt.NDArray[np.float32],
+        attributes: list[ProductAttributes] | None = None,
+    ) -> None:
+        if len(vector_ids) == 0:
+            return
+        self._validate_vector_dimension(vectors)
+        with self._lock:
+            new_ids = {vector_id for vector_id in vector_ids if vector_id not in self._id_to_index}
+            if self._size + len(new_ids) > self._capacity:
+                self._expand(self._size + len(new_ids))
+            items = zip(vector_ids, texts, vectors, attributes or [None] * len(vector_ids), strict=True)
+            for vector_id, text, vector, item_attributes in items:
+                idx = self._id_to_index.get(vector_id)
+                is_new = idx is None
+                if idx is None:
+                    idx = self._size
+                    self._id_to_index[vector_id] = idx
+                    self._ids.append(vector_id)
+                    self._texts.append(text)
+                    self._size += 1
+                else:
+                    self._texts[idx] = text
+                self._vectors[idx] = self._encode(vector)
+                self._attributes.set(idx, item_attributes)
+                self._index_row(idx, is_new=is_new)
+            logger.debug("Cache bulk upserted %s vectors (size=%s/%s)", len(vector_ids), self._size, self._capacity)
+
+    def set_attributes(self, attributes: dict[int, ProductAttributes]) -> None:
+        with self._lock:
+            for vector_id, item_attributes in attributes.items():
+                idx = self._id_to_index.get(vector_id)
+                if idx is not None:
+                    self._attributes.set(idx, item_attributes)
+            logger.debug("Cache attributes set for %s vectors", len(attributes))
+
+    def delete_many(self, vector_ids: list[int]) -> None:
+        with self._lock:
+            rows = {self._id_to_index.pop(vector_id) for vector_id in vector_ids if vector_id in self._id_to_index}
+            if not rows:
+                return
+            # Swap-remove: the last live rows fill the holes, so only len(rows) rows move.
+            deleted = np.array(sorted(rows), dtype=np.int64)
+            new_size = self._size - len(deleted)
+            holes = deleted[deleted < new_size]
+            sources = np.setdiff1d(np.arange(new_size, self._size), deleted)
+            self._layout_version += 1
+            if self._hnsw is not None and self._hnsw.is_built:
+                self._hnsw.remove_rows(deleted, sources, holes, self._vectors)
+            if self._ivf is not None and self._ivf.is_trained:
+                self._ivf.remove_rows(deleted, sources, holes)
+            self._vectors[holes] = self._vectors[sources]
+            self._attributes.move(holes, sources)
+            for hole, source in zip(holes.tolist(), sources.tolist(), strict=True):
+                vector_id = self._ids[source]
+                self._ids[hole] = vector_id
+                self._texts[hole] = self._texts[source]
+                self._id_to_index[vector_id] = hole
+            del self._ids[new_size:]
+            del self._texts[new_size:]
+            self._size = new_size
+            self._shrink()
+            logger.debug("Cache deleted %s vectors (size=%s/%s)", len(deleted), self._size, self._capacity)
+
+    def _shrink(self) -> None:
+        if self._capacity <= self._min_capacity or self._size >= self._capacity * self._shrink_threshold:
+            return
+        new_capacity = max(self._size * 2, self._min_capacity)
+        new_vectors = np.zeros((new_capacity, self._vector_dim), dtype=self._storage_dtype)
+        new_vectors[: self._size] = self._vectors[: self._size]
+        self._vectors = new_vectors
+        self._capacity = new_capacity
+        self._attributes.resize(new_capacity, self._size)
+        logger.info("Cache shrunk to capacity=%s", new_capacity)
+
+    def _expand(self, required: int = 0) -> None:
+        new_capacity = max(self._capacity * 2, required)
+        new_vectors = np.zeros((new_capacity, self._vector_dim), dtype=self._storage_dtype)
         new_vectors[:self._size] = self._vectors[:self._size]
         self._vectors = new_vectors
         self._capacity = new_capacity
+        self._attributes.resize(new_capacity, self._size)
         logger.info("Cache expanded to capacity=%s", new_capacity)
 
-    def search_vectors(self, query_vector: npt.NDArray[np.float32], top_k: int) -> tuple[npt.NDArray[np.float32], npt.NDArray[np.int32]]:
+    def _encode(self, vectors: npt.NDArray[np.float32]) -> npt.NDArray:
+        if self._quantizer is None:
+            return vectors
+        return self._quantizer.encode(vectors)
+
+    def _rebuild_indexes(self) -> None:
+        self._layout_version += 1
+        if self._hnsw is not None:
+            self._hnsw.reset()
+        if self._ivf is None:
+            return
+        self._ivf.reset()
+        if self._ivf.can_train(self._size):
+            self._ivf.train(self._vectors[:self._size])
+        else:
+            logger.info("IVF index not trained yet: %s vectors < nlist=%s, exact search is used", self._size, self._ivf.nlist)
+
+    def _index_row(self, idx: int, is_new: bool) -> None:
+        if self._hnsw is not None and self._hnsw.is_built:
+            if is_new:
+                self._hnsw.add(idx, self._vectors)
+            else:
+                self._hnsw.update(idx, self._vectors)
+        if self._ivf is None:
+            return
+        if not self._ivf.is_trained:
+            if self._ivf.can_train(self._size):
+                self._ivf.train(self._vectors[:self._size])
+            return
+        if is_new:
+            self._ivf.add(idx, self._vectors[idx])
+        else:
+            self._ivf.update(idx, self._vectors[idx])
+        if self._ivf_retrain is not None:
+            self._ivf_dirty.add(idx)
+        elif is_new and self._ivf.needs_retrain(self._size):
+            self._start_ivf_retrain()
+
+    def _start_ivf_retrain(self) -> None:
+        # k-means over the whole catalog must not hold the lock: the retrain reads a view of the current rows,
+        # the old index keeps serving until the retrained one is swapped in.
+        # Rows written meanwhile are re-assigned at the swap, so the view may see them half-written.
+        self._ivf_dirty = set()
+        self._ivf_retrain = threading.Thread(
+            target=self._retrain_ivf,
+            args=(self._ivf, self._vectors[:self._size], self._layout_version),
+            name="ivf-retrain",
+            daemon=True,
+        )
+        self._ivf_retrain.start()
+
+    def _retrain_ivf(self, ivf: IVFIndex, vectors: npt.NDArray[np.float32], layout_version: int) -> None:
+        retrained = None
+        try:
+            retrained = ivf.trained_copy(vectors)
+        except Exception:
+            logger.exception("IVF retrain failed | vectors=%s", len(vectors))
+        with self._lock:
+            self._ivf_retrain = None
+            dirty, self._ivf_dirty = self._ivf_dirty, set()
+            if retrained is None:
+                return
+            if layout_version != self._layout_version:
+                logger.info("IVF retrain discarded: rows moved while training | vectors=%s", len(vectors))
+                return
+            for row in sorted(dirty):
+                if row < len(vectors):
+                    retrained.update(row, self._vectors[row])
+                else:
+                    retrained.add(row, self._vectors[row])
+            self._ivf = retrained
+            logger.debug("IVF retrain swapped in | vectors=%s | rows_written_meanwhile=%s", len(vectors), len(dirty))
+
+    def prepare_hnsw(self, path: Path | None, watermark: tuple[int, int]) -> None:
+        if self._hnsw is None:
+            return
         with self._lock:
-            if self._size == 0:
-                empty_scores = np.array([], dtype=np.float32).reshape(1, 0)
-                empty_indices = np.array([], dtype=np.int32).reshape(1, 0)
+            if path is not None and self._hnsw.load(path, self._id_to_index, watermark):
+                return
+            self._hnsw.build(self._vectors[:self._size])
+
+    def save_hnsw(self, path: Path, watermark: tuple[int, int]) -> None:
+        if self._hnsw is None:
+            return
+        with self._lock:
+            if self._hnsw.is_built:
+                self._hnsw.save(path, self._ids, watermark)
+
+    def _validate_search_mode(self, mode: str) -> None:
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Search mode must be one of: {', '.join(SEARCH_MODES)}")
+        if mode == "ivf" and self._ivf is None:
+            raise ValueError("IVF index is not enabled (set CACHE_IVF_NLIST > 0)")
+        if mode == "hnsw" and self._hnsw is None:
+            raise ValueError("HNSW index is not enabled (set CACHE_HNSW_ENABLED=true)")
+
+    def search_vectors(
+        self,
+        query_vectors: npt.NDArray[np.float32],
+        top_k: int,
+        mode: str | None = None,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+        search_filter: SearchFilter | None = None,
+    ) -> tuple[npt.NDArray[np.float32], npt.NDArray[np.int32]]:
+        actual_mode = mode or self._search_mode
+        self._validate_search_mode(actual_mode)
+        if nprobe is not None and nprobe < 1:
+            raise ValueError("nprobe must be >= 1")
+        if ef_search is not None and ef_search < 1:
+            raise ValueError("ef_search must be >= 1")
+        queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        with self._lock:
+            if self._quantizer is None:
+                self._pin_rows()
+            mask = None
+            matched = self._size
+            if search_filter is not None and not search_filter.is_empty and self._size > 0:
+                mask = self._attributes.mask(self._size, search_filter)
+                matched = int(np.count_nonzero(mask))
+            if matched == 0:
+                empty_scores = np.empty((queries.shape[0], 0), dtype=np.float32)
+                empty_indices = np.empty((queries.shape[0], 0), dtype=np.int32)
                 return empty_scores, empty_indices
-            corpus_vectors = self._vectors[:self._size]
-            sims: npt.NDArray[np.float32] = query_vector @ corpus_vectors.T
-            if sims.ndim == 1:
-                sims = sims.reshape(1, -1)
-            actual_k = min(top_k, self._size)
-            idx: npt.NDArray[np.int32] = np.argsort(-sims, axis=1)[:, :actual_k].astype(np.int32)
-            batch_indices: npt.NDArray[np.int32] = np.arange(sims.shape[0], dtype=np.int32)[:, np.newaxis]
-            scores: npt.NDArray[np.float32] = sims[batch_indices, idx]
-            return scores, idx
+            actual_k = min(top_k, matched)
+            if actual_mode == "ivf" and self._ivf is not None and self._ivf.is_trained:
+                return self._search_ivf(queries, actual_k, nprobe, mask)
+            # The graph walk cannot skip filtered nodes, filtered queries scan the matching rows instead.
+            if actual_mode == "hnsw" and self._hnsw is not None and self._hnsw.is_built and mask is None:
+                return self._search_hnsw(queries, actual_k, ef_search)
+            if self._quantizer is None:
+                return self._search_float(queries, actual_k, mask, matched)
+            vector_ids, positions = self._shortlist_quantized(queries, actual_k, np.flatnonzero(mask) if mask is not None else None)
+        # Re-rank vectors are read from SQLite without the lock: writers and other searches go on meanwhile.
+        exact_vectors = self._read_rerank_vectors(vector_ids)
+        with self._lock:
+            self._pin_rows()
+            return self._rerank(queries, actual_k, vector_ids, exact_vectors, positions)
+
+    def _search_float(
+        self,
+        queries: npt.NDArray[np.float32],
+        actual_k: int,
+        mask: npt.NDArray[np.bool_] | None,
+        matched: int,
+    ) -> tuple[npt.NDArray[np.float32], npt.NDArray[np.int32]]:
+        if mask is not None and matched <= self._size * self._FILTER_GATHER_RATIO:
+            rows = np.flatnonzero(mask)
+            top_scores, top_local = self._select_top_k(queries @ self._vectors[rows].T, actual_k)
+            return top_scores, rows[top_local].astype(np.int32)
+        return self._scan_top_k(lambda start, stop: queries @ self._vectors[start:stop].T, actual_k, mask)
+
+    def _scan_top_k(
+        self,
+        score_rows: RowScorer,
+        k: int,
+        mask: npt.NDArray[np.bool_] | None = None,
+    ) -> tuple[npt.NDArray[np.float32], npt.NDArray[np.int32]]:
+        if self._scan_pool is None or self._size <= self._scan_shard_size:
+            return self._scan_shard(score_rows, 0, self._size, k, mask)
+        # Shards are row ranges of the one matrix: each is scored and cut to k in the pool
+        # (BLAS and argpartition release the GIL), then only shards * k candidates are merged.
+        starts = range(0, self._size, self._scan_shard_size)
+        shards = list(
+            self._scan_pool.map(
+                lambda start: self._scan_shard(score_rows, start, min(start + self._scan_shard_size, self._size), k, mask),
+                starts,
+            )
+        )
+        scores = np.concatenate([shard_scores for shard_scores, _ in shards], axis=1)
+        rows = np.concatenate([shard_rows for _, shard_rows in shards], axis=1)
+        top_scores, order = self._select_top_k(scores, k)
+        return top_scores, np.take_along_axis(rows, order, axis=1)
+
+    def _scan_shard(
+        self,
+        score_rows: RowScorer,
+        start: int,
+        stop: int,
+        k: int,
+        mask: npt.NDArray[np.bool_] | None,
+    ) -> tuple[npt.NDArray[np.float32], npt.NDArray[np.int32]]:
+        sims = score_rows(start, stop)
+        if mask is not None:
+            np.copyto(sims, np.float32(-np.inf), where=~mask[start:stop])
+        top_scores, top_rows = self._select_top_k(sims, min(k, stop - start))
+        if start:
+            top_rows += start
+        return top_scores, top_rows
+
+    def _search_ivf(
+        self,
+        queries: npt.NDArray[np.float32],
+        k: int,
+        nprobe: int | None,
+        mask: npt.NDArray[np.bool_] | None = None,
+    ) -> tuple[npt.NDArray[np.float32], npt.NDArray[np.int32]]:
+        assert self._ivf is not None
+        scores = np.full((queries.shape[0], k), -np.inf, dtype=np.float32)
+        indices = np.full((queries.shape[0], k), -1, dtype=np.int32)
+        probes = self._ivf.probe(queries, nprobe)
+        for query_idx, query in enumerate(queries):
+            rows = self._ivf.rows_in_lists(probes[query_idx])
+            if mask is not None:
+                rows = rows[mask[rows]]
+            if rows.size == 0:
+                continue
+            sims = self._vectors[rows] @ query
+            found = min(k, rows.size)
+            top_scores, top_local = self._select_top_k(sims[np.newaxis, :], found)
+            scores[query_idx, :found] = top_scores[0]
+            indices[query_idx, :found] = rows[top_local[0]]
+        return scores, indices
+
+    def _search_hnsw(
+        self,
+        queries: npt.NDArray[np.float32],
+        k: int,
+        ef_search: int | None,
+    ) -> tuple[npt.NDArray[np.float32], npt.NDArray[np.int32]]:
+        assert self._hnsw is not None
+        scores = np.full((queries.shape[0], k), -np.inf, dtype=np.float32)
+        indices = np.full((queries.shape[0], k), -1, dtype=np.int32)
+        for query_idx, query in enumerate(queries):
+            top_scores, rows = self._hnsw.search(query, k, self._vectors, ef_search)
+            scores[query_idx, : len(rows)] = top_scores
+            indices[query_idx, : len(rows)] = rows
+        return scores, indices
+
+    def _shortlist_quantized(
+        self,
+        queries: npt.NDArray[np.float32],
+        k: int,
+        candidate_rows: npt.NDArray[np.int64] | None = None,
+    ) -> tuple[list[int], npt.NDArray[np.int64]]:
+        quantizer = self._quantizer
+        assert quantizer is not None
+        if candidate_rows is None:
+            shortlist_size = min(self._size, k * self._rerank_factor)
+            _, shortlist = self._scan_top_k(lambda start, stop: quantizer.scores(self._vectors[start:stop], queries), shortlist_size)
+        else:
+            approx_sims = quantizer.scores(self._vectors[candidate_rows], queries)
+            _, shortlist = self._select_top_k(approx_sims, min(len(candidate_rows), k * self._rerank_factor))
+            shortlist = candidate_rows[shortlist].astype(np.int32)
+        rows = np.unique(shortlist)
+        return [self._ids[row] for row in rows], np.searchsorted(rows, shortlist)
+
+    def _read_rerank_vectors(self, vector_ids: list[int]) -> npt.NDArray[np.float32]:
+        assert self._vector_source is not None
+        try:
+            return self._vector_source(vector_ids)
+        except RuntimeError:
+            with self._lock:
+                live = [vector_id for vector_id in vector_ids if vector_id in self._id_to_index]
+            if len(live) == len(vector_ids):
+                raise
+        # A candidate was deleted while the vectors were read: it is dropped at the re-rank, the rest is read again.
+        vectors = np.zeros((len(vector_ids), self._vector_dim), dtype=np.float32)
+        if live:
+            position = {vector_id: i for i, vector_id in enumerate(vector_ids)}
+            vectors[[position[vector_id] for vector_id in live]] = self._vector_source(live)
+        return vectors
+
+    def _rerank(
+        self,
+        queries: npt.NDArray[np.float32],
+        k: int,
+        vector_ids: list[int],
+        exact_vectors: npt.NDArray[np.float32],
+        positions: npt.NDArray[np.int64],
+    ) -> tuple[npt.NDArray[np.float32], npt.NDArray[np.int32]]:
+        # Rows may have moved or been deleted while the lock was released: candidates are matched by id.
+        rows = np.array([self._id_to_index.get(vector_id, -1) for vector_id in vector_ids], dtype=np.int32)
+        candidate_rows = rows[positions]
+        exact_sims = np.einsum("qsd,qd->qs", exact_vectors[positions], queries)
+        np.copyto(exact_sims, np.float32(-np.inf), where=candidate_rows < 0)
+        scores, order = self._select_top_k(exact_sims, k)
+        indices = np.take_along_axis(candidate_rows, order, axis=1)
+        return scores, indices
+
+    def estimate_recall(self, num_queries: int, k: int = 10, sample_size: int = 20000, seed: int = 0) -> float | None:
+        if self._quantizer is None or num_queries < 1:
+            return None
+        rng = np.random.default_rng(seed)
+        with self._lock:
+            if self._size <= k:
+                return None
+            rows = np.sort(rng.choice(self._size, size=min(sample_size, self._size), replace=False))
+            vector_ids = [self._ids[row] for row in rows]
+            codes = self._vectors[rows]
+        exact_vectors = self._read_rerank_vectors(vector_ids)
+        queries = exact_vectors[rng.choice(len(rows), size=min(num_queries, len(rows)), replace=False)]
+        _, truth = self._select_top_k(queries @ exact_vectors.T, k)
+        approx_sims = self._quantizer.scores(codes, queries)
+        _, shortlist = self._select_top_k(approx_sims, min(len(rows), k * self._rerank_factor))
+        exact_sims = np.einsum("qsd,qd->qs", exact_vectors[shortlist], queries)
+        _, order = self._select_top_k(exact_sims, k)
+        found = np.take_along_axis(shortlist, order, axis=1)
+        hits = sum(len(set(expected) & set(actual)) for expected, actual in zip(truth.tolist(), found.tolist(), strict=True))
+        recall = hits / truth.size
+        self._recall = (k, recall)
+        logger.info(
+            "Quantized recall estimate | recall@%s=%.4f | queries=%s | sample=%s | rerank_factor=%s",
+            k,
+            recall,
+            len(queries),
+            len(rows),
+            self._rerank_factor,
+        )
+        return recall
+
+    @staticmethod
+    def _select_top_k(sims: npt.NDArray[np.float32], k: int) -> tuple[npt.NDArray[np.float32], npt.NDArray[np.int32]]:
+        kth = sims.shape[1] - k
+        candidates = np.argpartition(sims, kth, axis=1)[:, kth:]
+        candidate_scores = np.take_along_axis(sims, candidates, axis=1)
+        order = np.argsort(candidate_scores, axis=1)[:, ::-1]
+        idx: npt.NDArray[np.int32] = np.take_along_axis(candidates, order, axis=1).astype(np.int32)
+        scores: npt.NDArray[np.float32] = np.take_along_axis(candidate_scores, order, axis=1)
+        return scores, idx
+
+    @contextmanager
+    def pinned_rows(self) -> Generator[None, None, None]:
+        # Deletes move rows: indices returned by search_vectors are resolved before it is released.
+        # The search takes the lock for the pin once its rows are final, so the quantized re-rank
+        # reads SQLite without it.
+        pin = self._pin
+        if getattr(pin, "active", False):
+            yield
+            return
+        pin.active = True
+        pin.locked = False
+        try:
+            yield
+        finally:
+            pin.active = False
+            if pin.locked:
+                pin.locked = False
+                self._lock.release()
+
+    def _pin_rows(self) -> None:
+        pin = self._pin
+        if getattr(pin, "active", False) and not pin.locked:
+            self._lock.acquire()
+            pin.locked = True
 
     def get_metadata(self, idx: int) -> tuple[int, str]:
         with self._lock:
@@ -105,11 +620,36 @@ class VectorCache:
                 raise IndexError(f"Index {idx} out of range (size={self._size})")
             return self._ids[idx], self._texts[idx]
 
-    def is_empty(self) -> bool:
+    def export_vectors(self) -> tuple[list[int], npt.NDArray[np.float32]]:
+        if self._quantizer is not None:
+            raise RuntimeError("Cannot export vectors from a quantized cache")
         with self._lock:
-            return self._size == 0
+            return list(self._ids), self._vectors[: self._size]
+
+    def is_empty(self) -> bool:
+        return self._size == 0
+
+    def close(self) -> None:
+        retrain = self._ivf_retrain
+        if retrain is not None:
+            retrain.join()
+        if self._scan_pool is not None:
+            self._scan_pool.shutdown(wait=True)
 
     def count(self) -> int:
-        with self._lock:
-            return self._size
+        return self._size
+
+    def contains(self, vector_id: int) -> bool:
+        return vector_id in self._id_to_index
 
+    def stats(self) -> VectorCacheStats:
+        with self._lock:
+            return VectorCacheStats(
+                size=self._size,
+                capacity=self._capacity,
+                vector_dim=self._vector_dim,
+                storage_dtype=self._vectors.dtype.name,
+                memory_bytes=int(self._vectors.nbytes) + self._attributes.nbytes,
+                recall_k=self._recall[0] if self._recall else None,
+                recall_at_k=self._recall[1] if self._recall else None,
+            )
@@ -0,0 +1,339 @@
+import logging
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from matching_service.catalog import ProductAttributes
+from matching_service.services.metrics import WRITE_COMMIT_ROWS, record_stage
+from matching_service.services.vector_cache import VectorCache
+from matching_service.storage.repositories import SqliteVectorRepository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class WriteQueueStats:
+    queue_depth: int
+    max_rows: int
+    batch_rows: int
+    max_delay_ms: float
+    commits_total: int
+    rows_total: int
+    failed_rows_total: int
+    commit_rows_histogram: dict[int, int]
+    commit_seconds_total: float
+    commit_seconds_max: float
+    submit_wait_seconds_total: float
+
+
+def _resolve(future: Future, result: object, error: Exception | None) -> None:
+    # A waiter that gave up (e.g. the client disconnected) has cancelled its future; the rows are committed anyway.
+    if not future.set_running_or_notify_cancel():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+@dataclass
+class _PendingWrite:
+    op: str
+    cache: VectorCache
+    vector_ids: list[int]
+    texts: list[str]
+    vectors: npt.NDArray[np.float32] | None
+    attributes: list[ProductAttributes]
+    future: Future
+    enqueued: float
+
+
+class WriteBehindQueue:
+    # A locked database or a busy disk usually clears up: a group is retried before its writes are given up.
+    _COMMIT_ATTEMPTS = 3
+    _RETRY_DELAY_SECONDS = 0.05
+
+    def __init__(
+        self,
+        repository: SqliteVectorRepository,
+        max_rows: int = 10000,
+        batch_rows: int = 500,
+        max_delay_ms: float = 10.0,
+    ) -> None:
+        if max_rows < 1:
+            raise ValueError("max_rows must be >= 1")
+        if batch_rows < 1:
+            raise ValueError("batch_rows must be >= 1")
+        if max_delay_ms < 0:
+            raise ValueError("max_delay_ms must be >= 0")
+        self._repository = repository
+        self._max_rows = max_rows
+        self._batch_rows = batch_rows
+        self._max_delay_ms = max_delay_ms
+        self._cond = threading.Condition()
+        self._entries: deque[_PendingWrite] = deque()
+        self._queued_rows = 0
+        # Latest uncommitted vector per id (None after a delete or if only attributes are queued) and how many
+        # queued writes still touch it.
+        # Its own lock: quantized search reads it while holding the cache lock.
+        self._pending_lock = threading.Lock()
+        self._pending: dict[int, tuple[int, npt.NDArray[np.float32] | None]] = {}
+        self._commit_sizes: Counter[int] = Counter()
+        self._commits_total = 0
+        self._rows_total = 0
+        self._failed_rows_total = 0
+        self._commit_seconds_total = 0.0
+        self._commit_seconds_max = 0.0
+        self._submit_wait_total = 0.0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        logger.info(
+            "WriteBehindQueue started | max_rows=%s | batch_rows=%s | max_delay_ms=%s",
+            max_rows,
+            batch_rows,
+            max_delay_ms,
+        )
+
+    def upsert(
+        self,
+        cache: VectorCache,
+        vector_ids: list[int],
+        texts: list[str],
+        vectors: npt.NDArray[np.float32],
+        attributes: list[ProductAttributes],
+    ) -> tuple[list[bool], Future]:
+        with self._cond:
+            self._wait_for_room(len(vector_ids))
+            # The cache is the only up-to-date view of which ids exist while their rows are queued.
+            seen: set[int] = set()
+            is_new = []
+            for vector_id in vector_ids:
+                is_new.append(vector_id not in seen and not cache.contains(vector_id))
+                seen.add(vector_id)
+            future = self._enqueue("upsert", cache, vector_ids, texts, vectors, attributes)
+            cache.add_or_update_many(vector_ids, texts, vectors, attributes)
+        return is_new, future
+
+    def delete(self, cache: VectorCache, vector_ids: list[int]) -> Future:
+        with self._cond:
+            self._wait_for_room(len(vector_ids))
+            cache.delete_many(vector_ids)
+            return self._enqueue("delete", cache, vector_ids, [], None, [])
+
+    def update_attributes(self, cache: VectorCache, vector_ids: list[int], attributes: list[ProductAttributes]) -> Future:
+        with self._cond:
+            self._wait_for_room(len(vector_ids))
+            future = self._enqueue("attributes", cache, vector_ids, [], None, attributes)
+            cache.set_attributes(dict(zip(vector_ids, attributes, strict=True)))
+        return future
+
+    def find_unchanged(
+        self,
+        vector_ids: list[int],
+        texts: list[str],
+        attributes: list[ProductAttributes] | None = None,
+    ) -> tuple[set[int], set[int]]:
+        # Queued rows are newer than SQLite: compare only ids that had nothing queued before the read.
+        pending = self.pending_ids(vector_ids)
+        same_text, same_attributes = self._repository.find_unchanged(vector_ids, texts, attributes)
+        return same_text - pending, same_attributes - pending
+
+    def pending_ids(self, vector_ids: list[int]) -> set[int]:
+        with self._pending_lock:
+            return {vector_id for vector_id in vector_ids if vector_id in self._pending}
+
+    def get_vectors_by_ids(self, vector_ids: list[int]) -> npt.NDArray:
+        with self._pending_lock:
+            queued = {}
+            for vector_id in vector_ids:
+                pending = self._pending.get(vector_id)
+                if pending is not None and pending[1] is not None:
+                    queued[vector_id] = pending[1]
+        if not queued:
+            return self._repository.get_vectors_by_ids(vector_ids)
+        stored_ids = [vector_id for vector_id in vector_ids if vector_id not in queued]
+        stored = iter(self._repository.get_vectors_by_ids(stored_ids)) if stored_ids else iter(())
+        return np.stack([queued[vector_id] if vector_id in queued else next(stored) for vector_id in vector_ids])
+
+    def _wait_for_room(self, rows: int) -> None:
+        if self._closed:
+            raise RuntimeError("WriteBehindQueue is closed")
+        started = time.perf_counter()
+        # A write larger than the whole queue is let in once the queue has drained.
+        while self._queued_rows and self._queued_rows + rows > self._max_rows:
+            self._cond.wait()
+            if self._closed:
+                raise RuntimeError("WriteBehindQueue is closed")
+        self._submit_wait_total += time.perf_counter() - started
+
+    def _enqueue(
+        self,
+        op: str,
+        cache: VectorCache,
+        vector_ids: list[int],
+        texts: list[str],
+        vectors: npt.NDArray[np.float32] | None,
+        attributes: list[ProductAttributes],
+    ) -> Future:
+        future: Future = Future()
+        self._entries.append(_PendingWrite(op, cache, vector_ids, texts, vectors, attributes, future, time.monotonic()))
+        self._queued_rows += len(vector_ids)
+        with self._pending_lock:
+            for row, vector_id in enumerate(vector_ids):
+                count, vector = self._pending.get(vector_id, (0, None))
+                if vectors is not None:
+                    vector = vectors[row]
+                elif op == "delete":
+                    vector = None
+                self._pending[vector_id] = (count + 1, vector)
+        self._cond.notify_all()
+        return future
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._entries and not self._closed:
+                    self._cond.wait()
+                if not self._entries:
+                    break
+                deadline = self._entries[0].enqueued + self._max_delay_ms / 1000
+                while self._queued_rows < self._batch_rows and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [self._entries.popleft()]
+                rows = len(batch[0].vector_ids)
+                while self._entries and rows + len(self._entries[0].vector_ids) <= self._batch_rows:
+                    rows += len(self._entries[0].vector_ids)
+                    batch.append(self._entries.popleft())
+            try:
+                self._commit(batch)
+            except Exception:
+                # This thread is the only consumer: if it died, every later write would wait forever.
+                logger.exception("Write-behind batch failed | entries=%s", len(batch))
+
+    def _commit(self, batch: list[_PendingWrite]) -> None:
+        # Consecutive writes of one kind share one transaction; a delete keeps its place in the order.
+        groups: list[list[_PendingWrite]] = []
+        for entry in batch:
+            if groups and entry.op != "delete" and groups[-1][0].op == entry.op:
+                groups[-1].append(entry)
+            else:
+                groups.append([entry])
+        for group in groups:
+            started = time.perf_counter()
+            rows = sum(len(entry.vector_ids) for entry in group)
+            result: object = None
+            error: Exception | None = None
+            try:
+                result = self._write_with_retry(group, rows)
+            except Exception as e:
+                error = e
+                logger.error("Group commit failed | op=%s | rows=%s | error=%s", group[0].op, rows, e)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._cond:
+                    self._release(group)
+                    if error is not None:
+                        self._roll_back(group)
+                    self._commits_total += 1
+                    self._rows_total += rows
+                    self._failed_rows_total += rows if error is not None else 0
+                    self._commit_sizes[1 << (rows - 1).bit_length()] += 1
+                    self._commit_seconds_total += elapsed
+                    self._commit_seconds_max = max(self._commit_seconds_max, elapsed)
+                    self._cond.notify_all()
+            record_stage("sqlite_group_commit", elapsed)
+            WRITE_COMMIT_ROWS.observe(rows)
+            for entry in group:
+                _resolve(entry.future, result, error)
+            logger.debug("Group commit | op=%s | rows=%s | seconds=%.4f", group[0].op, rows, elapsed)
+
+    def _write_with_retry(self, group: list[_PendingWrite], rows: int) -> object:
+        for attempt in range(1, self._COMMIT_ATTEMPTS + 1):
+            try:
+                return self._write(group)
+            except Exception as e:
+                if attempt == self._COMMIT_ATTEMPTS:
+                    raise
+                logger.warning("Group commit retry | op=%s | rows=%s | attempt=%s | error=%s", group[0].op, rows, attempt, e)
+                time.sleep(self._RETRY_DELAY_SECONDS * attempt)
+        return None
+
+    def _write(self, group: list[_PendingWrite]) -> object:
+        if group[0].op == "delete":
+            return self._repository.delete_many(group[0].vector_ids)
+        if group[0].op == "attributes":
+            self._repository.update_attributes(
+                [vector_id for entry in group for vector_id in entry.vector_ids],
+                [item for entry in group for item in entry.attributes],
+            )
+            return None
+        self._repository.upsert_many(
+            [vector_id for entry in group for vector_id in entry.vector_ids],
+            [text for entry in group for text in entry.texts],
+            np.concatenate([entry.vectors for entry in group if entry.vectors is not None]),
+            [item for entry in group for item in entry.attributes],
+        )
+        return None
+
+    def _roll_back(self, group: list[_PendingWrite]) -> None:
+        # The cache already serves the lost writes: ids without a newer queued write are reset to what SQLite has.
+        # Called under the queue condition, so no new write to these ids reaches the cache meanwhile.
+        with self._pending_lock:
+            vector_ids = list(dict.fromkeys(vector_id for entry in group for vector_id in entry.vector_ids if vector_id not in self._pending))
+        if not vector_ids:
+            return
+        cache = group[0].cache
+        try:
+            stored_ids, texts, vectors, attributes = self._repository.get_rows_by_ids(vector_ids)
+        except Exception:
+            logger.exception("Cache rollback failed, the cache keeps uncommitted rows | rows=%s", len(vector_ids))
+            return
+        stored = set(stored_ids)
+        cache.delete_many([vector_id for vector_id in vector_ids if vector_id not in stored])
+        cache.add_or_update_many(stored_ids, texts, vectors, attributes)
+        logger.warning("Cache rolled back to SQLite | rows=%s | restored=%s", len(vector_ids), len(stored_ids))
+
+    def _release(self, group: list[_PendingWrite]) -> None:
+        with self._pending_lock:
+            for entry in group:
+                self._queued_rows -= len(entry.vector_ids)
+                for vector_id in entry.vector_ids:
+                    count, vector = self._pending[vector_id]
+                    if count == 1:
+                        del self._pending[vector_id]
+                    else:
+                        self._pending[vector_id] = (count - 1, vector)
+
+    def stats(self) -> WriteQueueStats:
+        with self._cond:
+            return WriteQueueStats(
+                queue_depth=self._queued_rows,
+                max_rows=self._max_rows,
+                batch_rows=self._batch_rows,
+                max_delay_ms=self._max_delay_ms,
+                commits_total=self._commits_total,
+                rows_total=self._rows_total,
+                failed_rows_total=self._failed_rows_total,
+                commit_rows_histogram=dict(sorted(self._commit_sizes.items())),
+                commit_seconds_total=self._commit_seconds_total,
+                commit_seconds_max=self._commit_seconds_max,
+                submit_wait_seconds_total=self._submit_wait_total,
+            )
+
+    def close(self) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        logger.info("WriteBehindQueue stopped | rows_total=%s | failed_rows_total=%s", self._rows_total, self._failed_rows_total)
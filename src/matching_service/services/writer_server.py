@@ -0,0 +1,82 @@
+import logging
+import threading
+from multiprocessing.connection import Connection, Listener
+
+import numpy.typing as npt
+
+from matching_service.catalog import ProductAttributes
+from matching_service.services.shared_vector_store import SharedVectorStore
+from matching_service.storage.repositories import SqliteVectorRepository
+
+logger = logging.getLogger(__name__)
+
+
+class WriterServer:
+    def __init__(self, repository: SqliteVectorRepository, store: SharedVectorStore, address: str, authkey: bytes) -> None:
+        self._repository = repository
+        self._store = store
+        self._write_lock = threading.Lock()
+        self._listener = Listener(address, family="AF_UNIX", authkey=authkey)
+        self._closed = False
+        self._thread = threading.Thread(target=self._accept_loop, name="writer-server", daemon=True)
+        self._thread.start()
+        logger.info("Writer server listening on %s", address)
+
+    def _accept_loop(self) -> None:
+        while not self._closed:
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                if self._closed:
+                    return
+                logger.exception("Writer server failed to accept a connection")
+                continue
+            threading.Thread(target=self._serve, args=(conn,), name="writer-connection", daemon=True).start()
+
+    def _serve(self, conn: Connection) -> None:
+        with conn:
+            while True:
+                try:
+                    op, vector_ids, texts, vectors, attributes = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    response = ("ok", self._apply(op, vector_ids, texts, vectors, attributes))
+                except ValueError as e:
+                    response = ("value_error", str(e))
+                except Exception as e:
+                    logger.error("Writer operation failed: %s", e)
+                    response = ("error", str(e))
+                try:
+                    conn.send(response)
+                except OSError:
+                    return
+
+    def _apply(
+        self,
+        op: str,
+        vector_ids: list[int],
+        texts: list[str] | None,
+        vectors: npt.NDArray | None,
+        attributes: list[ProductAttributes] | None,
+    ) -> list:
+        with self._write_lock:
+            if op == "upsert_many":
+                results = self._repository.upsert_many(vector_ids, texts, vectors, attributes)
+                self._store.write(vector_ids, vectors)
+                return results
+            if op == "update_attributes":
+                self._repository.update_attributes(vector_ids, attributes)
+                # Nothing moves in shared memory, but workers must re-read metadata.
+                self._store.touch()
+                return []
+            if op == "delete_many":
+                deleted = self._repository.delete_many(vector_ids)
+                self._store.delete(deleted)
+                return deleted
+        raise ValueError(f"Unknown writer operation: {op}")
+
+    def close(self) -> None:
+        self._closed = True
+        self._listener.close()
+        logger.info("Writer server stopped")
@@ -1,5 +1,10 @@
+from matching_service.storage.repositories.remote_writer import RemoteWriterRepository
 from matching_service.storage.repositories.repository import SqliteVectorRepository
+from matching_service.storage.repositories.vector_snapshot import SnapshotData, VectorSnapshot
 
 __all__ = [
+    "RemoteWriterRepository",
     "SqliteVectorRepository",
+    "SnapshotData",
+    "VectorSnapshot",
 ]
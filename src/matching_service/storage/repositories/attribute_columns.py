@@ -0,0 +1,17 @@
+from matching_service.catalog import ProductAttributes, parse_category_path
+
+AttributeColumns = tuple[str | None, str | None, float | None]
+
+EMPTY_ATTRIBUTES = ProductAttributes()
+
+
+def to_columns(attributes: ProductAttributes | None) -> AttributeColumns:
+    if attributes is None:
+        return None, None, None
+    return attributes.category_path, attributes.seller, attributes.rating
+
+
+def from_columns(category: str | None, seller: str | None, rating: float | None) -> ProductAttributes:
+    if category is None and seller is None and rating is None:
+        return EMPTY_ATTRIBUTES
+    return ProductAttributes(category=parse_category_path(category), seller=seller, rating=rating)
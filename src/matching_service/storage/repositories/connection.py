@@ -4,6 +4,8 @@ import threading
 from contextlib import contextmanager
 from collections.abc import Generator
 
+from matching_service.storage.repositories.text_hash import text_hash
+
 logger = logging.getLogger(__name__)
 
 
@@ -40,17 +42,42 @@ class DatabaseConnection:
                         dim INTEGER NOT NULL,
                         count INTEGER NOT NULL DEFAULT 1,
                         created_at INTEGER NOT NULL,
-                        updated_at INTEGER NOT NULL
+                        updated_at INTEGER NOT NULL,
+                        text_hash TEXT,
+                        category TEXT,
+                        seller TEXT,
+                        rating REAL
                     )
                     """
                 )
+                self._migrate_text_hash()
+                self._migrate_attributes()
                 self._conn.execute("CREATE INDEX IF NOT EXISTS idx_text ON vectors(text)")
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_updated_at ON vectors(updated_at)")
                 self._conn.execute("COMMIT")
                 logger.debug("Database schema initialized")
             except Exception:
                 self._conn.execute("ROLLBACK")
                 raise
 
+    def _migrate_text_hash(self) -> None:
+        assert self._conn is not None
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(vectors)")}
+        if "text_hash" not in columns:
+            self._conn.execute("ALTER TABLE vectors ADD COLUMN text_hash TEXT")
+        self._conn.create_function("text_hash", 1, text_hash, deterministic=True)
+        updated = self._conn.execute("UPDATE vectors SET text_hash = text_hash(text) WHERE text_hash IS NULL").rowcount
+        if updated > 0:
+            logger.info("Backfilled text hashes for %s rows", updated)
+
+    def _migrate_attributes(self) -> None:
+        assert self._conn is not None
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(vectors)")}
+        for name, column_type in (("category", "TEXT"), ("seller", "TEXT"), ("rating", "REAL")):
+            if name not in columns:
+                self._conn.execute(f"ALTER TABLE vectors ADD COLUMN {name} {column_type}")
+                logger.info("Added attribute column: %s", name)
+
     @contextmanager
     def transaction(self, mode: str = "DEFERRED") -> Generator[sqlite3.Connection, None, None]:
         if self._conn is None:
@@ -0,0 +1,73 @@
+import logging
+import threading
+from multiprocessing.connection import Client, Connection
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from matching_service.catalog import ProductAttributes
+from matching_service.storage.repositories.repository import SqliteVectorRepository
+
+logger = logging.getLogger(__name__)
+
+
+class RemoteWriterRepository(SqliteVectorRepository):
+    def __init__(self, db_path: str, writer_address: str, authkey: bytes) -> None:
+        super().__init__(db_path=db_path)
+        self._writer_address = writer_address
+        self._authkey = authkey
+        self._writer: Connection | None = None
+        self._writer_lock = threading.Lock()
+
+    def upsert(
+        self,
+        vector_id: int,
+        text: str,
+        vector: npt.NDArray,
+        attributes: ProductAttributes | None = None,
+    ) -> tuple[int, bool]:
+        vectors = np.asarray(vector, dtype=np.float32)[np.newaxis, :]
+        return self.upsert_many([vector_id], [text], vectors, [attributes] if attributes is not None else None)[0]
+
+    def upsert_many(
+        self,
+        vector_ids: list[int],
+        texts: list[str],
+        vectors: npt.NDArray,
+        attributes: list[ProductAttributes] | None = None,
+    ) -> list[tuple[int, bool]]:
+        return self._request(("upsert_many", vector_ids, texts, np.asarray(vectors, dtype=np.float32), attributes))
+
+    def update_attributes(self, vector_ids: list[int], attributes: list[ProductAttributes]) -> None:
+        self._request(("update_attributes", vector_ids, None, None, attributes))
+
+    def delete_many(self, vector_ids: list[int]) -> list[int]:
+        return self._request(("delete_many", vector_ids, None, None, None))
+
+    def _request(self, request: tuple) -> Any:
+        with self._writer_lock:
+            try:
+                if self._writer is None:
+                    self._writer = Client(self._writer_address, family="AF_UNIX", authkey=self._authkey)
+                self._writer.send(request)
+                status, payload = self._writer.recv()
+            except (OSError, EOFError) as e:
+                self._close_writer()
+                logger.error("Writer process is unavailable: %s", e)
+                raise RuntimeError(f"Writer process is unavailable: {e}") from e
+        if status == "value_error":
+            raise ValueError(payload)
+        if status != "ok":
+            raise RuntimeError(payload)
+        return payload
+
+    def _close_writer(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def close(self) -> None:
+        with self._writer_lock:
+            self._close_writer()
+        super().close()
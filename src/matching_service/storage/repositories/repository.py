@@ -1,5 +1,6 @@
 import numpy.typing as npt
 
+from matching_service.catalog import ProductAttributes
 from matching_service.storage.repositories.connection import DatabaseConnection
 from matching_service.storage.repositories.vector_reader import VectorReader
 from matching_service.storage.repositories.vector_writer import VectorWriter
@@ -14,8 +15,58 @@ class SqliteVectorRepository:
     def get_all_vectors(self) -> tuple[list[int], list[str], npt.NDArray]:
         return self._reader.get_all_vectors()
 
-    def upsert(self, vector_id: int, text: str, vector: npt.NDArray) -> tuple[int, bool]:
-        return self._writer.upsert(vector_id, text, vector)
+    def get_texts(self) -> dict[int, str]:
+        return self._reader.get_texts()
+
+    def get_attributes(self) -> dict[int, ProductAttributes]:
+        return self._reader.get_attributes()
+
+    def get_metadata_updated_since(self, updated_at: int) -> tuple[dict[int, tuple[str, ProductAttributes]], int]:
+        return self._reader.get_metadata_updated_since(updated_at)
+
+    def get_vectors_updated_since(self, updated_at: int) -> tuple[list[int], list[str], npt.NDArray]:
+        return self._reader.get_vectors_updated_since(updated_at)
+
+    def get_vectors_by_ids(self, vector_ids: list[int]) -> npt.NDArray:
+        return self._reader.get_vectors_by_ids(vector_ids)
+
+    def get_rows_by_ids(self, vector_ids: list[int]) -> tuple[list[int], list[str], npt.NDArray, list[ProductAttributes]]:
+        return self._reader.get_rows_by_ids(vector_ids)
+
+    def find_unchanged(
+        self,
+        vector_ids: list[int],
+        texts: list[str],
+        attributes: list[ProductAttributes] | None = None,
+    ) -> tuple[set[int], set[int]]:
+        return self._reader.find_unchanged(vector_ids, texts, attributes)
+
+    def get_watermark(self) -> tuple[int, int]:
+        return self._reader.get_watermark()
+
+    def upsert(
+        self,
+        vector_id: int,
+        text: str,
+        vector: npt.NDArray,
+        attributes: ProductAttributes | None = None,
+    ) -> tuple[int, bool]:
+        return self._writer.upsert(vector_id, text, vector, attributes)
+
+    def upsert_many(
+        self,
+        vector_ids: list[int],
+        texts: list[str],
+        vectors: npt.NDArray,
+        attributes: list[ProductAttributes] | None = None,
+    ) -> list[tuple[int, bool]]:
+        return self._writer.upsert_many(vector_ids, texts, vectors, attributes)
+
+    def update_attributes(self, vector_ids: list[int], attributes: list[ProductAttributes]) -> None:
+        self._writer.update_attributes(vector_ids, attributes)
+
+    def delete_many(self, vector_ids: list[int]) -> list[int]:
+        return self._writer.delete_many(vector_ids)
 
     def close(self) -> None:
         self._db.close()
@@ -4,37 +4,193 @@ import sqlite3
 import numpy as np
 import numpy.typing as npt
 
+from matching_service.catalog import ProductAttributes
+from matching_service.storage.repositories.attribute_columns import from_columns, to_columns
 from matching_service.storage.repositories.connection import DatabaseConnection
+from matching_service.storage.repositories.text_hash import text_hash
 from matching_service.storage.repositories.vector_serializer import VectorSerializer
 
 logger = logging.getLogger(__name__)
 
 
 class VectorReader:
+    _ID_CHUNK_SIZE = 500
+
     def __init__(self, db_connection: DatabaseConnection) -> None:
         self._db = db_connection
         self._serializer = VectorSerializer()
 
-    def get_all_vectors(self) -> tuple[list[int], list[str], npt.NDArray[np.float32]]:
+    def get_all_vectors(self, chunk_size: int = 10000) -> tuple[list[int], list[str], npt.NDArray[np.float32]]:
         try:
-            with self._db.read_transaction() as conn:
+            with self._db.transaction() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT id, text, vector, dim FROM vectors ORDER BY id")
-                rows = cursor.fetchall()
-                if not rows:
+                cursor.execute("SELECT COUNT(*), MAX(dim) FROM vectors")
+                count, dim = cursor.fetchone()
+                if count == 0:
                     empty_array: npt.NDArray[np.float32] = np.array([], dtype=np.float32)
                     return [], [], empty_array
                 ids: list[int] = []
                 texts: list[str] = []
-                vectors: list[npt.NDArray[np.float32]] = []
-                for row_id, text, vector_blob, dim in rows:
-                    ids.append(row_id)
-                    texts.append(text)
-                    vectors.append(self._serializer.deserialize(vector_blob, dim))
-                stacked_vectors: npt.NDArray[np.float32] = np.stack(vectors).astype(np.float32)
+                vectors = np.empty((count, dim), dtype=np.float32)
+                cursor.execute("SELECT id, text, vector FROM vectors")
+                while rows := cursor.fetchmany(chunk_size):
+                    start = len(ids)
+                    ids.extend(row[0] for row in rows)
+                    texts.extend(row[1] for row in rows)
+                    vectors[start : len(ids)] = self._serializer.deserialize_many([row[2] for row in rows], dim)
                 logger.debug("Retrieved %d vectors from storage", len(ids))
-                return ids, texts, stacked_vectors
+                return ids, texts, vectors
         except sqlite3.Error as e:
             logger.error("Failed to get all vectors: %s", e)
             raise RuntimeError(f"Database read error: {e}") from e
 
+    def get_texts(self) -> dict[int, str]:
+        try:
+            with self._db.read_transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT id, text FROM vectors")
+                return dict(cursor.fetchall())
+        except sqlite3.Error as e:
+            logger.error("Failed to get texts: %s", e)
+            raise RuntimeError(f"Database read error: {e}") from e
+
+    def get_attributes(self) -> dict[int, ProductAttributes]:
+        try:
+            with self._db.read_transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    SELECT id, category, seller, rating FROM vectors
+                    WHERE category IS NOT NULL OR seller IS NOT NULL OR rating IS NOT NULL
+                    """
+                )
+                return {row_id: from_columns(category, seller, rating) for row_id, category, seller, rating in cursor.fetchall()}
+        except sqlite3.Error as e:
+            logger.error("Failed to get attributes: %s", e)
+            raise RuntimeError(f"Database read error: {e}") from e
+
+    def get_metadata_updated_since(self, updated_at: int) -> tuple[dict[int, tuple[str, ProductAttributes]], int]:
+        try:
+            with self._db.read_transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT id, text, category, seller, rating, updated_at FROM vectors WHERE updated_at >= ?",
+                    (updated_at,),
+                )
+                rows = cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error("Failed to get updated texts: %s", e)
+            raise RuntimeError(f"Database read error: {e}") from e
+        metadata = {row[0]: (row[1], from_columns(row[2], row[3], row[4])) for row in rows}
+        return metadata, max((row[5] for row in rows), default=updated_at)
+
+    def get_vectors_updated_since(self, updated_at: int) -> tuple[list[int], list[str], npt.NDArray[np.float32]]:
+        try:
+            with self._db.read_transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT id, text, vector, dim FROM vectors WHERE updated_at >= ?", (updated_at,))
+                rows = cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error("Failed to get updated vectors: %s", e)
+            raise RuntimeError(f"Database read error: {e}") from e
+        if not rows:
+            return [], [], np.array([], dtype=np.float32)
+        ids = [row[0] for row in rows]
+        texts = [row[1] for row in rows]
+        vectors = self._serializer.deserialize_many([row[2] for row in rows], rows[0][3])
+        logger.debug("Retrieved %d vectors updated since %s", len(ids), updated_at)
+        return ids, texts, vectors
+
+    def get_rows_by_ids(self, vector_ids: list[int]) -> tuple[list[int], list[str], npt.NDArray[np.float32], list[ProductAttributes]]:
+        rows = []
+        try:
+            with self._db.read_transaction() as conn:
+                cursor = conn.cursor()
+                unique_ids = list(dict.fromkeys(vector_ids))
+                for i in range(0, len(unique_ids), self._ID_CHUNK_SIZE):
+                    chunk = unique_ids[i : i + self._ID_CHUNK_SIZE]
+                    placeholders = ",".join("?" * len(chunk))
+                    cursor.execute(
+                        f"SELECT id, text, vector, dim, category, seller, rating FROM vectors WHERE id IN ({placeholders})",
+                        chunk,
+                    )
+                    rows.extend(cursor.fetchall())
+        except sqlite3.Error as e:
+            logger.error("Failed to get rows by ids: %s", e)
+            raise RuntimeError(f"Database read error: {e}") from e
+        if not rows:
+            return [], [], np.array([], dtype=np.float32), []
+        ids = [row[0] for row in rows]
+        texts = [row[1] for row in rows]
+        vectors = self._serializer.deserialize_many([row[2] for row in rows], rows[0][3])
+        attributes = [from_columns(row[4], row[5], row[6]) for row in rows]
+        return ids, texts, vectors, attributes
+
+    def find_unchanged(
+        self,
+        vector_ids: list[int],
+        texts: list[str],
+        attributes: list[ProductAttributes] | None = None,
+    ) -> tuple[set[int], set[int]]:
+        # Text and attributes are compared separately: a new price or rating must not cost a model call.
+        expected = {
+            vector_id: (text_hash(text), to_columns(item_attributes))
+            for vector_id, text, item_attributes in zip(vector_ids, texts, attributes or [None] * len(vector_ids), strict=True)
+        }
+        same_text: set[int] = set()
+        same_attributes: set[int] = set()
+        try:
+            with self._db.read_transaction() as conn:
+                cursor = conn.cursor()
+                unique_ids = list(expected)
+                for i in range(0, len(unique_ids), self._ID_CHUNK_SIZE):
+                    chunk = unique_ids[i : i + self._ID_CHUNK_SIZE]
+                    placeholders = ",".join("?" * len(chunk))
+                    cursor.execute(
+                        f"SELECT id, text_hash, category, seller, rating FROM vectors WHERE id IN ({placeholders})",
+                        chunk,
+                    )
+                    for row_id, row_hash, *columns in cursor.fetchall():
+                        expected_hash, expected_columns = expected[row_id]
+                        if row_hash == expected_hash:
+                            same_text.add(row_id)
+                        if tuple(columns) == expected_columns:
+                            same_attributes.add(row_id)
+        except sqlite3.Error as e:
+            logger.error("Failed to compare text hashes: %s", e)
+            raise RuntimeError(f"Database read error: {e}") from e
+        return same_text, same_attributes
+
+    def get_watermark(self) -> tuple[int, int]:
+        try:
+            with self._db.read_transaction() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*), COALESCE(MAX(updated_at), 0) FROM vectors")
+                count, max_updated_at = cursor.fetchone()
+                return int(count), int(max_updated_at)
+        except sqlite3.Error as e:
+            logger.error("Failed to get storage watermark: %s", e)
+            raise RuntimeError(f"Database read error: {e}") from e
+
+    def get_vectors_by_ids(self, vector_ids: list[int]) -> npt.NDArray[np.float32]:
+        try:
+            with self._db.read_transaction() as conn:
+                cursor = conn.cursor()
+                blobs: dict[int, bytes] = {}
+                dims: dict[int, int] = {}
+                unique_ids = list(set(vector_ids))
+                for i in range(0, len(unique_ids), self._ID_CHUNK_SIZE):
+                    chunk = unique_ids[i : i + self._ID_CHUNK_SIZE]
+                    placeholders = ",".join("?" * len(chunk))
+                    cursor.execute(f"SELECT id, vector, dim FROM vectors WHERE id IN ({placeholders})", chunk)
+                    for row_id, blob, row_dim in cursor.fetchall():
+                        blobs[row_id] = blob
+                        dims[row_id] = row_dim
+        except sqlite3.Error as e:
+            logger.error("Failed to get vectors by ids: %s", e)
+            raise RuntimeError(f"Database read error: {e}") from e
+        missing = [vector_id for vector_id in vector_ids if vector_id not in blobs]
+        if missing:
+            raise RuntimeError(f"Vectors not found in storage: {missing[:10]}")
+        dim = dims[vector_ids[0]] if vector_ids else 0
+        return self._serializer.deserialize_many([blobs[vector_id] for vector_id in vector_ids], dim)
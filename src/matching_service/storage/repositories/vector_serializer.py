@@ -11,3 +11,6 @@ class VectorSerializer:
     def deserialize(blob: bytes, dim: int) -> npt.NDArray[np.float32]:
         return np.frombuffer(blob, dtype=np.float32).reshape(dim)
 
+    @staticmethod
+    def deserialize_many(blobs: list[bytes], dim: int) -> npt.NDArray[np.float32]:
+        return np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(len(blobs), dim)
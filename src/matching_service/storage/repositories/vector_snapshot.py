@@ -0,0 +1,148 @@
+import logging
+import os
+import struct
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+import numpy.typing as npt
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SnapshotData:
+    ids: npt.NDArray[np.int64]
+    vectors: npt.NDArray[np.float32]
+    watermark: tuple[int, int]
+
+
+class VectorSnapshot:
+    _MAGIC = b"MSVSNAP1"
+    _VERSION = 1
+    _HEADER = struct.Struct("<8sIIqqq")
+    _HEADER_SIZE = 64
+    _COPY_CHUNK_ROWS = 65536
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def load(self, vector_dim: int) -> SnapshotData | None:
+        if not self._path.exists():
+            return None
+        try:
+            with open(self._path, "rb") as f:
+                header = f.read(self._HEADER_SIZE)
+            magic, version, dim, count, watermark_count, watermark_updated_at = self._HEADER.unpack_from(header)
+        except (OSError, struct.error) as e:
+            logger.warning("Vector snapshot %s is unreadable: %s", self._path, e)
+            return None
+        if magic != self._MAGIC or version != self._VERSION:
+            logger.warning("Vector snapshot %s has an unknown format, ignoring it", self._path)
+            return None
+        if dim != vector_dim:
+            logger.warning("Vector snapshot %s has dim=%s, expected %s, ignoring it", self._path, dim, vector_dim)
+            return None
+        vectors_offset = self._HEADER_SIZE + count * 8
+        if self._path.stat().st_size != vectors_offset + count * dim * 4:
+            logger.warning("Vector snapshot %s is truncated, ignoring it", self._path)
+            return None
+        if count == 0:
+            ids = np.empty(0, dtype=np.int64)
+            vectors = np.empty((0, dim), dtype=np.float32)
+        else:
+            ids = np.memmap(self._path, dtype=np.int64, mode="r", offset=self._HEADER_SIZE, shape=(count,))
+            vectors = np.memmap(self._path, dtype=np.float32, mode="c", offset=vectors_offset, shape=(count, dim))
+        logger.info("Vector snapshot mapped | path=%s | vectors=%s", self._path, f"{count:,}")
+        return SnapshotData(ids=ids, vectors=vectors, watermark=(watermark_count, watermark_updated_at))
+
+    def save(self, ids: list[int] | npt.NDArray, vectors: npt.NDArray[np.float32], watermark: tuple[int, int]) -> None:
+        started = time.perf_counter()
+        ids_array = np.asarray(ids, dtype=np.int64)
+        with self._open_tmp() as (f, tmp_path):
+            self._write_header(f, vectors.shape[1], len(ids_array), watermark)
+            f.write(ids_array.tobytes())
+            for start in range(0, len(vectors), self._COPY_CHUNK_ROWS):
+                f.write(np.ascontiguousarray(vectors[start : start + self._COPY_CHUNK_ROWS], dtype=np.float32).tobytes())
+        os.replace(tmp_path, self._path)
+        logger.info(
+            "Vector snapshot saved | path=%s | vectors=%s | elapsed=%.2fs",
+            self._path,
+            f"{len(ids_array):,}",
+            time.perf_counter() - started,
+        )
+
+    def merge(
+        self,
+        vector_ids: list[int],
+        vectors: npt.NDArray[np.float32],
+        watermark: tuple[int, int],
+    ) -> bool:
+        data = self.load(vectors.shape[1])
+        if data is None:
+            return False
+        started = time.perf_counter()
+        changed_ids = np.asarray(vector_ids, dtype=np.int64)
+        order = np.argsort(data.ids, kind="stable")
+        sorted_ids = data.ids[order]
+        exists = np.zeros(len(changed_ids), dtype=bool)
+        positions = np.zeros(len(changed_ids), dtype=np.int64)
+        if len(sorted_ids):
+            positions = np.minimum(np.searchsorted(sorted_ids, changed_ids), len(sorted_ids) - 1)
+            exists = sorted_ids[positions] == changed_ids
+        update_rows = order[positions[exists]]
+        update_vectors = vectors[exists]
+        row_order = np.argsort(update_rows, kind="stable")
+        update_rows = update_rows[row_order]
+        update_vectors = update_vectors[row_order]
+        new_ids = changed_ids[~exists]
+        new_vectors = vectors[~exists]
+        count = len(data.ids) + len(new_ids)
+        if count != watermark[0]:
+            # Rows were deleted since the snapshot, merging cannot drop them.
+            return False
+        with self._open_tmp() as (f, tmp_path):
+            self._write_header(f, vectors.shape[1], count, watermark)
+            f.write(np.asarray(data.ids).tobytes())
+            f.write(new_ids.tobytes())
+            for start in range(0, len(data.ids), self._COPY_CHUNK_ROWS):
+                chunk = np.array(data.vectors[start : start + self._COPY_CHUNK_ROWS])
+                lo, hi = np.searchsorted(update_rows, [start, start + len(chunk)])
+                chunk[update_rows[lo:hi] - start] = update_vectors[lo:hi]
+                f.write(chunk.tobytes())
+            f.write(np.ascontiguousarray(new_vectors, dtype=np.float32).tobytes())
+        del data
+        os.replace(tmp_path, self._path)
+        logger.info(
+            "Vector snapshot merged | updated=%s | added=%s | vectors=%s | elapsed=%.2fs",
+            len(update_rows),
+            len(new_ids),
+            f"{count:,}",
+            time.perf_counter() - started,
+        )
+        return True
+
+    def _write_header(self, f: BinaryIO, vector_dim: int, count: int, watermark: tuple[int, int]) -> None:
+        header = self._HEADER.pack(self._MAGIC, self._VERSION, vector_dim, count, watermark[0], watermark[1])
+        f.write(header.ljust(self._HEADER_SIZE, b"\0"))
+
+    @contextmanager
+    def _open_tmp(self) -> Generator[tuple[BinaryIO, Path], None, None]:
+        tmp_path = self._path.with_suffix(self._path.suffix + ".tmp")
+        tmp_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(tmp_path, "wb") as f:
+                yield f, tmp_path
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
@@ -4,18 +4,29 @@ import time
 
 import numpy.typing as npt
 
+from matching_service.catalog import ProductAttributes
+from matching_service.storage.repositories.attribute_columns import to_columns
 from matching_service.storage.repositories.connection import DatabaseConnection
+from matching_service.storage.repositories.text_hash import text_hash
 from matching_service.storage.repositories.vector_serializer import VectorSerializer
 
 logger = logging.getLogger(__name__)
 
 
 class VectorWriter:
+    _ID_CHUNK_SIZE = 500
+
     def __init__(self, db_connection: DatabaseConnection) -> None:
         self._db = db_connection
         self._serializer = VectorSerializer()
 
-    def upsert(self, vector_id: int, text: str, vector: npt.NDArray) -> tuple[int, bool]:
+    def upsert(
+        self,
+        vector_id: int,
+        text: str,
+        vector: npt.NDArray,
+        attributes: ProductAttributes | None = None,
+    ) -> tuple[int, bool]:
         self._validate_upsert_params(vector_id, text, vector)
         try:
             timestamp = int(time.time())
@@ -23,17 +34,131 @@ class VectorWriter:
                 cursor = conn.cursor()
                 exists = self._check_exists(cursor, vector_id)
                 if exists:
-                    self._update_vector(cursor, vector_id, text, vector, timestamp)
+                    self._update_vector(cursor, vector_id, text, vector, timestamp, attributes)
                     logger.debug("Updated vector ID: %s", vector_id)
                     return vector_id, False
                 else:
-                    self._insert_vector(cursor, vector_id, text, vector, timestamp)
+                    self._insert_vector(cursor, vector_id, text, vector, timestamp, attributes)
                     logger.debug("Inserted vector ID: %s", vector_id)
                     return vector_id, True
         except sqlite3.Error as e:
             logger.error("Failed to upsert vector: %s", e)
             raise RuntimeError(f"Database write error: {e}") from e
 
+    def upsert_many(
+        self,
+        vector_ids: list[int],
+        texts: list[str],
+        vectors: npt.NDArray,
+        attributes: list[ProductAttributes] | None = None,
+    ) -> list[tuple[int, bool]]:
+        if not (len(vector_ids) == len(texts) == len(vectors)):
+            raise ValueError("vector_ids, texts and vectors must have the same length")
+        if attributes is not None and len(attributes) != len(vector_ids):
+            raise ValueError("attributes must have the same length as vector_ids")
+        for vector_id, text, vector in zip(vector_ids, texts, vectors, strict=True):
+            self._validate_upsert_params(vector_id, text, vector)
+        if not vector_ids:
+            return []
+        try:
+            timestamp = int(time.time())
+            with self._db.transaction("IMMEDIATE") as conn:
+                cursor = conn.cursor()
+                existing = self._fetch_existing_ids(cursor, vector_ids)
+                cursor.executemany(
+                    """
+                    INSERT INTO vectors (id, text, vector, dim, count, created_at, updated_at, text_hash, category, seller, rating)
+                    VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        text = excluded.text,
+                        vector = excluded.vector,
+                        dim = excluded.dim,
+                        count = count + 1,
+                        updated_at = excluded.updated_at,
+                        text_hash = excluded.text_hash,
+                        category = excluded.category,
+                        seller = excluded.seller,
+                        rating = excluded.rating
+                    """,
+                    (
+                        (
+                            vector_id,
+                            text,
+                            self._serializer.serialize(vector),
+                            len(vector),
+                            timestamp,
+                            timestamp,
+                            text_hash(text),
+                            *to_columns(item_attributes),
+                        )
+                        for vector_id, text, vector, item_attributes in zip(
+                            vector_ids, texts, vectors, attributes or [None] * len(vector_ids), strict=True
+                        )
+                    ),
+                )
+            results: list[tuple[int, bool]] = []
+            for vector_id in vector_ids:
+                results.append((vector_id, vector_id not in existing))
+                existing.add(vector_id)
+            logger.debug("Bulk upserted %s vectors", len(vector_ids))
+            return results
+        except sqlite3.Error as e:
+            logger.error("Failed to bulk upsert vectors: %s", e)
+            raise RuntimeError(f"Database write error: {e}") from e
+
+    def update_attributes(self, vector_ids: list[int], attributes: list[ProductAttributes]) -> None:
+        if len(attributes) != len(vector_ids):
+            raise ValueError("attributes must have the same length as vector_ids")
+        if not vector_ids:
+            return
+        try:
+            timestamp = int(time.time())
+            with self._db.transaction("IMMEDIATE") as conn:
+                conn.executemany(
+                    """
+                    UPDATE vectors
+                    SET category = ?, seller = ?, rating = ?, count = count + 1, updated_at = ?
+                    WHERE id = ?
+                    """,
+                    (
+                        (*to_columns(item_attributes), timestamp, vector_id)
+                        for vector_id, item_attributes in zip(vector_ids, attributes, strict=True)
+                    ),
+                )
+            logger.debug("Updated attributes of %s vectors", len(vector_ids))
+        except sqlite3.Error as e:
+            logger.error("Failed to update attributes: %s", e)
+            raise RuntimeError(f"Database write error: {e}") from e
+
+    def delete_many(self, vector_ids: list[int]) -> list[int]:
+        unique_ids = list(dict.fromkeys(vector_ids))
+        if not unique_ids:
+            return []
+        try:
+            with self._db.transaction("IMMEDIATE") as conn:
+                cursor = conn.cursor()
+                existing = self._fetch_existing_ids(cursor, unique_ids)
+                deleted = [vector_id for vector_id in unique_ids if vector_id in existing]
+                for i in range(0, len(deleted), self._ID_CHUNK_SIZE):
+                    chunk = deleted[i : i + self._ID_CHUNK_SIZE]
+                    placeholders = ",".join("?" * len(chunk))
+                    cursor.execute(f"DELETE FROM vectors WHERE id IN ({placeholders})", chunk)
+            logger.debug("Deleted %s of %s vectors", len(deleted), len(unique_ids))
+            return deleted
+        except sqlite3.Error as e:
+            logger.error("Failed to delete vectors: %s", e)
+            raise RuntimeError(f"Database write error: {e}") from e
+
+    def _fetch_existing_ids(self, cursor, vector_ids: list[int]) -> set[int]:
+        existing: set[int] = set()
+        unique_ids = list(set(vector_ids))
+        for i in range(0, len(unique_ids), self._ID_CHUNK_SIZE):
+            chunk = unique_ids[i : i + self._ID_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(f"SELECT id FROM vectors WHERE id IN ({placeholders})", chunk)
+            existing.update(row[0] for row in cursor.fetchall())
+        return existing
+
     def _validate_upsert_params(self, vector_id: int, text: str, vector: npt.NDArray) -> None:
         if not text.strip():
             raise ValueError("Text cannot be empty")
@@ -46,22 +171,56 @@ class VectorWriter:
         cursor.execute("SELECT 1 FROM vectors WHERE id = ?", (vector_id,))
         return cursor.fetchone() is not None
 
-    def _update_vector(self, cursor, vector_id: int, text: str, vector: npt.NDArray, timestamp: int) -> None:
+    def _update_vector(
+        self,
+        cursor,
+        vector_id: int,
+        text: str,
+        vector: npt.NDArray,
+        timestamp: int,
+        attributes: ProductAttributes | None,
+    ) -> None:
         cursor.execute(
             """
             UPDATE vectors 
-            SET text = ?, vector = ?, dim = ?, count = count + 1, updated_at = ?
+            SET text = ?, vector = ?, dim = ?, count = count + 1, updated_at = ?, text_hash = ?,
+                category = ?, seller = ?, rating = ?
             WHERE id = ?
             """,
-            (text, self._serializer.serialize(vector), len(vector), timestamp, vector_id),
+            (
+                text,
+                self._serializer.serialize(vector),
+                len(vector),
+                timestamp,
+                text_hash(text),
+                *to_columns(attributes),
+                vector_id,
+            ),
         )
 
-    def _insert_vector(self, cursor, vector_id: int, text: str, vector: npt.NDArray, timestamp: int) -> None:
+    def _insert_vector(
+        self,
+        cursor,
+        vector_id: int,
+        text: str,
+        vector: npt.NDArray,
+        timestamp: int,
+        attributes: ProductAttributes | None,
+    ) -> None:
         cursor.execute(
             """
-            INSERT INTO vectors (id, text, vector, dim, count, created_at, updated_at)
-            VALUES (?, ?, ?, ?, 1, ?, ?)
+            INSERT INTO vectors (id, text, vector, dim, count, created_at, updated_at, text_hash, category, seller, rating)
+            VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?)
             """,
-            (vector_id, text, self._serializer.serialize(vector), len(vector), timestamp, timestamp),
+            (
+                vector_id,
+                text,
+                self._serializer.serialize(vector),
+                len(vector),
+                timestamp,
+                timestamp,
+                text_hash(text),
+                *to_columns(attributes),
+            ),
         )
 
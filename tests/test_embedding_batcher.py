@@ -0,0 +1,53 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from matching_service.services.embedding_batcher import EmbeddingBatcher
+from matching_service.services.executors import InstrumentedExecutor
+
+DIM = 4
+
+
+class BlockingEmbedder:
+    def __init__(self) -> None:
+        self.encoding = threading.Event()
+        self.release = threading.Event()
+        self.batches: list[list[str]] = []
+
+    def encode(self, texts: list[str], batch_size: int, normalize: bool = True, show_progress: bool = True) -> np.ndarray:
+        self.batches.append(list(texts))
+        self.encoding.set()
+        assert self.release.wait(5)
+        return np.array([[len(text)] * DIM for text in texts], dtype=np.float32)
+
+
+def test_cancelled_caller_does_not_block_its_batch():
+    embedder = BlockingEmbedder()
+    executor = InstrumentedExecutor("inference", max_workers=1)
+    batcher = EmbeddingBatcher(embedder, executor, max_batch_size=8, max_wait_ms=0)
+
+    async def scenario() -> tuple[np.ndarray, np.ndarray]:
+        loop = asyncio.get_running_loop()
+        first = asyncio.ensure_future(batcher.encode_async("a"))
+        await loop.run_in_executor(None, embedder.encoding.wait, 5)
+        # The only slot is busy: the next two callers wait in the queue and will share a batch.
+        cancelled = asyncio.ensure_future(batcher.encode_async("bb"))
+        kept = asyncio.ensure_future(batcher.encode_async("ccc"))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        embedder.release.set()
+        return await asyncio.wait_for(asyncio.gather(first, kept), timeout=5)
+
+    try:
+        first, kept = asyncio.run(scenario())
+    finally:
+        embedder.release.set()
+        batcher.close()
+        executor.shutdown()
+
+    assert first.tolist() == [1.0] * DIM
+    assert kept.tolist() == [3.0] * DIM
+    assert embedder.batches == [["a"], ["ccc"]]
+    assert batcher.stats().texts_total == 2
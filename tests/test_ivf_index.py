@@ -0,0 +1,105 @@
+import threading
+
+import numpy as np
+
+from matching_service.services.ivf_index import IVFIndex
+from matching_service.services.vector_cache import VectorCache
+
+DIM = 8
+
+
+class CountingIVFIndex(IVFIndex):
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.trained_on: list[int] = []
+        self.retraining = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def train(self, vectors: np.ndarray) -> None:
+        self.trained_on.append(len(vectors))
+        if len(self.trained_on) > 1:
+            self.retraining.set()
+            assert self.release.wait(5)
+        super().train(vectors)
+
+
+def _unit_vectors(rng: np.random.Generator, rows: int) -> np.ndarray:
+    vectors = rng.standard_normal((rows, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _wait_for_retrain(cache: VectorCache) -> None:
+    retrain = cache._ivf_retrain
+    if retrain is not None:
+        retrain.join(5)
+
+
+def _assert_ivf_matches_exact(cache: VectorCache, rng: np.random.Generator) -> None:
+    # With every list probed IVF must match exact search over all rows, retrained or not.
+    queries = _unit_vectors(rng, 5)
+    assert np.array_equal(cache.search_vectors(queries, 5, mode="ivf")[1], cache.search_vectors(queries, 5, mode="exact")[1])
+
+
+def test_ivf_is_retrained_as_the_cache_grows():
+    rng = np.random.default_rng(0)
+    ivf = CountingIVFIndex(nlist=4, nprobe=4, kmeans_iterations=3, retrain_growth=2.0)
+    cache = VectorCache(initial_capacity=4, vector_dim=DIM, search_mode="ivf", ivf_index=ivf)
+    vectors = _unit_vectors(rng, 40)
+    for vector_id, vector in enumerate(vectors, start=1):
+        cache.add_or_update(vector_id, f"item {vector_id}", vector)
+        _wait_for_retrain(cache)
+    cache.add_or_update(1, "item 1", vectors[1])
+
+    assert ivf.trained_on == [4, 8, 16, 32]
+    _assert_ivf_matches_exact(cache, rng)
+
+
+def test_retrain_runs_off_the_write_path():
+    rng = np.random.default_rng(2)
+    ivf = CountingIVFIndex(nlist=4, nprobe=4, kmeans_iterations=3, retrain_growth=2.0)
+    cache = VectorCache(initial_capacity=4, vector_dim=DIM, search_mode="ivf", ivf_index=ivf)
+    vectors = _unit_vectors(rng, 20)
+    ivf.release.clear()
+    try:
+        for vector_id, vector in enumerate(vectors[:8], start=1):
+            cache.add_or_update(vector_id, "", vector)
+        assert ivf.retraining.wait(5)
+        # Writes and searches go on against the old index while k-means runs.
+        cache.add_or_update_many(list(range(9, 21)), [""] * 12, vectors[8:])
+        cache.add_or_update(3, "", _unit_vectors(rng, 1)[0])
+        _assert_ivf_matches_exact(cache, rng)
+    finally:
+        ivf.release.set()
+    _wait_for_retrain(cache)
+
+    assert cache._ivf is not ivf
+    assert ivf.trained_on[:2] == [4, 8]
+    _assert_ivf_matches_exact(cache, rng)
+
+
+def test_retrain_is_discarded_when_rows_move():
+    rng = np.random.default_rng(3)
+    ivf = CountingIVFIndex(nlist=4, nprobe=4, kmeans_iterations=3, retrain_growth=2.0)
+    cache = VectorCache(initial_capacity=4, vector_dim=DIM, search_mode="ivf", ivf_index=ivf)
+    vectors = _unit_vectors(rng, 8)
+    ivf.release.clear()
+    try:
+        cache.add_or_update_many(list(range(1, 9)), [""] * 8, vectors)
+        assert ivf.retraining.wait(5)
+        cache.delete_many([2])
+    finally:
+        ivf.release.set()
+    _wait_for_retrain(cache)
+
+    assert cache._ivf is ivf
+    _assert_ivf_matches_exact(cache, rng)
+
+
+def test_retraining_can_be_disabled():
+    ivf = CountingIVFIndex(nlist=4, kmeans_iterations=3, retrain_growth=0)
+    cache = VectorCache(initial_capacity=4, vector_dim=DIM, search_mode="ivf", ivf_index=ivf)
+    vectors = _unit_vectors(np.random.default_rng(1), 40)
+    cache.add_or_update_many(list(range(1, 41)), [""] * 40, vectors)
+
+    assert ivf.trained_on == [4]
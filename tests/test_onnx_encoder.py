@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+import torch
+from transformers import BertConfig, BertModel, BertTokenizerFast
+
+from matching_service.config import MLConfig
+from matching_service.services.embedder import TextEmbedder
+from matching_service.services.onnx_encoder import onnx_model_path
+
+pytest.importorskip("onnxruntime")
+
+WORDS = ["адаптер", "щетки", "стеклоочистителя", "масло", "моторное", "wireless", "bluetooth", "headphones", "black", "white"]
+TEXTS = [
+    "адаптер bluetooth black",
+    "масло моторное",
+    "щетки стеклоочистителя white wireless headphones адаптер масло",
+    "x",
+]
+
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory) -> str:
+    path = tmp_path_factory.mktemp("tiny-bert")
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *sorted(WORDS)]
+    (path / "vocab.txt").write_text("\n".join(vocab) + "\n", encoding="utf-8")
+    BertTokenizerFast(vocab_file=str(path / "vocab.txt"), do_lower_case=True, strip_accents=False).save_pretrained(path)
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        intermediate_size=64,
+        max_position_embeddings=64,
+    )
+    BertModel(config).save_pretrained(path)
+    return str(path)
+
+
+def test_onnx_embeddings_match_torch(tiny_model, tmp_path):
+    tolerance = MLConfig().onnx_tolerance
+    torch_embedder = TextEmbedder(tiny_model, device="cpu", max_text_length=32, backend="torch")
+    onnx_embedder = TextEmbedder(
+        tiny_model,
+        device="cpu",
+        max_text_length=32,
+        backend="onnx",
+        onnx_dir=tmp_path,
+        onnx_tolerance=tolerance,
+    )
+    assert onnx_model_path(tmp_path, tiny_model).exists()
+
+    for batch_size in (1, 3):
+        expected = torch_embedder.encode(TEXTS, batch_size=batch_size, show_progress=False)
+        actual = onnx_embedder.encode(TEXTS, batch_size=batch_size, show_progress=False)
+        assert actual.shape == expected.shape == (len(TEXTS), 32)
+        np.testing.assert_allclose(actual, expected, rtol=0, atol=tolerance)
+
+
+def test_cached_onnx_export_matches_torch(tiny_model, tmp_path):
+    tolerance = MLConfig().onnx_tolerance
+    TextEmbedder(tiny_model, device="cpu", max_text_length=32, backend="onnx", onnx_dir=tmp_path)
+    exported = onnx_model_path(tmp_path, tiny_model).stat().st_mtime_ns
+
+    cached = TextEmbedder(tiny_model, device="cpu", max_text_length=32, backend="onnx", onnx_dir=tmp_path)
+    assert onnx_model_path(tmp_path, tiny_model).stat().st_mtime_ns == exported
+    expected = TextEmbedder(tiny_model, device="cpu", max_text_length=32).encode(TEXTS, batch_size=2, show_progress=False)
+    np.testing.assert_allclose(cached.encode(TEXTS, batch_size=2, show_progress=False), expected, rtol=0, atol=tolerance)
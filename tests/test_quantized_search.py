@@ -0,0 +1,40 @@
+import threading
+
+import numpy as np
+
+from matching_service.services.scalar_quantizer import ScalarQuantizer
+from matching_service.services.vector_cache import VectorCache
+
+DIM = 8
+ROWS = 50
+
+
+def test_rerank_reads_vectors_without_the_cache_lock():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((ROWS, DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    stored = dict(enumerate(vectors.tolist(), start=1))
+
+    def delete_best_match() -> None:
+        if stored.pop(1, None) is not None:
+            cache.delete_many([1])
+
+    def source(vector_ids: list[int]) -> np.ndarray:
+        # A delete from another thread must not wait for the SQLite read, nor break the result.
+        writer = threading.Thread(target=delete_best_match)
+        writer.start()
+        writer.join(5)
+        assert not writer.is_alive()
+        missing = [vector_id for vector_id in vector_ids if vector_id not in stored]
+        if missing:
+            raise RuntimeError(f"Vectors not found in storage: {missing}")
+        return np.array([stored[vector_id] for vector_id in vector_ids], dtype=np.float32)
+
+    cache = VectorCache(initial_capacity=ROWS, vector_dim=DIM, quantizer=ScalarQuantizer(vector_dim=DIM), vector_source=source)
+    cache.load_all(list(range(1, ROWS + 1)), [""] * ROWS, vectors)
+    with cache.pinned_rows():
+        _, rows = cache.search_vectors(vectors[0], 5)
+        found = [cache.get_metadata(int(row))[0] for row in rows[0] if row >= 0]
+
+    expected = (np.argsort(vectors[1:] @ vectors[0])[::-1][:5] + 2).tolist()
+    assert found == expected
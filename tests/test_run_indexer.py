@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+import pytest
+
+from matching_service.catalog import ProductAttributes
+from matching_service.config import DBConfig, MLConfig
+from matching_service.entrypoints import run_indexer as indexer
+from matching_service.storage.repositories import SqliteVectorRepository
+
+DIM = 4
+
+
+class CountingEmbedder:
+    encoded: list[str] = []
+
+    def __init__(self, **kwargs) -> None:
+        pass
+
+    def encode(self, texts: list[str], batch_size: int, normalize: bool = True, show_progress: bool = True) -> np.ndarray:
+        CountingEmbedder.encoded.extend(texts)
+        return np.ones((len(texts), DIM), dtype=np.float32)
+
+
+@pytest.fixture(autouse=True)
+def embedder(monkeypatch):
+    CountingEmbedder.encoded = []
+    monkeypatch.setattr(indexer, "TextEmbedder", CountingEmbedder)
+
+
+def _run(tmp_path, lines: list[str]):
+    catalog = tmp_path / "catalog.jsonl"
+    catalog.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return indexer.run_indexer(
+        file_path=catalog,
+        db_config=DBConfig(vector_db_path=tmp_path / "vectors.db"),
+        ml_config=MLConfig(),
+        chunk_size=2,
+        batch_size=8,
+        checkpoint_path=tmp_path / "checkpoint.json",
+    )
+
+
+def test_non_object_lines_are_skipped(tmp_path):
+    stats = _run(tmp_path, ["5", "[]", '"text"', "{broken", json.dumps({"id": 1, "title": "Щетка"})])
+
+    assert (stats.lines, stats.indexed, stats.skipped) == (5, 1, 4)
+
+
+def test_malformed_products_are_skipped(tmp_path):
+    lines = [
+        json.dumps({"id": 1, "title": None}),
+        json.dumps({"id": 2, "title": "Щетка", "seller": 42}),
+        json.dumps({"id": 3, "title": "Масло", "rating": "high"}),
+        json.dumps({"id": 4, "title": "Адаптер", "description": ["<b>list</b>"]}),
+        json.dumps({"id": 5, "title": "Адаптер ELM327", "seller": "a", "rating": 4.5}),
+    ]
+    stats = _run(tmp_path, lines)
+
+    assert (stats.lines, stats.indexed, stats.skipped) == (5, 1, 4)
+
+
+def test_only_embedded_rows_are_counted_as_indexed(tmp_path):
+    products = [{"id": vector_id, "title": f"Товар {vector_id}", "seller": "a"} for vector_id in range(1, 6)]
+    _run(tmp_path, [json.dumps(product) for product in products])
+    # A row stored before attributes were indexed: same text, empty attribute columns.
+    repository = SqliteVectorRepository(str(tmp_path / "vectors.db"))
+    repository.update_attributes([2], [ProductAttributes()])
+    repository.close()
+    CountingEmbedder.encoded = []
+
+    products[0]["title"] = "Новое название"
+    stats = _run(tmp_path, [json.dumps(product) for product in products])
+
+    assert CountingEmbedder.encoded == ["Название: Новое название | Продавец: a"]
+    assert (stats.indexed, stats.attributes_updated, stats.unchanged) == (1, 1, 3)
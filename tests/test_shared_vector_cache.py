@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from matching_service.services import shared_vector_store
+from matching_service.services.shared_vector_cache import SharedLayoutBusyError, SharedVectorCache
+from matching_service.services.shared_vector_store import SharedVectorStore, SharedVectorView
+
+
+@pytest.fixture
+def store():
+    store = SharedVectorStore(vector_dim=4, capacity=8)
+    store.load([1, 2, 3], np.eye(3, 4, dtype=np.float32))
+    yield store
+    store.close()
+
+
+def test_search_is_not_served_while_rows_are_moving(store):
+    view = SharedVectorView(store.control_name)
+    cache = SharedVectorCache(view, lambda synced_at: ({}, synced_at))
+    query = np.eye(1, 4, dtype=np.float32)
+    _, rows = cache.search_vectors(query, 1)
+    assert cache.get_metadata(int(rows[0][0]))[0] == 1
+
+    # An odd layout counter means the writer is in the middle of a delete.
+    store._header[shared_vector_store._LAYOUT] += 1
+    with pytest.raises(SharedLayoutBusyError):
+        cache.search_vectors(query, 1)
+
+    store._header[shared_vector_store._LAYOUT] += 1
+    _, rows = cache.search_vectors(query, 1)
+    assert cache.get_metadata(int(rows[0][0]))[0] == 1
+    cache.close()
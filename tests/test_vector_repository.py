@@ -0,0 +1,26 @@
+import numpy as np
+
+from matching_service.catalog import ProductAttributes
+from matching_service.storage.repositories import SqliteVectorRepository
+
+
+def test_attributes_only_change_keeps_the_stored_vector(tmp_path):
+    repository = SqliteVectorRepository(str(tmp_path / "vectors.db"))
+    vectors = np.arange(8, dtype=np.float32).reshape(2, 4)
+    repository.upsert_many([1, 2], ["a", "b"], vectors, [ProductAttributes(seller="s1"), ProductAttributes(rating=4.0)])
+
+    same_text, same_attributes = repository.find_unchanged(
+        [1, 2, 3],
+        ["a", "changed", "c"],
+        [ProductAttributes(seller="s2"), ProductAttributes(rating=4.0), ProductAttributes()],
+    )
+    assert same_text == {1}
+    assert same_attributes == {2}
+
+    repository.update_attributes([1], [ProductAttributes(category=("root", "leaf"), seller="s2")])
+    try:
+        assert repository.find_unchanged([1], ["a"], [ProductAttributes(category=("root", "leaf"), seller="s2")]) == ({1}, {1})
+        assert repository.get_attributes()[1] == ProductAttributes(category=("root", "leaf"), seller="s2")
+        assert repository.get_vectors_by_ids([1]).tolist() == [[0.0, 1.0, 2.0, 3.0]]
+    finally:
+        repository.close()
@@ -0,0 +1,136 @@
+import asyncio
+import sqlite3
+import threading
+
+import numpy as np
+import pytest
+
+from matching_service.catalog import ProductAttributes
+from matching_service.services.vector_cache import VectorCache
+from matching_service.services.write_behind_queue import WriteBehindQueue
+from matching_service.storage.repositories import SqliteVectorRepository
+
+DIM = 4
+
+
+class BlockingRepository(SqliteVectorRepository):
+    def __init__(self, db_path: str) -> None:
+        super().__init__(db_path)
+        self.committing = threading.Event()
+        self.release = threading.Event()
+
+    def upsert_many(self, *args, **kwargs) -> None:
+        self.committing.set()
+        assert self.release.wait(5)
+        super().upsert_many(*args, **kwargs)
+
+
+class FailingOnceRepository(SqliteVectorRepository):
+    def __init__(self, db_path: str) -> None:
+        super().__init__(db_path)
+        self.failed = False
+
+    def upsert_many(self, *args, **kwargs) -> None:
+        if not self.failed:
+            self.failed = True
+            raise sqlite3.OperationalError("database is locked")
+        super().upsert_many(*args, **kwargs)
+
+
+class FailingRepository(SqliteVectorRepository):
+    def __init__(self, db_path: str) -> None:
+        super().__init__(db_path)
+        self.failing = False
+
+    def upsert_many(self, *args, **kwargs) -> None:
+        if self.failing:
+            raise sqlite3.OperationalError("disk I/O error")
+        super().upsert_many(*args, **kwargs)
+
+    def delete_many(self, vector_ids: list[int]) -> list[int]:
+        if self.failing:
+            raise sqlite3.OperationalError("disk I/O error")
+        return super().delete_many(vector_ids)
+
+
+class FastRetryQueue(WriteBehindQueue):
+    _RETRY_DELAY_SECONDS = 0
+
+
+def _vectors(rows: int) -> np.ndarray:
+    return np.ones((rows, DIM), dtype=np.float32)
+
+
+def test_cancelled_durable_upsert_keeps_writer_alive(tmp_path):
+    repository = BlockingRepository(str(tmp_path / "vectors.db"))
+    cache = VectorCache(initial_capacity=4, vector_dim=DIM)
+    queue = WriteBehindQueue(repository, batch_rows=1, max_delay_ms=0)
+
+    async def cancel_during_commit() -> None:
+        _, committed = queue.upsert(cache, [1], ["first"], _vectors(1), [ProductAttributes()])
+        waiter = asyncio.ensure_future(asyncio.wrap_future(committed))
+        await asyncio.get_running_loop().run_in_executor(None, repository.committing.wait, 5)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        assert committed.cancelled()
+
+    try:
+        asyncio.run(cancel_during_commit())
+        repository.release.set()
+        _, committed = queue.upsert(cache, [2], ["second"], _vectors(1), [ProductAttributes()])
+        assert committed.result(timeout=5) is None
+        stats = queue.stats()
+    finally:
+        repository.release.set()
+        queue.close()
+
+    assert stats.failed_rows_total == 0
+    assert stats.rows_total == 2
+    assert sorted(repository.get_texts()) == [1, 2]
+
+
+def test_transient_commit_failure_is_retried(tmp_path):
+    repository = FailingOnceRepository(str(tmp_path / "vectors.db"))
+    cache = VectorCache(initial_capacity=4, vector_dim=DIM)
+    queue = FastRetryQueue(repository, batch_rows=1, max_delay_ms=0)
+    try:
+        _, committed = queue.upsert(cache, [1], ["first"], _vectors(1), [ProductAttributes()])
+        assert committed.result(timeout=5) is None
+        stats = queue.stats()
+    finally:
+        queue.close()
+
+    assert stats.failed_rows_total == 0
+    assert sorted(repository.get_texts()) == [1]
+
+
+def test_failed_commit_rolls_back_the_cache(tmp_path):
+    repository = FailingRepository(str(tmp_path / "vectors.db"))
+    repository.upsert_many([1, 2], ["stored 1", "stored 2"], _vectors(2), [ProductAttributes(), ProductAttributes()])
+    cache = VectorCache(initial_capacity=4, vector_dim=DIM)
+    cache.load_all([1, 2], ["stored 1", "stored 2"], _vectors(2))
+    queue = FastRetryQueue(repository, batch_rows=1, max_delay_ms=0)
+    repository.failing = True
+    try:
+        _, failed_upsert = queue.upsert(cache, [1, 3], ["new 1", "new 3"], _vectors(2) * 2, [ProductAttributes()] * 2)
+        with pytest.raises(sqlite3.OperationalError):
+            failed_upsert.result(timeout=5)
+        failed_delete = queue.delete(cache, [2])
+        with pytest.raises(sqlite3.OperationalError):
+            failed_delete.result(timeout=5)
+        repository.failing = False
+        _, committed = queue.upsert(cache, [4], ["fourth"], _vectors(1), [ProductAttributes()])
+        assert committed.result(timeout=5) is None
+        stats = queue.stats()
+    finally:
+        queue.close()
+
+    assert stats.failed_rows_total == 3
+    assert stats.queue_depth == 0
+    assert sorted(repository.get_texts()) == [1, 2, 4]
+    # The cache serves what SQLite has: the failed upsert and delete are undone.
+    assert not cache.contains(3)
+    rows = {cache.get_metadata(idx)[0]: idx for idx in range(cache.count())}
+    assert sorted(rows) == [1, 2, 4]
+    assert cache.get_metadata(rows[1])[1] == "stored 1"
+    assert np.array_equal(cache.export_vectors()[1][rows[1]], _vectors(1)[0])